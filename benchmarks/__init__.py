@@ -0,0 +1,4 @@
+"""Benchmarks for the collector parsers and the dashboard pipeline.
+
+Run with `python -m benchmarks.run` from the repository root; see run.py.
+"""
@@ -0,0 +1,226 @@
+"""Time the collector parsers and the dashboard pipeline on synthetic machines.
+
+Every subprocess is answered from benchmarks.workload (see stub.py), so
+this runs on plain Linux and measures MacWatch's own cost only.
+
+Usage:
+    python -m benchmarks.run                          # medium scale
+    python -m benchmarks.run --scale all              # small, medium, large
+    python -m benchmarks.run --sockets 20000 --processes 3000
+    python -m benchmarks.run --save-baseline          # store these numbers
+    python -m benchmarks.run --check                  # exit 1 on regressions
+
+For each case the median wall time over --repeat runs, the throughput
+(items per second) and the peak traced memory of one run are reported
+and compared with benchmarks/baseline.json.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks import stub
+from benchmarks.workload import Workload
+
+# name -> (sockets, processes)
+SCALES = {
+    "small": (100, 100),
+    "medium": (5000, 1000),
+    "large": (100000, 10000),
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Slower than the baseline by more than this counts as a regression
+REGRESSION_RATIO = 1.25
+
+
+def build_cases(workload):
+    """Prepare inputs and return [(name, items, callable)] for one workload.
+
+    Caches (DNS, whois, codesign) are warmed first, so the pipeline cases
+    measure a steady-state refresh rather than the first one.
+    """
+    from src import app
+    from src.analysis import threat
+    from src.collectors import lsof, nettop, process, system
+    from src.enrichment import dns, whois_lookup
+    from src.ipnet import is_private
+
+    connections = lsof.collect_once()
+    table = process.collect_process_table()
+    raw = {
+        "connections": connections,
+        "traffic": nettop.collect_once(),
+        "processes": table,
+        "cpu": system.collect_cpu(),
+        "memory": system.collect_memory(),
+        "disk": system.collect_disk(),
+    }
+
+    remote_ips = sorted({c["remote_addr"] for c in connections
+                         if c["remote_addr"] and not is_private(c["remote_addr"])})
+    for ip in remote_ips:
+        whois_lookup.lookup(ip)
+    dns.resolve_batch(remote_ips, timeout=60)
+    process.codesign_batch((row.path for row in table.rows.values()), timeout=60)
+
+    apps = _score_inputs(connections, whois_lookup)
+    data = app._build_dashboard_data(raw)
+    whois_sample = remote_ips[:500]
+
+    return [
+        ("lsof", workload.sockets, lsof.collect_once),
+        ("nettop", len(raw["traffic"]), nettop.collect_once),
+        ("ps", workload.processes, process.collect_ps),
+        ("system", 1, system.collect_system_stats),
+        ("whois", len(whois_sample),
+         lambda: [whois_lookup._run_whois(ip) for ip in whois_sample]),
+        ("score_app", workload.sockets, lambda: [threat.score_app(a) for a in apps]),
+        ("build", workload.sockets, lambda: app._build_dashboard_data(raw)),
+        ("encode", workload.sockets, lambda: json.dumps(data)),
+    ]
+
+
+def _score_inputs(connections, whois_lookup):
+    """Group connections into the per-app dicts threat.score_app expects."""
+    from src.ipnet import is_private
+
+    apps = {}
+    for conn in connections:
+        app_data = apps.setdefault(conn["pid"], {
+            "app": conn["app"], "signed": True, "connections": [],
+            "bytes_in": 0, "bytes_out": 0, "re_tx": 0, "unique_ips": set(),
+            "cpu": 0.0, "mem": 0.0,
+        })
+        conn = dict(conn)
+        remote = conn.get("remote_addr")
+        if remote and not is_private(remote):
+            info = whois_lookup.lookup(remote)
+            conn["hostname"] = None
+            conn["whois_org"] = info["org"]
+            conn["whois_country"] = info["country"]
+            app_data["unique_ips"].add(remote)
+        app_data["connections"].append(conn)
+    return list(apps.values())
+
+
+def measure(fn, repeat):
+    """Return (median seconds, peak traced bytes) of calling fn()."""
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def run_scale(sockets, processes, repeat):
+    """Benchmark one workload size. Returns {case: {seconds, peak_bytes, items}}."""
+    workload = Workload(sockets, processes)
+    stub.install(workload)
+    results = {}
+    for name, items, fn in build_cases(workload):
+        seconds, peak = measure(fn, repeat)
+        results[name] = {"seconds": seconds, "peak_bytes": peak, "items": items}
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"scales": {}}
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    baseline["python"] = platform.python_version()
+    baseline["machine"] = f"{platform.system()} {platform.machine()}"
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(key, results, reference):
+    """Print one scale's results; return the names of regressed cases."""
+    regressions = []
+    print(f"\n{key}")
+    print(f"{'case':<10} {'items':>7} {'median ms':>10} {'items/s':>11} "
+          f"{'peak MB':>8}  vs baseline (time, memory)")
+    for name, r in results.items():
+        line = (f"{name:<10} {r['items']:>7} {r['seconds'] * 1000:>10.2f} "
+                f"{r['items'] / r['seconds'] if r['seconds'] else 0:>11,.0f} "
+                f"{r['peak_bytes'] / 1e6:>8.2f}")
+        base = reference.get(name)
+        if base and base["seconds"] and base["peak_bytes"]:
+            time_ratio = r["seconds"] / base["seconds"]
+            line += f"  {time_ratio:.2f}x, {r['peak_bytes'] / base['peak_bytes']:.2f}x"
+            if time_ratio > REGRESSION_RATIO:
+                line += "  SLOWER"
+                regressions.append(f"{key}/{name}")
+        else:
+            line += "  (no baseline)"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", choices=sorted(SCALES) + ["all"], default="medium")
+    parser.add_argument("--sockets", type=int, help="custom scale (with --processes)")
+    parser.add_argument("--processes", type=int, help="custom scale (with --sockets)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help=f"exit 1 if a case is more than {REGRESSION_RATIO}x slower")
+    args = parser.parse_args(argv)
+
+    if args.sockets or args.processes:
+        sizes = [(args.sockets or SCALES["medium"][0], args.processes or SCALES["medium"][1])]
+    elif args.scale == "all":
+        sizes = list(SCALES.values())
+    else:
+        sizes = [SCALES[args.scale]]
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    for sockets, processes in sizes:
+        key = f"{sockets} sockets x {processes} processes"
+        results = run_scale(sockets, processes, args.repeat)
+        regressions += report(key, results, baseline["scales"].get(key, {}))
+        if args.save_baseline:
+            baseline["scales"][key] = {
+                name: {"seconds": round(r["seconds"], 6), "peak_bytes": r["peak_bytes"]}
+                for name, r in results.items()
+            }
+
+    if args.save_baseline:
+        save_baseline(baseline, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+    if regressions:
+        print(f"\nSlower than baseline: {', '.join(regressions)}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Replace the subprocess layer with a Workload's canned output.
+
+After install(), every subprocess.run() call made by the collectors and
+enrichment modules is answered from the workload by tool name, and
+reverse DNS answers from a stub resolver, so the benchmarks measure
+parsing and pipeline cost only and run on any OS.
+"""
+
+import subprocess
+
+from src.enrichment import dns
+
+_counts = {}
+
+
+def install(workload):
+    """Route subprocess.run and reverse DNS to `workload` for this process."""
+    outputs = {
+        "lsof": lambda argv: workload.lsof,
+        "nettop": lambda argv: workload.nettop,
+        "ps": lambda argv: workload.ps_args(argv[-1]) if "-p" in argv else workload.ps,
+        "top": lambda argv: workload.top,
+        "sysctl": lambda argv: workload.memsize,
+        "vm_stat": lambda argv: workload.vm_stat,
+        "df": lambda argv: workload.df,
+        "whois": lambda argv: workload.whois(argv[-1]),
+    }
+
+    def run(argv, **kwargs):
+        tool = argv[0]
+        _counts[tool] = _counts.get(tool, 0) + 1
+        if tool == "codesign":
+            # codesign reports on stderr
+            return subprocess.CompletedProcess(argv, 0, "", workload.codesign(argv[-1]))
+        if tool not in outputs:
+            raise FileNotFoundError(tool)
+        return subprocess.CompletedProcess(argv, 0, outputs[tool](argv), "")
+
+    def popen(argv, *args, **kwargs):
+        raise FileNotFoundError(argv[0])  # no streaming collectors
+
+    subprocess.run = run
+    subprocess.Popen = popen
+    dns.set_resolver(lambda ip: f"host-{ip.replace(':', '-').replace('.', '-')}.example.net")
+
+
+def get_counts():
+    """Return how many times each tool was invoked."""
+    return dict(_counts)
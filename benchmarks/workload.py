@@ -0,0 +1,280 @@
+"""Synthetic, deterministic output of the tools MacWatch runs.
+
+A Workload describes one machine (how many processes, how many sockets)
+and renders what lsof, nettop, ps, top, sysctl, vm_stat, df, whois and
+codesign would print on it.  The same seed always yields the same output,
+so runs are comparable.
+"""
+
+import ipaddress
+import random
+
+# (executable path, user) of the processes that own sockets
+_NETWORK_APPS = [
+    ("/Applications/Google Chrome.app/Contents/Frameworks/Google Chrome Framework.framework/"
+     "Versions/Current/Helpers/Google Chrome Helper.app/Contents/MacOS/Google Chrome Helper",
+     "user"),
+    ("/Applications/Slack.app/Contents/Frameworks/Slack Helper.app/Contents/MacOS/Slack Helper",
+     "user"),
+    ("/Applications/Safari.app/Contents/MacOS/Safari", "user"),
+    ("/System/Library/Frameworks/WebKit.framework/Versions/A/XPCServices/"
+     "com.apple.WebKit.Networking.xpc/Contents/MacOS/com.apple.WebKit.Networking", "user"),
+    ("/Applications/Spotify.app/Contents/MacOS/Spotify", "user"),
+    ("/Applications/zoom.us.app/Contents/MacOS/zoom.us", "user"),
+    ("/Applications/Dropbox.app/Contents/MacOS/Dropbox", "user"),
+    ("/usr/sbin/mDNSResponder", "_mdnsresponder"),
+    ("/usr/libexec/rapportd", "user"),
+    ("/System/Library/PrivateFrameworks/IDS.framework/identityservicesd.app/"
+     "Contents/MacOS/identityservicesd", "user"),
+    ("/usr/local/bin/node", "user"),
+    ("/usr/bin/ssh", "user"),
+    ("/usr/bin/curl", "user"),
+]
+
+# Processes without sockets
+_OTHER_APPS = [
+    ("/System/Library/CoreServices/Finder.app/Contents/MacOS/Finder", "user"),
+    ("/usr/libexec/logd", "root"),
+    ("/usr/sbin/cfprefsd", "root"),
+    ("/System/Library/CoreServices/Dock.app/Contents/MacOS/Dock", "user"),
+    ("/usr/libexec/trustd", "root"),
+    ("/bin/zsh", "user"),
+    ("/usr/libexec/syspolicyd", "root"),
+    ("/Applications/Visual Studio Code.app/Contents/MacOS/Electron", "user"),
+]
+
+_REMOTE_PORTS = [443] * 12 + [80, 80, 5223, 8443, 993, 22, 6881, 4444]
+_STATES = ["ESTABLISHED"] * 14 + ["CLOSE_WAIT", "SYN_SENT", "FIN_WAIT_2"]
+
+_ORGS = [
+    ("Google LLC", "US"), ("Amazon.com, Inc.", "US"), ("Cloudflare, Inc.", "US"),
+    ("Akamai Technologies, Inc.", "US"), ("Apple Inc.", "US"),
+    ("Fastly, Inc.", "US"), ("Microsoft Corporation", "US"),
+    ("DigitalOcean, LLC", "US"), ("Hetzner Online GmbH", "DE"),
+    ("OVH SAS", "FR"), ("Yandex LLC", "RU"), ("Alibaba Cloud", "CN"),
+]
+
+_TEAMS = {
+    "Google": ("Developer ID Application: Google LLC (EQHXZ8M8AV)", "EQHXZ8M8AV"),
+    "Slack": ("Developer ID Application: Slack Technologies, Inc. (BQR82RBBHL)", "BQR82RBBHL"),
+    "Spotify": ("Developer ID Application: Spotify (2FNC3A47ZF)", "2FNC3A47ZF"),
+    "zoom": ("Developer ID Application: Zoom Video Communications, Inc. (BJ4HAAB9B3)",
+             "BJ4HAAB9B3"),
+    "Dropbox": ("Developer ID Application: Dropbox, Inc. (G7HH3F8CAK)", "G7HH3F8CAK"),
+}
+
+
+class Workload:
+    """One synthetic machine.
+
+    Args:
+        sockets: number of open network sockets (lsof rows).
+        processes: number of running processes (ps rows).
+        seed: random seed; equal arguments give identical output.
+    """
+
+    def __init__(self, sockets, processes, seed=1):
+        self.sockets = sockets
+        self.processes = processes
+        rng = random.Random(seed)
+
+        # Roughly one networked process per 20 sockets, like a busy laptop
+        networked = max(1, min(processes, sockets // 20 or 1))
+        self.procs = []  # (pid, ppid, path, user, networked)
+        for i in range(processes):
+            pool = _NETWORK_APPS if i < networked else _OTHER_APPS
+            path, user = pool[rng.randrange(len(pool))]
+            self.procs.append((100 + i, 1 if i < 10 else 100 + rng.randrange(10),
+                               path, user, i < networked))
+
+        # Far fewer distinct remote hosts than sockets
+        hosts = max(1, sockets // 4)
+        self.remote_ips = [_public_ip(rng) for _ in range(hosts)]
+
+        self.lsof = _render_lsof(rng, self.procs[:networked], sockets, self.remote_ips)
+        self.nettop = _render_nettop(rng, self.procs[:networked])
+        self.ps = _render_ps(rng, self.procs)
+        self.top = _render_top(rng, processes)
+        self.memsize = "34359738368\n"
+        self.vm_stat = _render_vm_stat(rng)
+        self.df = ("Filesystem     1024-blocks      Used Available Capacity iused      ifree "
+                   "%iused  Mounted on\n"
+                   "/dev/disk3s1s1   971350180  10462484 394543636     3%  403392 3945436360 "
+                   "   0%   /\n")
+
+    def ps_args(self, pids):
+        """Return `ps -o pid=,args= -p <pids>` output."""
+        wanted = {int(pid) for pid in pids.split(",")}
+        return "".join(f"{pid:5d} {_args(path)}\n" for pid, _, path, _, _ in self.procs
+                       if pid in wanted)
+
+    def whois(self, ip):
+        """Return ARIN-style whois output for an IP (one /24 per host)."""
+        org, country = _ORGS[int(ipaddress.ip_address(ip)) % len(_ORGS)]
+        net = ipaddress.ip_network(f"{ip}/24", strict=False)
+        handle = org.split()[0].upper().strip(",.")
+        return (
+            "#\n# ARIN WHOIS data and services are subject to the Terms of Use\n#\n\n"
+            f"NetRange:       {net[0]} - {net[-1]}\n"
+            f"CIDR:           {net}\n"
+            f"NetName:        {handle}-NET\n"
+            f"NetHandle:      NET-{str(net[0]).replace('.', '-')}-1\n"
+            "Parent:         NET-0-0-0-0-0 (NET-0-0-0-0-0)\n"
+            "NetType:        Direct Allocation\n"
+            f"OrgName:        {org}\n"
+            f"OrgId:          {handle[:6]}\n"
+            "Address:        1600 Example Parkway\n"
+            "City:           Mountain View\n"
+            "StateProv:      CA\n"
+            "PostalCode:     94043\n"
+            f"Country:        {country}\n"
+            "RegDate:        2012-02-24\n"
+            "Updated:        2023-05-10\n"
+        )
+
+    def codesign(self, path):
+        """Return `codesign -dvvv` stderr for a binary or bundle."""
+        for key, (authority, team) in _TEAMS.items():
+            if key in path:
+                break
+        else:
+            if path.startswith(("/System/", "/usr/")):
+                authority, team = "Software Signing", "not set"
+            elif "node" in path:
+                return f"{path}: code object is not signed at all\n"
+            else:
+                authority, team = "Apple Development: dev@example.com (ABCDE12345)", "ABCDE12345"
+        name = path.rstrip("/").rsplit("/", 1)[-1].replace(".app", "")
+        return (
+            f"Executable={path}\n"
+            f"Identifier=com.example.{name.replace(' ', '')}\n"
+            "Format=app bundle with Mach-O universal (x86_64 arm64)\n"
+            "CodeDirectory v=20500 size=1234 flags=0x10000(runtime) hashes=27+7 location=embedded\n"
+            "Hash type=sha256 size=32\n"
+            f"Authority={authority}\n"
+            "Authority=Developer ID Certification Authority\n"
+            "Authority=Apple Root CA\n"
+            "Timestamp=Jan 5, 2026 at 10:11:12 AM\n"
+            f"TeamIdentifier={team}\n"
+        )
+
+
+def _public_ip(rng):
+    if rng.random() < 0.15:
+        return str(ipaddress.IPv6Address((0x2600 << 112) | rng.getrandbits(96)))
+    while True:
+        ip = ipaddress.IPv4Address(rng.getrandbits(32))
+        if ip.is_global:
+            return str(ip)
+
+
+def _command(path):
+    # lsof shows the first nine characters, spaces escaped
+    return path.rsplit("/", 1)[-1][:9].replace(" ", "\\x20")
+
+
+def _render_lsof(rng, procs, sockets, remote_ips):
+    """`lsof -i -n -P -Ts -FpcLfatPnT` output."""
+    per_proc = [sockets // len(procs)] * len(procs)
+    for i in range(sockets % len(procs)):
+        per_proc[i] += 1
+
+    out = []
+    for (pid, _, path, user, _), count in zip(procs, per_proc):
+        out.append(f"p{pid}\nc{_command(path)}\nL{user}\n")
+        for fd in range(count):
+            roll = rng.random()
+            remote = remote_ips[rng.randrange(len(remote_ips))]
+            v6 = ":" in remote
+            local = "[fe80::1c2a:4bff:fe00:1%en0]" if v6 else "192.168.1.23"
+            out.append(f"f{fd + 20}\nau\nt{'IPv6' if v6 else 'IPv4'}\n")
+            if roll < 0.05:
+                out.append(f"PTCP\nn*:{rng.randrange(1024, 65535)}\nTST=LISTEN\n")
+            elif roll < 0.12:
+                out.append(f"PUDP\nn*:{rng.randrange(1024, 65535)}\n")
+            else:
+                rport = _REMOTE_PORTS[rng.randrange(len(_REMOTE_PORTS))]
+                rhost = f"[{remote}]" if v6 else remote
+                state = _STATES[rng.randrange(len(_STATES))]
+                out.append(f"PTCP\nn{local}:{rng.randrange(49152, 65535)}->{rhost}:{rport}\n"
+                           f"TST={state}\n")
+    return "".join(out)
+
+
+def _render_nettop(rng, procs):
+    """`nettop -L 1 -P -n -x` output: CSV header and one row per process."""
+    out = ["time,,interface,state,bytes_in,bytes_out,rx_dupe,rx_ooo,re-tx,rtt_avg,"
+           "rcvsize,tx_win,tc_class,tc_mgt,cc_algo,P,C,R,W,arch,\n"]
+    for pid, _, path, _, _ in procs:
+        name = path.rsplit("/", 1)[-1][:15]
+        out.append(
+            f"10:42:07.123456,{name}.{pid},,,{rng.randrange(10 ** 9)},"
+            f"{rng.randrange(10 ** 8)},{rng.randrange(50)},{rng.randrange(50)},"
+            f"{rng.randrange(200)},,,,,,,,,,,,\n")
+    return "".join(out)
+
+
+def _render_ps(rng, procs):
+    """`ps -eo pid=,ppid=,...,comm=` output (no header)."""
+    out = []
+    for pid, ppid, path, user, _ in procs:
+        cpu = rng.choice((0.0, 0.0, 0.0, rng.random() * 5, rng.random() * 80))
+        out.append(
+            f"{pid:5d} {ppid:5d} {pid:5d} {user:<14} {cpu:4.1f} {rng.random() * 3:4.1f} "
+            f"{rng.randrange(1000, 900000):7d} {rng.randrange(10 ** 8, 10 ** 9):9d}   0  31 Ss   "
+            f"0:{rng.randrange(60):02d}.{rng.randrange(100):02d} "
+            f"Mon Feb 16 15:{rng.randrange(60):02d}:{rng.randrange(60):02d} 2026 "
+            f"09-20:52:44 {path}\n")
+    return "".join(out)
+
+
+def _args(path):
+    if "Helper" in path:
+        return path + " --type=renderer --lang=en-US --num-raster-threads=4"
+    return path
+
+
+def _render_top(rng, processes):
+    """`top -l 1 -n 0 -s 0` output."""
+    user, system = rng.random() * 40, rng.random() * 20
+    return (
+        f"Processes: {processes} total, 3 running, {processes - 3} sleeping, 4121 threads\n"
+        "2026/02/16 15:44:11\n"
+        f"Load Avg: {rng.random() * 8:.2f}, {rng.random() * 8:.2f}, {rng.random() * 8:.2f}\n"
+        f"CPU usage: {user:.2f}% user, {system:.2f}% sys, {100 - user - system:.2f}% idle\n"
+        "SharedLibs: 512M resident, 98M data, 61M linkedit.\n"
+        "MemRegions: 223116 total, 6841M resident, 262M private, 2391M shared.\n"
+        "PhysMem: 31G used (3163M wired, 2012M compressor), 672M unused.\n"
+        "VM: 240T vsize, 4633M framework vsize, 0(0) swapins, 0(0) swapouts.\n"
+        "Networks: packets: 9013442/8162M in, 6034522/1520M out.\n"
+        "Disks: 4120341/61G read, 2131231/41G written.\n"
+    )
+
+
+def _render_vm_stat(rng):
+    """`vm_stat` output."""
+    pages = {
+        "Pages free": rng.randrange(10000, 100000),
+        "Pages active": rng.randrange(500000, 900000),
+        "Pages inactive": rng.randrange(300000, 800000),
+        "Pages speculative": rng.randrange(1000, 50000),
+        "Pages throttled": 0,
+        "Pages wired down": rng.randrange(150000, 250000),
+        "Pages purgeable": rng.randrange(1000, 20000),
+        '"Translation faults"': rng.randrange(10 ** 9),
+        "Pages copy-on-write": rng.randrange(10 ** 7),
+        "Pages zero filled": rng.randrange(10 ** 9),
+        "Pages reactivated": rng.randrange(10 ** 6),
+        "Pages purged": rng.randrange(10 ** 6),
+        "File-backed pages": rng.randrange(100000, 400000),
+        "Anonymous pages": rng.randrange(400000, 900000),
+        "Pages stored in compressor": rng.randrange(100000, 500000),
+        "Pages occupied by compressor": rng.randrange(50000, 200000),
+        "Decompressions": rng.randrange(10 ** 6),
+        "Compressions": rng.randrange(10 ** 6),
+        "Swapins": 0,
+        "Swapouts": 0,
+    }
+    lines = ["Mach Virtual Memory Statistics: (page size of 16384 bytes)"]
+    lines += [f"{(name + ':'):<30}{value:>16}." for name, value in pages.items()]
+    return "\n".join(lines) + "\n"
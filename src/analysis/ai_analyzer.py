@@ -312,7 +312,7 @@ def build_analysis_prompt(data):
             f"    Connections: {app['connection_count']}\n"
             f"    Traffic: In={app['bytes_in_fmt']}, Out={app['bytes_out_fmt']}\n"
             f"    CPU: {app['cpu']:.1f}%, Memory: {app['mem']:.1f}%\n"
-            f"    Code Signed: {'Yes (' + (app.get('sign_authority') or 'Unknown') + ')' if app.get('signed') else 'NO — UNSIGNED'}\n"
+            f"    Code Signed: {_signed_text(app)}\n"
             f"    Threat Score: {app['threat_score']} ({app['threat_level']})\n"
             f"    Path: {app.get('path', 'unknown')}"
         )
@@ -425,6 +425,15 @@ IMPORTANT FORMATTING RULES:
     return prompt
 
 
+def _signed_text(app):
+    """Describe an app's code signing status for the prompt."""
+    if app.get("signed") is None:
+        return "Unknown (cannot be checked on this system)"
+    if app["signed"]:
+        return f"Yes ({app.get('sign_authority') or 'Unknown'})"
+    return "NO — UNSIGNED"
+
+
 def _parse_ai_response(raw_text):
     """Parse the AI response text into a structured dict."""
     result = {
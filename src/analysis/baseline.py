@@ -0,0 +1,136 @@
+"""Per-app baseline of remote endpoints, for new-connection alerts.
+
+Each endpoint (IP + port) is packed into a single integer and stored per
+app with the time it was last seen.  Endpoints not seen for
+BASELINE_MAX_AGE are forgotten, each app keeps at most
+BASELINE_MAX_PER_APP of them beyond those it is currently using, and the
+baseline is persisted through cache_store so alerts stay meaningful
+across restarts.
+"""
+
+import heapq
+import ipaddress
+import threading
+import time
+
+from src import cache_store
+from src.config import BASELINE_MAX_AGE, BASELINE_MAX_PER_APP, BASELINE_TOUCH_INTERVAL
+
+
+def pack_endpoint(addr, port):
+    """Pack an IP address and port into one int, or None if addr is invalid.
+
+    Layout: address bits, one bit for IPv6, then 16 bits of port — so an
+    IPv4 address never collides with an IPv6 address of the same value.
+    """
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return None
+    return (int(ip) << 17) | ((ip.version == 6) << 16) | ((port or 0) & 0xFFFF)
+
+
+class Baseline:
+    """Remote endpoints seen per app, with last-seen aging.
+
+    observe() only updates memory; call flush() once per refresh to apply
+    the per-app cap and persist each changed app a single time.
+    """
+
+    def __init__(self):
+        self._apps = {}  # app name -> {packed endpoint: last_seen (int seconds)}
+        self._live = {}  # app name -> endpoints observed since the last flush
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._last_prune = time.time()
+
+    def observe(self, app_name, endpoints):
+        """Record endpoints for an app and return the ones never seen before.
+
+        `endpoints` is a list of (addr, port, label) tuples; the labels of
+        new endpoints are returned in order.
+        """
+        if not endpoints:
+            return []
+        now = int(time.time())
+        new = []
+        with self._lock:
+            seen = self._apps.setdefault(app_name, {})
+            live = self._live.setdefault(app_name, set())
+            for addr, port, label in endpoints:
+                key = pack_endpoint(addr, port)
+                if key is None:
+                    continue
+                live.add(key)
+                last_seen = seen.get(key)
+                if last_seen is None:
+                    new.append(label)
+                elif now - last_seen < BASELINE_TOUCH_INTERVAL:
+                    continue
+                seen[key] = now
+                self._dirty.add(app_name)
+        return new
+
+    def flush(self):
+        """Trim and persist every app changed since the last flush.
+
+        Endpoints observed since the last flush are never trimmed, so an app
+        with more live endpoints than BASELINE_MAX_PER_APP keeps them all
+        rather than reporting the evicted ones as new on the next refresh.
+        """
+        if time.time() - self._last_prune > BASELINE_TOUCH_INTERVAL:
+            self.prune()
+        with self._lock:
+            for app_name in self._dirty:
+                seen = self._apps.get(app_name)
+                if not seen:
+                    continue
+                if len(seen) > BASELINE_MAX_PER_APP:
+                    self._trim(seen, self._live.get(app_name, ()))
+                self._persist(app_name, seen)
+            self._dirty.clear()
+            self._live.clear()
+
+    def prune(self):
+        """Forget endpoints (and apps) not seen within BASELINE_MAX_AGE."""
+        cutoff = int(time.time()) - BASELINE_MAX_AGE
+        with self._lock:
+            self._last_prune = time.time()
+            for app_name in list(self._apps):
+                seen = self._apps[app_name]
+                stale = [key for key, last_seen in seen.items() if last_seen < cutoff]
+                for key in stale:
+                    del seen[key]
+                if not seen:
+                    del self._apps[app_name]
+                elif stale:
+                    self._dirty.add(app_name)
+
+    def load(self):
+        """Restore the baseline from the persistent store."""
+        entries = cache_store.load("baseline")
+        with self._lock:
+            for app_name, (pairs, _) in entries.items():
+                self._apps[app_name] = {int(key): int(ts) for key, ts in pairs}
+        self.prune()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "apps": len(self._apps),
+                "endpoints": sum(len(seen) for seen in self._apps.values()),
+                "max_age": BASELINE_MAX_AGE,
+                "max_per_app": BASELINE_MAX_PER_APP,
+            }
+
+    @staticmethod
+    def _trim(seen, keep):
+        """Drop the least recently seen endpoints not in `keep` down to the cap."""
+        excess = len(seen) - BASELINE_MAX_PER_APP
+        stale = (key for key in seen if key not in keep)
+        for key in heapq.nsmallest(excess, stale, key=seen.get):
+            del seen[key]
+
+    @staticmethod
+    def _persist(app_name, seen):
+        cache_store.put("baseline", app_name, [[key, ts] for key, ts in seen.items()])
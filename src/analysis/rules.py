@@ -0,0 +1,201 @@
+"""Compiled per-connection threat rules.
+
+Rules are declared as data (config.THREAT_RULES) and compiled once into
+set lookups and a single multi-pattern automaton for whois org substrings,
+so scoring a connection costs one pass over its org name plus a few hash
+lookups per rule, however many providers are listed.
+"""
+
+from collections import deque
+
+from src.config import THREAT_RULES, THREAT_WEIGHTS
+from src.ipnet import is_private
+
+
+class PatternSet:
+    """Aho-Corasick automaton over many substrings.
+
+    search(text) returns the values of every pattern occurring in text, in
+    a single pass over it.
+
+    Args:
+        patterns: iterable of (pattern, value) pairs.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._link()
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def _add(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            node = nxt
+        self._out[node].add(value)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def search(self, text):
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found |= self._out[node]
+        return found
+
+
+class Rule:
+    """One compiled connection rule."""
+
+    __slots__ = ("index", "type", "severity", "category", "weight",
+                 "description", "checks", "uses_org")
+
+    def __init__(self, index, spec):
+        self.index = index
+        self.type = spec["type"]
+        self.severity = spec["severity"]
+        self.category = spec.get("category", "network")
+        self.weight = spec.get("weight", THREAT_WEIGHTS.get(self.type, 0))
+        self.description = spec["description"]
+        self.checks = []
+        self.uses_org = False
+        for name, value in spec.get("match", {}).items():
+            if name == "org_contains":
+                self.uses_org = True  # resolved through the shared PatternSet
+            elif name in _CONDITIONS:
+                self.checks.append(_CONDITIONS[name](value))
+            else:
+                raise ValueError(f"Unknown condition '{name}' in threat rule {self.type}")
+
+    def flag(self, conn, app_name, summary):
+        fields = {
+            "remote_addr": conn.get("remote_addr", ""),
+            "remote_port": conn.get("remote_port"),
+            "local_port": conn.get("local_port"),
+            "whois_org": conn.get("whois_org", ""),
+            "app": app_name,
+        }
+        return {
+            "type": self.type,
+            "category": self.category,
+            "severity": self.severity,
+            "weight": self.weight,
+            "description": self.description.format_map(fields),
+            "connection": summary,
+        }
+
+
+class RuleSet:
+    """All connection rules, compiled together."""
+
+    def __init__(self, specs):
+        self.rules = [Rule(i, spec) for i, spec in enumerate(specs)]
+        self._orgs = PatternSet(
+            (pattern.lower(), rule.index)
+            for rule, spec in zip(self.rules, specs)
+            for pattern in spec.get("match", {}).get("org_contains", []))
+
+    def evaluate(self, conn, app_name, summary):
+        """Return the flags raised by one connection of app `app_name`."""
+        org_hits = ()
+        if self._orgs:
+            org = (conn.get("whois_org") or "").lower()
+            if org:
+                org_hits = self._orgs.search(org)
+
+        ctx = (conn, app_name.lower())
+        flags = []
+        for rule in self.rules:
+            if rule.uses_org and rule.index not in org_hits:
+                continue
+            if all(check(ctx) for check in rule.checks):
+                flags.append(rule.flag(conn, app_name, summary))
+        return flags
+
+
+def _in_set(field, transform=None):
+    def compile_(values):
+        values = {transform(v) for v in values} if transform else set(values)
+
+        def check(ctx):
+            value = ctx[0].get(field)
+            if transform and value is not None:
+                value = transform(value)
+            return value in values
+        return check
+    return compile_
+
+
+def _remote_port_not(values):
+    values = set(values)
+    return lambda ctx: bool(ctx[0].get("remote_port")) and ctx[0]["remote_port"] not in values
+
+
+def _app(values):
+    values = {v.lower() for v in values}
+    return lambda ctx: ctx[1] in values
+
+
+def _public(expected):
+    return lambda ctx: (bool(ctx[0].get("remote_addr"))
+                        and not is_private(ctx[0]["remote_addr"])) == expected
+
+
+def _resolved(expected):
+    # A lookup still in flight is neither resolved nor unresolved yet.
+    return lambda ctx: (not ctx[0].get("rdns_pending")
+                        and bool(ctx[0].get("hostname")) == expected)
+
+
+_CONDITIONS = {
+    "remote_port": _in_set("remote_port"),
+    "remote_port_not": _remote_port_not,
+    "state": _in_set("state"),
+    "local_addr": _in_set("local_addr"),
+    "country": _in_set("whois_country", str.upper),
+    "app": _app,
+    "public": _public,
+    "resolved": _resolved,
+}
+
+
+def conn_summary(conn):
+    """Create a short summary string for a connection."""
+    remote = conn.get("remote_addr", "?")
+    port = conn.get("remote_port", "?")
+    return f"{remote}:{port}"
+
+
+_ruleset = RuleSet(THREAT_RULES)
+
+
+def evaluate(conn, app_name, summary):
+    """Return the flags config.THREAT_RULES raise for one connection."""
+    return _ruleset.evaluate(conn, app_name, summary)
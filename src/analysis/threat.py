@@ -1,7 +1,7 @@
 """Threat scoring engine for NetWatch."""
 
+from src.analysis import rules
 from src.config import (
-    STANDARD_PORTS, VPS_PROVIDERS, CLOUD_PROVIDERS, SYSTEM_DAEMONS,
     THREAT_WEIGHTS, UPLOAD_RATIO_THRESHOLD, UPLOAD_MINIMUM_BYTES,
     RETRANSMISSION_THRESHOLD, UNIQUE_IP_THRESHOLD, SCORE_LEVELS,
     APP_CPU_THRESHOLD, APP_MEMORY_THRESHOLD,
@@ -14,7 +14,7 @@ def score_app(app_data):
     Args:
         app_data: dict with keys:
             - app: str (app name)
-            - signed: bool
+            - signed: bool, or None if signing could not be checked
             - connections: list of connection dicts
             - bytes_in: int
             - bytes_out: int
@@ -22,12 +22,13 @@ def score_app(app_data):
             - unique_ips: set of remote IPs
 
     Returns:
-        dict with "score", "level", "color", "flags" list
+        dict with "score", "level", "color", "flags" list and
+        "connection_flags" (connection summary -> its flags)
     """
     flags = []
 
-    # Red: Unsigned app
-    if not app_data.get("signed", True):
+    # Red: Unsigned app (None means unknown, e.g. no codesign on Linux)
+    if app_data.get("signed", True) is False:
         flags.append({
             "type": "unsigned_app",
             "category": "network",
@@ -50,9 +51,13 @@ def score_app(app_data):
             "description": f"Upload ratio {ratio:.0f}:1 (sending {ratio:.0f}x more than receiving)",
         })
 
-    # Check each connection
+    # Check each connection; index its flags so callers need not rescan
+    connection_flags = {}
     for conn in app_data.get("connections", []):
-        conn_flags = score_connection(conn, app_data)
+        summary = rules.conn_summary(conn)
+        conn_flags = rules.evaluate(conn, app_data.get("app", ""), summary)
+        if conn_flags:
+            connection_flags.setdefault(summary, []).extend(conn_flags)
         flags.extend(conn_flags)
 
     # Blue: Many unique IPs
@@ -106,91 +111,13 @@ def score_app(app_data):
         "level": level,
         "color": color,
         "flags": flags,
+        "connection_flags": connection_flags,
     }
 
 
 def score_connection(conn, app_data):
     """Score an individual connection. Returns list of flags."""
-    flags = []
-    remote_port = conn.get("remote_port")
-    state = conn.get("state")
-
-    # Red: HTTP plaintext
-    if remote_port == 80 and state == "ESTABLISHED":
-        flags.append({
-            "type": "http_plaintext",
-            "category": "network",
-            "severity": "red",
-            "weight": THREAT_WEIGHTS["http_plaintext"],
-            "description": "Plaintext HTTP — data transmitted without encryption",
-            "connection": _conn_summary(conn),
-        })
-
-    # Yellow: Unusual port
-    if (remote_port and remote_port not in STANDARD_PORTS
-            and state == "ESTABLISHED"):
-        flags.append({
-            "type": "unusual_port",
-            "category": "network",
-            "severity": "yellow",
-            "weight": THREAT_WEIGHTS["unusual_port"],
-            "description": f"Non-standard port {remote_port}",
-            "connection": _conn_summary(conn),
-        })
-
-    # Yellow: No reverse DNS
-    if conn.get("remote_addr") and not conn.get("hostname"):
-        addr = conn["remote_addr"]
-        if not _is_private(addr):
-            flags.append({
-                "type": "no_rdns",
-                "category": "network",
-                "severity": "yellow",
-                "weight": THREAT_WEIGHTS["no_rdns"],
-                "description": f"No reverse DNS for {addr}",
-                "connection": _conn_summary(conn),
-            })
-
-    # Yellow: VPS provider
-    whois_org = (conn.get("whois_org") or "").lower()
-    if whois_org:
-        for provider in VPS_PROVIDERS:
-            if provider in whois_org:
-                flags.append({
-                    "type": "vps_provider",
-                    "category": "network",
-                    "severity": "yellow",
-                    "weight": THREAT_WEIGHTS["vps_provider"],
-                    "description": f"IP belongs to hosting provider ({conn.get('whois_org', '')})",
-                    "connection": _conn_summary(conn),
-                })
-                break
-
-    # Yellow: System daemon external connection
-    app_name = app_data.get("app", "").lower()
-    if app_name in SYSTEM_DAEMONS and conn.get("remote_addr"):
-        if not _is_private(conn["remote_addr"]):
-            flags.append({
-                "type": "system_daemon_external",
-                "category": "network",
-                "severity": "yellow",
-                "weight": THREAT_WEIGHTS["system_daemon_external"],
-                "description": f"System daemon '{app_data['app']}' connecting externally",
-                "connection": _conn_summary(conn),
-            })
-
-    # Blue: LISTEN on all interfaces
-    if state == "LISTEN" and conn.get("local_addr") in ("*", "0.0.0.0", "::"):
-        flags.append({
-            "type": "listen_all_interfaces",
-            "category": "network",
-            "severity": "blue",
-            "weight": THREAT_WEIGHTS["listen_all_interfaces"],
-            "description": f"Listening on all interfaces (port {conn.get('local_port')})",
-            "connection": _conn_summary(conn),
-        })
-
-    return flags
+    return rules.evaluate(conn, app_data.get("app", ""), rules.conn_summary(conn))
 
 
 def _score_to_level(score):
@@ -203,19 +130,3 @@ def _score_to_level(score):
         return "medium", "orange"
     else:
         return "high", "red"
-
-
-def _is_private(addr):
-    """Check if an address is private/local."""
-    if not addr:
-        return True
-    return (addr.startswith("10.") or addr.startswith("192.168.")
-            or addr.startswith("172.") or addr.startswith("127.")
-            or addr in ("*", "::1", "localhost"))
-
-
-def _conn_summary(conn):
-    """Create a short summary string for a connection."""
-    remote = conn.get("remote_addr", "?")
-    port = conn.get("remote_port", "?")
-    return f"{remote}:{port}"
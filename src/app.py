@@ -4,16 +4,25 @@ import json
 import os
 import signal
 import threading
+import time
 from collections import defaultdict
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, render_template, request, stream_with_context
 
-from src.collectors import lsof, nettop, process, system
+from src import cache_store, delta, history, metrics, query, runner
+from src.collectors import backend, process, stream, system
 from src.enrichment import dns, whois_lookup
-from src.analysis import threat, alert_info, ai_analyzer
+from src.analysis import threat, alert_info, ai_analyzer, baseline, rules
+from src.sampler import Sampler
+from src.ipnet import is_private
+from src.singleflight import SingleFlight
+from src.ttlcache import start_sweeper
 from src.utils import format_bytes, port_label, friendly_process_name
 from src.config import (
     HOST, PORT, STANDARD_PORTS, AI_DEFAULT_PROVIDER, TOP_PROCESSES_COUNT,
+    SAMPLER_CADENCE, SNAPSHOT_MAX_AGE, SNAPSHOT_WAIT_TIMEOUT,
+    REFRESH_COALESCE_WINDOW, COLLECTOR_BACKEND, STREAM_KEEPALIVE,
+    HISTORY_MAX_POINTS,
     SYSTEM_CPU_HIGH, SYSTEM_CPU_CRITICAL,
     SYSTEM_MEMORY_HIGH, SYSTEM_MEMORY_CRITICAL,
     SYSTEM_DISK_HIGH, SYSTEM_DISK_CRITICAL,
@@ -21,21 +30,25 @@ from src.config import (
 
 app = Flask(__name__)
 
-# Track previously seen hosts per app for new-connection alerts
-_seen_hosts = defaultdict(set)
-_seen_hosts_lock = threading.Lock()
+# Remote endpoints previously seen per app, for new-connection alerts.
+# Only touched from the sampler thread; persisted across restarts.
+_baseline = baseline.Baseline()
 
-# Cache known PIDs for kill validation (avoids re-collecting data)
-_known_pids = set()
-_known_pids_lock = threading.Lock()
 
+def _build_dashboard_data(raw):
+    """Build the full dashboard payload from the latest raw collector data.
 
-def _build_dashboard_data(full_processes=False):
-    """Collect all data and build the full dashboard payload."""
-    # Collect raw data
-    connections = lsof.collect()
-    traffic_stats = nettop.collect()
-    ps_info = process.collect_ps()
+    `raw` maps sampler source names to collector results (see _sampler).
+    The payload always includes every active process; routes trim
+    top_processes for callers that did not ask for the full list.
+    """
+    connections = raw.get("connections", [])
+    traffic_stats = raw.get("traffic", {})
+    table = raw.get("processes")
+    ps_info = table.ps_info() if table is not None else {}
+    sys_stats = system.empty_stats()
+    for part in ("cpu", "memory", "disk"):
+        sys_stats.update(raw.get(part) or {})
 
     # Group connections by app (using PID as key to distinguish same-name apps)
     apps = defaultdict(lambda: {
@@ -55,7 +68,19 @@ def _build_dashboard_data(full_processes=False):
         "unique_ips": set(),
     })
 
+    # Resolve every public remote address of this snapshot in one batch.
+    # Lookups that miss the deadline show as pending until the next one.
+    with metrics.timed("dns"):
+        hostnames = dns.resolve_batch({
+            c["remote_addr"] for c in connections
+            if c.get("remote_addr") and not is_private(c["remote_addr"])
+        })
+
+    whois_seconds = 0.0
     for conn in connections:
+        # Copy — the raw list is reused until lsof runs again
+        conn = dict(conn)
+
         # Skip connections with no remote endpoint and no state (e.g., UDP
         # sockets with only a local address) — they add no useful info.
         if not conn.get("remote_addr") and not conn.get("remote_port") and not conn.get("state"):
@@ -69,15 +94,26 @@ def _build_dashboard_data(full_processes=False):
 
         # Enrich with DNS (skip for private/local IPs)
         remote_addr = conn.get("remote_addr")
-        if remote_addr and not _is_private(remote_addr):
-            hostname = dns.reverse_lookup(remote_addr)
-            conn["hostname"] = hostname
+        if remote_addr and not is_private(remote_addr):
+            hostname = hostnames.get(remote_addr)
+            if hostname is dns.PENDING:
+                conn["hostname"] = None
+                conn["rdns_pending"] = True
+            else:
+                conn["hostname"] = hostname
             app_data["unique_ips"].add(remote_addr)
 
-            # Lazy whois (only for display, not blocking)
-            whois_info = whois_lookup.lookup(remote_addr)
-            conn["whois_org"] = whois_info.get("org", "")
-            conn["whois_country"] = whois_info.get("country", "")
+            # Whois runs in the background; unknown IPs show as pending
+            start = time.perf_counter()
+            whois_info = whois_lookup.lookup_async(remote_addr)
+            whois_seconds += time.perf_counter() - start
+            if whois_info is whois_lookup.PENDING:
+                conn["whois_org"] = "(pending)"
+                conn["whois_country"] = ""
+                conn["whois_pending"] = True
+            else:
+                conn["whois_org"] = whois_info.get("org", "")
+                conn["whois_country"] = whois_info.get("country", "")
         else:
             conn["hostname"] = remote_addr
             conn["whois_org"] = "Private" if remote_addr else ""
@@ -86,6 +122,14 @@ def _build_dashboard_data(full_processes=False):
         conn["port_label"] = port_label(conn.get("remote_port", 0) or 0)
         app_data["connections"].append(conn)
 
+    metrics.STAGE_SECONDS.observe(whois_seconds, stage="whois")
+
+    # Verify signatures of networked apps concurrently; checks that miss
+    # the deadline are reported as pending and finish in the background.
+    with metrics.timed("codesign"):
+        signatures = process.codesign_batch(
+            ps_info[a["pid"]]["path"] for a in apps.values() if a["pid"] in ps_info)
+
     # Merge traffic stats and process info
     for app_key, app_data in apps.items():
         pid = app_data["pid"]
@@ -108,17 +152,23 @@ def _build_dashboard_data(full_processes=False):
             display_name, _ = friendly_process_name(
                 app_data["app"], pi.get("command", ""))
             app_data["display_name"] = display_name
-            codesign_info = process.check_codesign(pi["path"])
-            app_data["signed"] = codesign_info["signed"]
-            app_data["sign_authority"] = codesign_info.get("authority", "")
-            app_data["codesign_info"] = codesign_info
+            codesign_info = signatures.get(pi["path"])
+            if codesign_info is process.PENDING:
+                app_data["sign_pending"] = True
+            else:
+                app_data["signed"] = codesign_info["signed"]
+                app_data["sign_authority"] = codesign_info.get("authority", "")
+                app_data["codesign_info"] = codesign_info
 
     # Score each app
     app_list = []
     all_alerts = []
+    scoring_seconds = 0.0
 
     for app_key, app_data in apps.items():
+        start = time.perf_counter()
         threat_result = threat.score_app(app_data)
+        scoring_seconds += time.perf_counter() - start
         app_data["threat"] = threat_result
 
         # Check for new connections
@@ -144,6 +194,7 @@ def _build_dashboard_data(full_processes=False):
             "etime": app_data.get("etime", ""),
             "signed": app_data["signed"],
             "sign_authority": app_data["sign_authority"],
+            "sign_pending": app_data.get("sign_pending", False),
             "team_id": codesign.get("team_id", ""),
             "identifier": codesign.get("identifier", ""),
             "threat_score": threat_result["score"],
@@ -152,7 +203,9 @@ def _build_dashboard_data(full_processes=False):
             "threat_flags": threat_result["flags"],
             "connections": [
                 {
-                    "remote_host": c.get("hostname") or "(no rDNS)",
+                    "remote_host": c.get("hostname") or (
+                        "(resolving)" if c.get("rdns_pending") else "(no rDNS)"),
+                    "rdns_pending": bool(c.get("rdns_pending")),
                     "remote_addr": c.get("remote_addr", ""),
                     "remote_port": c.get("remote_port"),
                     "port_label": c.get("port_label", ""),
@@ -163,6 +216,7 @@ def _build_dashboard_data(full_processes=False):
                     "type": c.get("type", ""),
                     "whois_org": c.get("whois_org", ""),
                     "whois_country": c.get("whois_country", ""),
+                    "whois_pending": bool(c.get("whois_pending")),
                     "flags": _connection_flags(c, threat_result),
                 }
                 for c in app_data["connections"]
@@ -195,8 +249,10 @@ def _build_dashboard_data(full_processes=False):
                 "connection": nc,
             })
 
+    _baseline.flush()
+
     # Generate system-wide resource alerts
-    sys_stats = system.collect_system_stats()
+    metrics.STAGE_SECONDS.observe(scoring_seconds, stage="scoring")
     _add_system_alerts(all_alerts, sys_stats)
 
     # Sort apps by threat score (highest first), then by name
@@ -205,6 +261,8 @@ def _build_dashboard_data(full_processes=False):
     # Sort alerts by severity
     severity_order = {"red": 0, "yellow": 1, "blue": 2, "info": 3}
     all_alerts.sort(key=lambda a: severity_order.get(a["severity"], 4))
+    for alert in all_alerts:
+        alert["id"] = delta.alert_id(alert)
 
     # Summary stats
     total_bytes_in = sum(a["bytes_in"] for a in app_list)
@@ -219,19 +277,20 @@ def _build_dashboard_data(full_processes=False):
         if info["cpu"] > 0.0 and pid > 0
     ]
     top_procs_raw.sort(key=lambda p: p["cpu"], reverse=True)
-    if not full_processes:
-        top_procs_raw = top_procs_raw[:TOP_PROCESSES_COUNT]
 
-    # Update known PIDs — include all visible PIDs (network + top processes)
-    with _known_pids_lock:
-        _known_pids.clear()
-        _known_pids.update(a["pid"] for a in app_list)
-        _known_pids.update(p["pid"] for p in top_procs_raw)
+    # Signing status for every listed process comes from the background
+    # prefetch started by collect_ps — never wait on codesign here.
+    top_signatures = process.codesign_batch(
+        (p["path"] for p in top_procs_raw), timeout=0)
 
     top_processes = []
     for p in top_procs_raw:
         name = os.path.basename(p["path"]) if p["path"] else str(p["pid"])
         display, _ = friendly_process_name(name, p.get("command", ""))
+        codesign = top_signatures.get(p["path"])
+        pending = codesign is process.PENDING
+        if pending:
+            codesign = {}
         top_processes.append({
             "pid": p["pid"],
             "name": name,
@@ -241,6 +300,11 @@ def _build_dashboard_data(full_processes=False):
             "command": p.get("command", ""),
             "path": p.get("path", ""),
             "has_network": p["pid"] in network_pids,
+            "signed": codesign.get("signed", True),
+            "sign_authority": codesign.get("authority") or "",
+            "sign_pending": pending,
+            "team_id": codesign.get("team_id") or "",
+            "identifier": codesign.get("identifier") or "",
         })
 
     return {
@@ -343,44 +407,104 @@ def _add_system_alerts(alerts, sys_stats):
 
 def _check_new_connections(app_data):
     """Check for new connections to previously unseen hosts."""
-    app_name = app_data["app"]
-    new_hosts = []
-
-    with _seen_hosts_lock:
-        for conn in app_data["connections"]:
-            remote = conn.get("remote_addr")
-            if remote and not _is_private(remote):
-                host_key = f"{remote}:{conn.get('remote_port', '')}"
-                if host_key not in _seen_hosts[app_name]:
-                    _seen_hosts[app_name].add(host_key)
-                    new_hosts.append(host_key)
+    endpoints = []
+    for conn in app_data["connections"]:
+        remote = conn.get("remote_addr")
+        if remote and not is_private(remote):
+            port = conn.get("remote_port")
+            endpoints.append((remote, port, f"{remote}:{port if port is not None else ''}"))
 
-    return new_hosts
+    return _baseline.observe(app_data["app"], endpoints)
 
 
 def _connection_flags(conn, threat_result):
     """Get flag info for a specific connection."""
-    conn_summary = f"{conn.get('remote_addr', '?')}:{conn.get('remote_port', '?')}"
-    return [
-        f for f in threat_result["flags"]
-        if f.get("connection") == conn_summary
-    ]
+    return threat_result["connection_flags"].get(rules.conn_summary(conn), [])
+
+
+def _build_snapshot(raw):
+    """Sampler build step: the dashboard payload, timed for /metrics."""
+    with metrics.timed("build"):
+        return _build_dashboard_data(raw)
 
 
-def _is_private(addr):
-    """Check if an address is private/local."""
-    if not addr:
-        return True
-    return (addr.startswith("10.") or addr.startswith("192.168.")
-            or addr.startswith("172.") or addr.startswith("127.")
-            or addr in ("*", "::1", "localhost"))
+def _on_publish(snapshot):
+    """Record collector timings and history for each published snapshot."""
+    for source, seconds in snapshot.timings.items():
+        metrics.STAGE_SECONDS.observe(seconds, stage=f"collect_{source}")
+    history.record(snapshot.data["apps"], snapshot.data["system_stats"],
+                   snapshot.timestamp)
+
+
+_backend = backend.get_backend(COLLECTOR_BACKEND)
+_sampler = Sampler(
+    sources=_backend.sources(SAMPLER_CADENCE),
+    build=_build_snapshot,
+    on_publish=_on_publish,
+)
+
+# Concurrent requests for the same work share a single run:
+# forced refreshes (all tabs pressing "r") and JSON encoding of a snapshot.
+_refresh_flight = SingleFlight(fresh_for=REFRESH_COALESCE_WINDOW)
+_payload_flight = SingleFlight(fresh_for=REFRESH_COALESCE_WINDOW)
+_startup_lock = threading.Lock()
+_started = False
+
+
+def _start_background():
+    """Load persisted caches and start the sampler (once)."""
+    global _started
+    with _startup_lock:
+        if _started:
+            return
+        _started = True
+        runner.start()
+        if runner.mode() != "replay":
+            # A replay answers enrichment from its recording, not from
+            # caches persisted on this machine
+            cache_store.open_store()
+        history.open_store()
+        start_sweeper()
+        dns.load_persisted()
+        whois_lookup.load_persisted()
+        process.load_persisted()
+        _baseline.load()
+    _sampler.start()
+
+
+def _current_data(full_processes=False):
+    """Return the latest published dashboard payload.
+
+    Starts the sampler on first use and waits for its first snapshot.
+    Snapshots are shared between requests, so this returns a shallow
+    copy whenever the top process list has to be trimmed.
+    """
+    _start_background()
+    snapshot = _sampler.latest(max_age=SNAPSHOT_MAX_AGE,
+                               timeout=SNAPSHOT_WAIT_TIMEOUT)
+    data = snapshot.data if snapshot else _build_dashboard_data({})
+    return _trimmed(data, full_processes)
+
+
+def _trimmed(data, full_processes):
+    """Return a snapshot payload as served, with top_processes trimmed."""
+    if full_processes:
+        return data
+    return {**data, "top_processes": data["top_processes"][:TOP_PROCESSES_COUNT]}
+
+
+def _is_known_pid(pid):
+    """Check whether a PID is visible in the latest snapshot."""
+    data = _current_data(full_processes=True)
+    return (any(a["pid"] == pid for a in data["apps"])
+            or any(p["pid"] == pid for p in data["top_processes"]))
 
 
 # --- Routes ---
 
 @app.route("/")
 def dashboard():
-    initial_data = _build_dashboard_data()
+    initial_data = _current_data()
     system_stats = initial_data["system_stats"]
     return render_template("dashboard.html",
                            initial_data=json.dumps(initial_data),
@@ -397,7 +521,7 @@ def processes_page():
 @app.route("/network")
 def network_page():
     """Render the network page."""
-    initial_data = _build_dashboard_data()
+    initial_data = _current_data()
     return render_template("network.html",
                            initial_data=json.dumps(initial_data),
                            active_tab="network")
@@ -405,15 +529,161 @@ def network_page():
 
 @app.route("/api/connections")
 def api_connections():
+    """Return the dashboard payload, or what changed since a version.
+
+    Responses carry the snapshot "version" (tagged with the sampler's
+    epoch, see Sampler.tag) and an ETag of its content, so an unchanged
+    poll is answered with 304.  With ?since=<version> (from this process
+    and still retained by the sampler) the body is a delta (see
+    src/delta.py) instead of the full payload.
+    """
+    full = request.args.get("full_processes") == "1"
+    since = _sampler.version_of(request.args.get("since"))
+    _start_background()
+    snapshot = _sampler.latest(max_age=SNAPSHOT_MAX_AGE,
+                               timeout=SNAPSHOT_WAIT_TIMEOUT)
+    if snapshot is None:
+        return jsonify(_current_data(full_processes=full))
+
+    etag = f"{_sampler.epoch}-{snapshot.digest}-{int(full)}"
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    base = _sampler.get(since) if since is not None else None
+    response = app.response_class(_connections_body(snapshot, full, base),
+                                  mimetype="application/json")
+    response.set_etag(etag)
+    return response
+
+
+@app.route("/api/stream")
+def api_stream():
+    """Push each new snapshot to the client as Server-Sent Events.
+
+    The first event is the full payload (or a delta from Last-Event-ID,
+    else ?since=, when that version is still retained); every later event
+    is a delta from the previous one.  Event ids are tagged snapshot
+    versions, so a browser reconnecting on its own resumes from the last
+    event it got rather than the stale ?since= baked into the stream URL.
+    Subscribers keep the sampler running but never trigger collection
+    themselves, so any number of tabs share one sampling loop.
+    """
     full = request.args.get("full_processes") == "1"
-    data = _build_dashboard_data(full_processes=full)
-    return jsonify(data)
+    since = _sampler.version_of(request.headers.get("Last-Event-ID"))
+    if since is None:
+        since = _sampler.version_of(request.args.get("since"))
+    _start_background()
+
+    def events():
+        base = _sampler.get(since) if since is not None else None
+        version = base.version if base else 0
+        while True:
+            snapshot = _sampler.wait_newer(version, timeout=STREAM_KEEPALIVE)
+            if snapshot is None:
+                yield ": keepalive\n\n"
+                continue
+            body = _connections_body(snapshot, full, base)
+            yield f"id: {_sampler.tag(snapshot.version)}\nevent: snapshot\ndata: {body}\n\n"
+            base, version = snapshot, snapshot.version
+
+    return app.response_class(
+        stream_with_context(events()), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _connections_body(snapshot, full, base=None):
+    """Encode a snapshot payload as JSON, or its delta from `base`.
+
+    Each (snapshot, full_processes, base) body is encoded once, however
+    many tabs are polling or subscribed at the same moment.
+    """
+    if base is not None and base.version < snapshot.version:
+        return _payload_flight.do(
+            ("delta", base.version, snapshot.version, full),
+            lambda: _encode("delta", {
+                "version": _sampler.tag(snapshot.version),
+                "since": _sampler.tag(base.version),
+                "delta": delta.diff_payload(_trimmed(base.data, full),
+                                            _trimmed(snapshot.data, full)),
+            }))
+    return _payload_flight.do(
+        ("connections", snapshot.version, full),
+        lambda: _encode("full", {**_trimmed(snapshot.data, full),
+                                 "version": _sampler.tag(snapshot.version)}))
+
+
+def _encode(kind, payload):
+    """Serialize a response body, recording its cost and size for /metrics."""
+    with metrics.timed("serialize"):
+        body = json.dumps(payload)
+    metrics.PAYLOAD_BYTES.observe(len(body), kind=kind)
+    return body
+
+
+@app.route("/api/query/<collection>")
+def api_query(collection):
+    """Filter, sort, paginate and project one collection of the snapshot.
+
+    Collections are apps, connections, processes and alerts; see
+    src/query.py for the query parameters.
+    """
+    if collection not in query.COLLECTIONS:
+        available = ", ".join(query.COLLECTIONS)
+        return jsonify({"error": f"Unknown collection: {collection}. Available: {available}"}), 404
+    _start_background()
+    snapshot = _sampler.latest(max_age=SNAPSHOT_MAX_AGE,
+                               timeout=SNAPSHOT_WAIT_TIMEOUT)
+    data = snapshot.data if snapshot else _build_dashboard_data({})
+    try:
+        result = query.run(data, collection, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"version": _sampler.tag(snapshot.version if snapshot else 0), **result})
+
+
+@app.route("/api/history")
+def api_history():
+    """Return metric history for an app (?app=name) or the whole system.
+
+    from/to are Unix timestamps (default: the last hour) and step is the
+    bucket size in seconds; the step is coarsened so that no more than
+    HISTORY_MAX_POINTS points are returned.
+    """
+    try:
+        end = int(request.args.get("to") or time.time())
+        start = int(request.args.get("from") or end - 3600)
+        step = int(request.args.get("step") or 0)
+    except ValueError:
+        return jsonify({"error": "from, to and step must be integers"}), 400
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+    _start_background()
+    step = max(step, -(-(end - start) // HISTORY_MAX_POINTS), 1)
+    result = history.query(request.args.get("app") or None, start, end, step)
+    if result is None:
+        return jsonify({"error": "History is disabled"}), 404
+    return jsonify(result)
+
+
+@app.route("/api/refresh", methods=["POST"])
+def api_refresh():
+    """Collect fresh data now instead of waiting for the next sample.
+
+    Concurrent and back-to-back requests within REFRESH_COALESCE_WINDOW
+    share a single collection run.
+    """
+    _start_background()
+    snapshot = _refresh_flight.do(
+        "refresh", lambda: _sampler.refresh(timeout=SNAPSHOT_WAIT_TIMEOUT))
+    return jsonify({"version": _sampler.tag(snapshot.version if snapshot else 0)})
 
 
 @app.route("/api/system")
 def api_system():
     """Return system-wide resource stats."""
-    return jsonify(system.collect_system_stats())
+    return jsonify(_current_data()["system_stats"])
 
 
 @app.route("/api/whois/<ip>")
@@ -427,25 +697,135 @@ def api_cache():
     return jsonify({
         "dns": dns.get_cache_info(),
         "whois": whois_lookup.get_cache_info(),
+        "codesign": process.get_cache_info(),
+        "baseline": _baseline.stats(),
+        "history": history.get_info(),
+        "store": cache_store.get_info(),
     })
 
 
+@app.route("/api/sampler")
+def api_sampler():
+    """Return per-collector timing and run counts from the sampler."""
+    snapshot = _sampler.latest()
+    return jsonify({
+        **_sampler.get_stats(),
+        "backend": _backend.backend_name(),
+        "streams": stream.get_stats(),
+        "runner": runner.get_info(),
+        "last_timings": snapshot.timings if snapshot else {},
+    })
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text-format metrics for MacWatch and the host."""
+    return app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def _scrape_metrics():
+    """Scrape-time metric families read from the latest snapshot and caches.
+
+    Never waits for a snapshot and does not count as a dashboard read, so
+    a scrape neither blocks on a cold sampler nor keeps an idle one
+    collecting.  Host and app families are left out until a snapshot
+    exists.
+    """
+    families = []
+    snapshot = _sampler.peek()
+    if snapshot is not None:
+        families += _snapshot_families(snapshot)
+
+    caches = {"dns": dns.get_cache_info(), "whois": whois_lookup.get_cache_info(),
+              "codesign": process.get_cache_info()}
+    families += [
+        ("macwatch_cache_entries", "gauge", "Entries held per cache",
+         [({"cache": n}, c["size"]) for n, c in caches.items()]),
+        ("macwatch_cache_hits_total", "counter", "Cache lookups answered",
+         [({"cache": n}, c["hits"]) for n, c in caches.items()]),
+        ("macwatch_cache_misses_total", "counter", "Cache lookups missed",
+         [({"cache": n}, c["misses"]) for n, c in caches.items()]),
+        ("macwatch_cache_evictions_total", "counter", "Entries evicted for space",
+         [({"cache": n}, c["evictions"]) for n, c in caches.items()]),
+        ("macwatch_cache_hit_ratio", "gauge", "Hits / lookups since start",
+         [({"cache": n}, c["hit_rate"]) for n, c in caches.items()
+          if c["hit_rate"] is not None]),
+    ]
+
+    sources = _sampler.get_stats()["sources"]
+    families += [
+        ("macwatch_collector_runs_total", "counter", "Sampler collector runs",
+         [({"source": n}, s["runs"]) for n, s in sources.items()]),
+        ("macwatch_collector_failures_total", "counter", "Sampler collector runs that raised",
+         [({"source": n}, s["failures"]) for n, s in sources.items()]),
+        ("macwatch_stream_restarts_total", "counter", "Streaming collector child restarts",
+         [({"tool": n}, s["restarts"]) for n, s in stream.get_stats().items()]),
+    ]
+    return families
+
+
+def _snapshot_families(snapshot):
+    """Host, app and alert families from one published snapshot."""
+    data = snapshot.data
+    stats = data["system_stats"]
+    families = [
+        ("macwatch_snapshot_age_seconds", "gauge", "Age of the latest published snapshot",
+         [({}, round(time.time() - snapshot.timestamp, 3))]),
+        ("macwatch_host_cpu_percent", "gauge", "System CPU usage (user + sys)",
+         [({}, stats["cpu_percent"])]),
+        ("macwatch_host_load_average", "gauge", "Load average",
+         [({"period": p}, stats[f"load_avg_{p}"]) for p in ("1", "5", "15")]),
+        ("macwatch_host_memory_bytes", "gauge", "Physical memory",
+         [({"kind": "total"}, stats["mem_total"]), ({"kind": "used"}, stats["mem_used"])]),
+        ("macwatch_host_memory_percent", "gauge", "Physical memory used",
+         [({}, stats["mem_percent"])]),
+        ("macwatch_host_disk_bytes", "gauge", "Root volume capacity",
+         [({"kind": "total"}, stats["disk_total"]), ({"kind": "used"}, stats["disk_used"])]),
+        ("macwatch_host_disk_percent", "gauge", "Root volume used",
+         [({}, stats["disk_percent"])]),
+    ]
+
+    # Apps sharing a name (e.g. browser helpers) are summed
+    per_app = defaultdict(lambda: [0, 0, 0])
+    for a in data["apps"]:
+        totals = per_app[a["app"]]
+        totals[0] += a["bytes_in"]
+        totals[1] += a["bytes_out"]
+        totals[2] += a["connection_count"]
+    families += [
+        ("macwatch_app_bytes", "gauge",
+         "Bytes transferred by an app's processes (nettop counters)",
+         [({"app": name, "direction": d}, t[i])
+          for name, t in per_app.items() for i, d in ((0, "in"), (1, "out"))]),
+        ("macwatch_app_connections", "gauge", "Open connections per app",
+         [({"app": name}, t[2]) for name, t in per_app.items()]),
+        ("macwatch_alerts", "gauge", "Current alerts by severity",
+         [({"severity": s}, data["summary"][f"{s}_count"])
+          for s in ("red", "yellow", "blue")]),
+    ]
+
+    return families
+
+
+metrics.add_collector(_scrape_metrics)
+
+
 @app.route("/api/process/<int:pid>")
 def api_process_detail(pid):
     """Return comprehensive details for a single process."""
-    with _known_pids_lock:
-        if pid not in _known_pids:
-            return jsonify({"error": "PID not found in active processes"}), 404
-    detail = process.collect_process_detail(pid)
+    if not _is_known_pid(pid):
+        return jsonify({"error": "PID not found in active processes"}), 404
+    snapshot = _sampler.latest()
+    table = snapshot.raw.get("processes") if snapshot else None
+    detail = process.collect_process_detail(pid, table=table)
     return jsonify(detail)
 
 
 @app.route("/api/kill/<int:pid>", methods=["POST"])
 def api_kill(pid):
-    """Kill a process by PID. Only allows killing PIDs seen in the last refresh."""
-    with _known_pids_lock:
-        if pid not in _known_pids:
-            return jsonify({"error": "PID not found in active processes"}), 404
+    """Kill a process by PID. Only allows killing PIDs in the latest snapshot."""
+    if not _is_known_pid(pid):
+        return jsonify({"error": "PID not found in active processes"}), 404
     try:
         os.kill(pid, signal.SIGTERM)
         return jsonify({"status": "ok", "pid": pid, "signal": "SIGTERM"})
@@ -510,7 +890,7 @@ def api_ai_analyze():
 
     try:
         # Collect current data
-        dashboard_data = _build_dashboard_data()
+        dashboard_data = _current_data()
 
         # Build prompt and call AI provider
         prompt = ai_analyzer.build_analysis_prompt(dashboard_data)
@@ -562,4 +942,5 @@ def run():
     print(f"\n  MacWatch — Mac System Health Dashboard")
     print(f"  Dashboard: http://{HOST}:{PORT}")
     print(f"  Press Ctrl+C to stop\n")
+    _start_background()
     app.run(host=HOST, port=PORT, debug=False, threaded=True)
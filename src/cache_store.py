@@ -0,0 +1,153 @@
+"""Persistent on-disk store for enrichment caches (DNS, WHOIS, codesign).
+
+Entries are kept in a small SQLite database so a restart starts warm.
+Writes are buffered in memory and flushed in batches by a background
+thread (write-behind), which also prunes expired rows every
+CACHE_PRUNE_INTERVAL; each cache loads its unexpired entries on startup.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import CACHE_DB_PATH, CACHE_FLUSH_INTERVAL, CACHE_PRUNE_INTERVAL, CACHE_TTLS
+
+_conn = None
+_lock = threading.Lock()
+_pending = {}  # (kind, key) -> (json value, timestamp)
+_flusher = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+)
+"""
+
+
+def open_store(path=CACHE_DB_PATH):
+    """Open (or create) the cache database and start the flush thread.
+
+    Expired rows are pruned on open and then periodically.  Does nothing if
+    path is empty or the store is already open; a database that cannot be
+    opened leaves persistence disabled rather than failing startup.
+    """
+    global _conn, _flusher
+    if not path:
+        return
+    with _lock:
+        if _conn is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute(_SCHEMA)
+            _prune(conn)
+            conn.commit()
+        except (sqlite3.Error, OSError):
+            return
+        _conn = conn
+
+    _flusher = threading.Thread(target=_flush_loop, name="macwatch-cache-flush",
+                                daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+
+
+def load(kind):
+    """Return {key: (value, timestamp)} for unexpired entries of a kind."""
+    with _lock:
+        if _conn is None:
+            return {}
+        cutoff = time.time() - CACHE_TTLS.get(kind, 0)
+        try:
+            rows = _conn.execute(
+                "SELECT key, value, updated FROM entries WHERE kind = ? AND updated >= ?",
+                (kind, cutoff)).fetchall()
+        except sqlite3.Error:
+            return {}
+
+    entries = {}
+    for key, value, updated in rows:
+        try:
+            entries[key] = (json.loads(value), updated)
+        except ValueError:
+            continue
+    return entries
+
+
+def put(kind, key, value, timestamp=None):
+    """Queue an entry for the next batched write."""
+    with _lock:
+        if _conn is None:
+            return
+        _pending[(kind, key)] = (json.dumps(value),
+                                 timestamp if timestamp is not None else time.time())
+
+
+def flush():
+    """Write all queued entries in a single transaction."""
+    with _lock:
+        if _conn is None or not _pending:
+            return
+        rows = [(kind, key, value, ts)
+                for (kind, key), (value, ts) in _pending.items()]
+        _pending.clear()
+        try:
+            _conn.executemany(
+                "INSERT OR REPLACE INTO entries (kind, key, value, updated) "
+                "VALUES (?, ?, ?, ?)", rows)
+            _conn.commit()
+        except sqlite3.Error:
+            pass
+
+
+def prune():
+    """Delete rows older than their kind's TTL. Returns how many were removed."""
+    with _lock:
+        if _conn is None:
+            return 0
+        try:
+            removed = _prune(_conn)
+            _conn.commit()
+        except sqlite3.Error:
+            return 0
+    return removed
+
+
+def _prune(conn):
+    now = time.time()
+    removed = 0
+    for kind, ttl in CACHE_TTLS.items():
+        removed += conn.execute("DELETE FROM entries WHERE kind = ? AND updated < ?",
+                                (kind, now - ttl)).rowcount
+    return removed
+
+
+def get_info():
+    """Return store stats."""
+    with _lock:
+        if _conn is None:
+            return {"enabled": False}
+        try:
+            counts = dict(_conn.execute(
+                "SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        except sqlite3.Error:
+            counts = {}
+        return {"enabled": True, "pending_writes": len(_pending), "rows": counts}
+
+
+def _flush_loop():
+    last_prune = time.time()
+    while True:
+        time.sleep(CACHE_FLUSH_INTERVAL)
+        flush()
+        if time.time() - last_prune >= CACHE_PRUNE_INTERVAL:
+            prune()
+            last_prune = time.time()
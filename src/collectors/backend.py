@@ -0,0 +1,144 @@
+"""Collector backends: which data sources feed the sampler on this platform."""
+
+import sys
+from abc import ABC, abstractmethod
+
+from src import runner
+from src.collectors import lsof, nettop, process, procfs, sockdiag, system
+
+
+class CollectorBackend(ABC):
+    """Base class for a set of collectors.
+
+    Every backend returns the same shapes as the macOS collectors, so the
+    sampler and dashboard builder work unchanged on any of them.
+    """
+
+    @abstractmethod
+    def collect_connections(self):
+        """Return open network connections in lsof.collect() format."""
+        ...
+
+    @abstractmethod
+    def collect_traffic(self):
+        """Return per-process traffic in nettop.collect() format."""
+        ...
+
+    @abstractmethod
+    def collect_process_table(self):
+        """Return a process.ProcessTable."""
+        ...
+
+    @abstractmethod
+    def collect_cpu(self):
+        ...
+
+    @abstractmethod
+    def collect_memory(self):
+        ...
+
+    @abstractmethod
+    def collect_disk(self):
+        ...
+
+    @abstractmethod
+    def backend_name(self):
+        """Human-readable backend name."""
+        ...
+
+    def sources(self, cadence):
+        """Return sampler sources {name: (fn, seconds)} for this backend."""
+        return {
+            "connections": (self.collect_connections, cadence["connections"]),
+            "traffic": (self.collect_traffic, cadence["traffic"]),
+            "processes": (self.collect_process_table, cadence["processes"]),
+            "cpu": (self.collect_cpu, cadence["cpu"]),
+            "memory": (self.collect_memory, cadence["memory"]),
+            "disk": (self.collect_disk, cadence["disk"]),
+        }
+
+
+class MacOSBackend(CollectorBackend):
+    """lsof, nettop, ps, top, sysctl/vm_stat and df subprocesses."""
+
+    def backend_name(self):
+        return "macOS (subprocess)"
+
+    def collect_connections(self):
+        return lsof.collect()
+
+    def collect_traffic(self):
+        return nettop.collect()
+
+    def collect_process_table(self):
+        return process.collect_process_table()
+
+    def collect_cpu(self):
+        return system.collect_cpu()
+
+    def collect_memory(self):
+        return system.collect_memory()
+
+    def collect_disk(self):
+        return system.collect_disk()
+
+
+class ProcfsBackend(CollectorBackend):
+    """Linux: reads /proc and statvfs directly, without forking.
+
+    Sockets are enumerated over netlink sock_diag when the kernel allows
+    it, falling back to parsing /proc/net otherwise.
+    """
+
+    def __init__(self):
+        self._use_sockdiag = True
+
+    def backend_name(self):
+        return "Linux (/proc)"
+
+    def collect_connections(self):
+        if self._use_sockdiag:
+            try:
+                return sockdiag.collect()
+            except OSError:
+                self._use_sockdiag = False
+        return procfs.collect_connections()
+
+    def collect_traffic(self):
+        return procfs.collect_traffic()
+
+    def collect_process_table(self):
+        return procfs.collect_process_table()
+
+    def collect_cpu(self):
+        return procfs.collect_cpu()
+
+    def collect_memory(self):
+        return procfs.collect_memory()
+
+    def collect_disk(self):
+        return procfs.collect_disk()
+
+
+BACKENDS = {
+    "macos": MacOSBackend,
+    "procfs": ProcfsBackend,
+}
+
+
+def get_backend(name="auto"):
+    """Get a collector backend by name; "auto" picks one for this platform.
+
+    Replaying a recorded session always uses the subprocess collectors,
+    whose commands the recording answers.
+    """
+    if name == "auto":
+        if runner.mode() == "replay" or not sys.platform.startswith("linux"):
+            name = "macos"
+        else:
+            name = "procfs"
+    backend_class = BACKENDS.get(name)
+    if not backend_class:
+        available = ", ".join(["auto"] + list(BACKENDS))
+        raise ValueError(f"Unknown collector backend: {name}. Available: {available}")
+    return backend_class()
@@ -1,10 +1,55 @@
-"""Parse lsof -i output to get all open network connections."""
+"""Collect all open network connections from lsof field output (-F).
 
+lsof -F prints one field per line, tagged by its first character, so the
+output can be walked exactly and in a single pass:
+
+    p<pid>  c<command>  L<login>       one set per process
+    f<fd>  a<r|w|u>  t<IPv4|IPv6>  P<TCP|UDP>  n<local->remote>  TST=<state>
+                                       one set per socket
+"""
+
+import io
 import re
 import subprocess
+import sys
+
+from src import runner
+from src.collectors.stream import StreamingCollector
+from src.config import SAMPLER_CADENCE, STREAMING_COLLECTORS
+
+# -Ts limits TCP info to the state; p and f are always selected
+_ARGS = ["lsof", "-i", "-n", "-P", "-Ts", "-FpcLfatPnT"]
+
+# lsof prints non-printable characters (and spaces) in names as \xNN
+_ESCAPE_RE = re.compile(r"\\x([0-9a-fA-F]{2})")
+
+# Printed by lsof in repeat mode after each complete scan
+_MARKER = "==MACWATCH-LSOF=="
+
+# lsof in repeat mode: rescans every interval, marker line after each scan
+_stream = StreamingCollector(
+    "lsof",
+    _ARGS + [f"-r{SAMPLER_CADENCE['connections']}m{_MARKER}"],
+    # In field mode the marker may come tagged with the "m" identifier
+    is_boundary=lambda line: line in (_MARKER, "m" + _MARKER),
+    parse=lambda lines: list(parse_fields(lines)),
+)
 
 
 def collect():
+    """Return open connections from the repeating lsof.
+
+    Falls back to a one-shot lsof run while the stream is starting,
+    restarting or disabled.
+    """
+    if STREAMING_COLLECTORS:
+        connections = _stream.latest(max_age=2 * SAMPLER_CADENCE["connections"])
+        if connections is not None:
+            return connections
+    return collect_once()
+
+
+def collect_once():
     """Run lsof -i and return parsed connections.
 
     Returns a list of dicts, each representing one connection:
@@ -23,89 +68,81 @@ def collect():
     }
     """
     try:
-        result = subprocess.run(
-            ["lsof", "-i", "-n", "-P"],
-            capture_output=True, text=True, timeout=10
-        )
-        lines = result.stdout.strip().split("\n")
+        result = runner.run(_ARGS, timeout=10)
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return []
+    return list(parse_fields(io.StringIO(result.stdout)))
 
-    if len(lines) < 2:
-        return []
-
-    connections = []
-    for line in lines[1:]:  # skip header
-        parsed = _parse_line(line)
-        if parsed:
-            connections.append(parsed)
-
-    return connections
-
-
-def _parse_line(line):
-    """Parse a single lsof output line."""
-    # lsof output is whitespace-delimited but command names can have spaces
-    # Format: COMMAND PID USER FD TYPE DEVICE SIZE/OFF NODE NAME
-    parts = line.split()
-    if len(parts) < 9:
-        return None
-
-    # The NAME field (and potentially STATE) is at the end
-    # We need to find NODE (TCP/UDP) and NAME
-    # Work backwards from the end
-    state = None
-    name_str = parts[-1]
-
-    # Check if last field is a state like (ESTABLISHED)
-    if name_str.startswith("(") and name_str.endswith(")"):
-        state = name_str[1:-1]
-        name_str = parts[-2]
-        node = parts[-3]
-        # Everything before node_idx is COMMAND + PID + USER + FD + TYPE + DEVICE + SIZE/OFF
-    else:
-        node = parts[-2]
-
-    # Find PID (first numeric field after command)
-    pid = None
-    pid_idx = None
-    for i, p in enumerate(parts):
-        if p.isdigit() and i > 0:
-            pid = int(p)
-            pid_idx = i
-            break
-
-    if pid is None:
-        return None
-
-    # Command is everything before PID
-    app = " ".join(parts[:pid_idx])
-    # Clean up escaped spaces in app name
-    app = app.replace("\\x20", " ").strip()
-
-    # User is right after PID
-    user = parts[pid_idx + 1] if pid_idx + 1 < len(parts) else ""
 
-    # FD
-    fd = parts[pid_idx + 2] if pid_idx + 2 < len(parts) else ""
+def parse_fields(lines):
+    """Walk lsof -F output once, yielding a connection dict per socket.
 
-    # TYPE (IPv4/IPv6)
-    addr_type = parts[pid_idx + 3] if pid_idx + 3 < len(parts) else ""
-
-    # Protocol from NODE field
-    protocol = node if node in ("TCP", "UDP") else ""
-
-    # Parse NAME field: local->remote or just local
-    local_addr, local_port = None, None
-    remote_addr, remote_port = None, None
-
-    if "->" in name_str:
-        local_part, remote_part = name_str.split("->", 1)
-        local_addr, local_port = _parse_endpoint(local_part)
-        remote_addr, remote_port = _parse_endpoint(remote_part)
+    `lines` is any iterable of field lines (trailing newlines allowed).
+    Command names, users, address types, protocols and states repeat
+    across thousands of sockets, so they are interned; endpoints are
+    parsed once per distinct string.
+    """
+    intern = sys.intern
+    endpoints = {}
+    pid, app, user = None, "", ""
+    fd = name = state = None
+    addr_type = protocol = ""
+
+    for line in lines:
+        tag = line[:1]
+        if tag == "f" or tag == "p":
+            if fd is not None and name is not None and pid is not None:
+                yield _record(app, pid, user, fd, addr_type, protocol, name, state,
+                              endpoints)
+            fd = name = state = None
+            addr_type = protocol = ""
+            value = line[1:].rstrip("\n")
+            if tag == "f":
+                fd = value
+            else:
+                pid = int(value) if value.isdigit() else None
+                app = user = ""
+        elif tag == "n":
+            name = line[1:].rstrip("\n")
+        elif tag == "a":
+            # Access mode, shown after the descriptor as in "12u"
+            if fd is not None:
+                fd += line[1:].rstrip("\n").strip()
+        elif tag == "t":
+            addr_type = intern(line[1:].rstrip("\n"))
+        elif tag == "P":
+            value = line[1:].rstrip("\n")
+            protocol = intern(value) if value in ("TCP", "UDP") else ""
+        elif tag == "T":
+            if line.startswith("TST="):
+                state = intern(line[4:].rstrip("\n"))
+        elif tag == "c":
+            app = intern(_unescape(line[1:].rstrip("\n")))
+        elif tag == "L":
+            user = intern(line[1:].rstrip("\n"))
+
+    if fd is not None and name is not None and pid is not None:
+        yield _record(app, pid, user, fd, addr_type, protocol, name, state, endpoints)
+
+
+def _unescape(value):
+    """Decode lsof's \\xNN escapes, e.g. 'Slack\\x20Hel' -> 'Slack Hel'."""
+    if "\\" not in value:
+        return value
+    return _ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 16)), value)
+
+
+def _record(app, pid, user, fd, addr_type, protocol, name, state, endpoints):
+    local, sep, remote = name.partition("->")
+    local_ep = endpoints.get(local)
+    if local_ep is None:
+        local_ep = endpoints[local] = _parse_endpoint(local)
+    if sep:
+        remote_ep = endpoints.get(remote)
+        if remote_ep is None:
+            remote_ep = endpoints[remote] = _parse_endpoint(remote)
     else:
-        local_addr, local_port = _parse_endpoint(name_str)
-
+        remote_ep = (None, None)
     return {
         "app": app,
         "pid": pid,
@@ -113,10 +150,10 @@ def _parse_line(line):
         "fd": fd,
         "type": addr_type,
         "protocol": protocol,
-        "local_addr": local_addr,
-        "local_port": local_port,
-        "remote_addr": remote_addr,
-        "remote_port": remote_port,
+        "local_addr": local_ep[0],
+        "local_port": local_ep[1],
+        "remote_addr": remote_ep[0],
+        "remote_port": remote_ep[1],
         "state": state,
     }
 
@@ -126,22 +163,17 @@ def _parse_endpoint(endpoint_str):
     if not endpoint_str:
         return None, None
 
-    # Handle IPv6 in brackets: [addr]:port
     if endpoint_str.startswith("["):
-        match = re.match(r'\[([^\]]+)\]:(\d+|\*)', endpoint_str)
-        if match:
-            addr = match.group(1)
-            port_str = match.group(2)
-            port = int(port_str) if port_str != "*" else None
-            return addr, port
-
-    # Handle regular addr:port (split on last colon)
-    last_colon = endpoint_str.rfind(":")
-    if last_colon == -1:
-        return endpoint_str, None
-
-    addr = endpoint_str[:last_colon]
-    port_str = endpoint_str[last_colon + 1:]
-    port = int(port_str) if port_str != "*" and port_str.isdigit() else None
+        # IPv6 in brackets: [addr]:port
+        close = endpoint_str.find("]")
+        if close == -1:
+            return endpoint_str, None
+        addr = endpoint_str[1:close]
+        port_str = endpoint_str[close + 2:]
+    else:
+        addr, sep, port_str = endpoint_str.rpartition(":")
+        if not sep:
+            return endpoint_str, None
 
+    port = int(port_str) if port_str.isdigit() else None
     return addr, port
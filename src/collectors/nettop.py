@@ -2,8 +2,42 @@
 
 import subprocess
 
+from src import runner
+from src.collectors.stream import StreamingCollector
+from src.config import SAMPLER_CADENCE, STREAMING_COLLECTORS
+
+# Columns the dashboard uses; the process name column is always included
+_COLUMNS = "bytes_in,bytes_out,rx_dupe,rx_ooo,re-tx"
+
+# Default layout of `nettop -x` rows, used when no header is available
+_DEFAULT_INDEX = {"name": 1, "bytes_in": 4, "bytes_out": 5,
+                  "rx_dupe": 6, "rx_ooo": 7, "re-tx": 8}
+
+# nettop in logging mode: one CSV sample (header + rows) per interval
+_stream = StreamingCollector(
+    "nettop",
+    ["nettop", "-L", "0", "-P", "-n", "-x", "-s", str(SAMPLER_CADENCE["traffic"]),
+     "-J", _COLUMNS],
+    is_boundary=lambda line: "bytes_in" in line,  # the per-sample header
+    parse=lambda lines: _parse_lines(lines),
+    boundary_starts_frame=True,
+)
+
 
 def collect():
+    """Return per-process traffic stats from the streaming nettop.
+
+    Falls back to a one-shot nettop run while the stream is starting,
+    restarting or disabled.
+    """
+    if STREAMING_COLLECTORS:
+        stats = _stream.latest(max_age=2 * SAMPLER_CADENCE["traffic"])
+        if stats is not None:
+            return stats
+    return collect_once()
+
+
+def collect_once():
     """Run nettop and return per-process traffic stats.
 
     Returns a dict keyed by PID:
@@ -21,27 +55,44 @@ def collect():
     try:
         # Use default format: time,,interface,state,bytes_in,bytes_out,rx_dupe,rx_ooo,re-tx,...
         # The second field is "name.PID"
-        result = subprocess.run(
-            ["nettop", "-L", "1", "-P", "-n", "-x"],
-            capture_output=True, text=True, timeout=10
-        )
+        result = runner.run(["nettop", "-L", "1", "-P", "-n", "-x"], timeout=10)
         lines = result.stdout.strip().split("\n")
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return {}
 
     if len(lines) < 2:
         return {}
+    return _parse_lines(lines)
+
 
+def _parse_lines(lines):
+    """Parse one nettop sample: a header line followed by process rows."""
+    index = _column_index(lines[0])
     stats = {}
-    for line in lines[1:]:  # skip header
-        parsed = _parse_line(line)
+    for line in lines[1:]:
+        parsed = _parse_line(line, index)
         if parsed:
             stats[parsed["pid"]] = parsed
-
     return stats
 
 
-def _parse_line(line):
+def _column_index(header):
+    """Map column names to positions from a nettop CSV header.
+
+    The process column has an empty name; anything missing keeps its
+    default position.
+    """
+    names = header.split(",")
+    index = dict(_DEFAULT_INDEX)
+    for i, name in enumerate(names):
+        if name in index:
+            index[name] = i
+    if "" in names:
+        index["name"] = names.index("")
+    return index
+
+
+def _parse_line(line, index=_DEFAULT_INDEX):
     """Parse a single nettop output line.
 
     Default format columns:
@@ -56,11 +107,11 @@ def _parse_line(line):
     8: re-tx
     """
     parts = line.split(",")
-    if len(parts) < 9:
+    if len(parts) <= max(index.values()):
         return None
 
-    # Second field is "name.PID"
-    name_pid = parts[1]
+    # The name column is "name.PID"
+    name_pid = parts[index["name"]]
     dot_idx = name_pid.rfind(".")
     if dot_idx == -1:
         return None
@@ -82,9 +133,9 @@ def _parse_line(line):
     return {
         "pid": pid,
         "name": name,
-        "bytes_in": safe_int(parts[4]),
-        "bytes_out": safe_int(parts[5]),
-        "rx_dupe": safe_int(parts[6]),
-        "rx_ooo": safe_int(parts[7]),
-        "re_tx": safe_int(parts[8]),
+        "bytes_in": safe_int(parts[index["bytes_in"]]),
+        "bytes_out": safe_int(parts[index["bytes_out"]]),
+        "rx_dupe": safe_int(parts[index["rx_dupe"]]),
+        "rx_ooo": safe_int(parts[index["rx_ooo"]]),
+        "re_tx": safe_int(parts[index["re-tx"]]),
     }
@@ -1,11 +1,85 @@
 """Collect process info: CPU, memory, path, code signing."""
 
+import os
+import shutil
 import subprocess
 import threading
-
-# Cache codesign results (they don't change per binary)
-_codesign_cache = {}
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from src import cache_store, runner
+from src.config import (
+    CODESIGN_WORKERS, CODESIGN_BATCH_TIMEOUT, CODESIGN_CACHE_MAX,
+    CODESIGN_CACHE_TTL, PROCESS_DETAIL_TTL,
+)
+from src.ttlcache import TTLCache
+
+# Returned by codesign_batch() for binaries whose check has not finished.
+PENDING = object()
+
+# Cache codesign results keyed by binary identity (see _binary_identity)
+_codesign_cache = TTLCache(maxsize=CODESIGN_CACHE_MAX, ttl=CODESIGN_CACHE_TTL)
 _codesign_lock = threading.Lock()
+_codesign_inflight = {}
+_codesign_pool = ThreadPoolExecutor(max_workers=CODESIGN_WORKERS,
+                                    thread_name_prefix="macwatch-codesign")
+
+# Recently opened process details, keyed by (pid, start time)
+_detail_cache = TTLCache(maxsize=256, ttl=PROCESS_DETAIL_TTL)
+
+
+# One row of the process table.  Tuples keep the per-process footprint
+# small; rss/vsz are in KB, cpu/mem in percent.
+ProcessRow = namedtuple("ProcessRow", [
+    "pid", "ppid", "pgid", "user", "cpu", "mem", "rss", "vsz", "nice",
+    "pri", "stat", "cputime", "lstart", "etime", "path", "command",
+])
+
+# Fixed columns for the single ps call; "=" suppresses the header.
+# Everything before lstart is one token, lstart is five, comm (the
+# executable path, which may contain spaces) is the rest.  ps only prints
+# a command column in full when it is the last one, so command lines come
+# from _command_lines() instead.
+_PS_COLUMNS = ("pid=,ppid=,pgid=,user=,pcpu=,pmem=,rss=,vsz=,nice=,pri=,"
+               "stat=,time=,lstart=,etime=,comm=")
+_PS_FIELDS = 19
+
+# Full command lines of processes already seen, keyed by (pid, start time)
+_args_cache = {}
+_args_lock = threading.Lock()
+
+
+class ProcessTable:
+    """Snapshot of every process from a single ps run.
+
+    Built once per refresh and shared by every consumer of that refresh
+    (dashboard build, codesign prefetch, process detail).
+    """
+
+    def __init__(self, rows, timestamp=None):
+        self.rows = rows  # pid -> ProcessRow
+        self.timestamp = timestamp or time.time()
+        self._ps_info = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, pid):
+        return self.rows.get(pid)
+
+    def ps_info(self):
+        """Return the table in collect_ps() format (built once, then shared)."""
+        if self._ps_info is None:
+            self._ps_info = {
+                row.pid: {
+                    "cpu": row.cpu, "mem": row.mem, "path": row.path,
+                    "command": row.command,
+                    "lstart": row.lstart, "etime": row.etime,
+                }
+                for row in self.rows.values()
+            }
+        return self._ps_info
 
 
 def collect_ps():
@@ -17,70 +91,132 @@ def collect_ps():
             "cpu": float,
             "mem": float,
             "path": str,
+            "command": str,
             "lstart": str,   # e.g. "Mon Feb 16 15:44:11 2026"
             "etime": str,    # e.g. "09-20:52:44"
         }
     }
     """
+    return collect_process_table().ps_info()
+
+
+def collect_process_table():
+    """Run ps once and return a ProcessTable of every process.
+
+    Command lines of processes not seen before take one more ps run
+    (see _command_lines).
+    """
     try:
-        result = subprocess.run(
-            ["ps", "-eo", "pid,pcpu,pmem,lstart,etime,comm"],
-            capture_output=True, text=True, timeout=5
-        )
-        lines = result.stdout.strip().split("\n")
+        result = runner.run(["ps", "-eo", _PS_COLUMNS], timeout=5)
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        return {}
+        return ProcessTable({})
 
-    info = {}
-    for line in lines[1:]:  # skip header
-        # lstart is 5 tokens (e.g. "Mon Feb 16 15:44:11 2026"), then etime, then comm
-        parts = line.split(None, 8)
-        if len(parts) < 9:
-            continue
-        try:
-            pid = int(parts[0])
-            cpu = float(parts[1])
-            mem = float(parts[2])
-            lstart = f"{parts[3]} {parts[4]} {parts[5]} {parts[6]} {parts[7]}"
-            # parts[8] is "etime comm..." — etime never contains spaces
-            rest = parts[8].split(None, 1)
-            etime = rest[0] if rest else ""
-            path = rest[1].strip() if len(rest) > 1 else ""
-            info[pid] = {
-                "cpu": cpu, "mem": mem, "path": path,
-                "command": "",  # populated below from ps args
-                "lstart": lstart, "etime": etime,
-            }
-        except (ValueError, IndexError):
-            continue
+    rows = {}
+    for line in result.stdout.splitlines():
+        row = _parse_ps_line(line)
+        if row:
+            rows[row.pid] = row
+
+    commands = _command_lines(rows)
+    rows = {pid: row._replace(command=commands[pid]) for pid, row in rows.items()}
 
-    # Collect full command lines (with arguments) via a separate ps call
+    # Verify signatures of every running binary in the background so the
+    # processes view can show signing status without waiting on codesign.
+    prefetch_codesign(row.path for row in rows.values())
+
+    return ProcessTable(rows)
+
+
+def _parse_ps_line(line):
+    """Parse one line of `ps -eo <_PS_COLUMNS>` into a ProcessRow."""
+    parts = line.split(None, _PS_FIELDS - 1)
+    if len(parts) < _PS_FIELDS:
+        return None
     try:
-        args_result = subprocess.run(
-            ["ps", "-eo", "pid,args"],
-            capture_output=True, text=True, timeout=5
+        return ProcessRow(
+            pid=int(parts[0]),
+            ppid=int(parts[1]),
+            pgid=int(parts[2]),
+            user=parts[3],
+            cpu=float(parts[4]),
+            mem=float(parts[5]),
+            rss=int(parts[6]),
+            vsz=int(parts[7]),
+            nice=_int_or_none(parts[8]),
+            pri=_int_or_none(parts[9]),
+            stat=parts[10],
+            cputime=parts[11],
+            lstart=" ".join(parts[12:17]),
+            etime=parts[17],
+            path=parts[18].strip(),
+            command="",
         )
-        for line in args_result.stdout.strip().split("\n")[1:]:
-            parts = line.strip().split(None, 1)
-            if len(parts) >= 2:
-                try:
-                    pid = int(parts[0])
-                    if pid in info:
-                        info[pid]["command"] = parts[1]
-                except (ValueError, IndexError):
-                    continue
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+    except (ValueError, IndexError):
+        return None
 
-    return info
+
+def _int_or_none(s):
+    try:
+        return int(s)
+    except ValueError:
+        return None
 
 
-def collect_process_detail(pid):
+def _command_lines(rows):
+    """Return pid -> full command line (args) for the processes in `rows`.
+
+    A process's command line is fetched once, by a ps run limited to the
+    processes not seen before, so a steady process table costs no extra
+    fork.  Processes that rewrite their argv later (e.g. "postgres:
+    writer") keep the command line they had when first seen.
+    """
+    keys = {pid: (pid, row.lstart) for pid, row in rows.items()}
+    with _args_lock:
+        missing = [pid for pid, key in keys.items() if key not in _args_cache]
+
+    fetched = {}
+    if missing:
+        try:
+            result = runner.run(
+                ["ps", "-o", "pid=,args=", "-p", ",".join(map(str, missing))], timeout=5)
+            for line in result.stdout.splitlines():
+                pid_str, _, args = line.strip().partition(" ")
+                if pid_str.isdigit() and int(pid_str) in keys:
+                    fetched[keys[int(pid_str)]] = args.strip()
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+
+    with _args_lock:
+        _args_cache.update(fetched)
+        # Forget processes that have exited
+        live = set(keys.values())
+        for key in [key for key in _args_cache if key not in live]:
+            del _args_cache[key]
+        return {pid: _args_cache.get(key, "") for pid, key in keys.items()}
+
+
+def collect_process_detail(pid, table=None):
     """Collect comprehensive details for a single process (on-demand).
 
+    Process fields and the parent chain come from `table` (the current
+    refresh's ProcessTable); a PID missing from it is looked up on its own
+    with `ps -p`, never by rebuilding the whole table.  Open
+    files and the working directory come from one lsof run.  Results are
+    cached for PROCESS_DETAIL_TTL keyed by (pid, start time), so a reused
+    PID never returns another process's details.
+
     Returns dict with extended process info including parent chain,
     working directory, thread count, open files, etc.
     """
+    row = table.get(pid) if table is not None else None
+    if row is None:
+        row = _process_row(pid)
+
+    cache_key = (pid, row.lstart if row else "")
+    cached = _detail_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     detail = {
         "pid": pid,
         "ppid": None,
@@ -102,99 +238,63 @@ def collect_process_detail(pid):
         "loaded_libs_count": 0,
     }
 
-    # Extended ps info for this PID
-    try:
-        result = subprocess.run(
-            ["ps", "-p", str(pid), "-o", "ppid,pgid,uid,user,nice,pri,rss,vsz,stat"],
-            capture_output=True, text=True, timeout=5
-        )
-        lines = result.stdout.strip().split("\n")
-        if len(lines) >= 2:
-            parts = lines[1].split()
-            if len(parts) >= 9:
-                detail["ppid"] = int(parts[0])
-                detail["pgid"] = int(parts[1])
-                detail["user"] = parts[3]
-                detail["nice"] = int(parts[4])
-                detail["priority"] = int(parts[5])
-                detail["rss"] = int(parts[6])
-                detail["rss_fmt"] = _format_kb(int(parts[6]))
-                detail["vsz"] = int(parts[7])
-                detail["vsz_fmt"] = _format_kb(int(parts[7]))
-                detail["state"] = _decode_state(parts[8])
-    except (subprocess.TimeoutExpired, FileNotFoundError, ValueError, IndexError):
-        pass
+    if row:
+        detail["ppid"] = row.ppid
+        detail["pgid"] = row.pgid
+        detail["user"] = row.user
+        detail["nice"] = row.nice
+        detail["priority"] = row.pri
+        detail["rss"] = row.rss
+        detail["rss_fmt"] = _format_kb(row.rss)
+        detail["vsz"] = row.vsz
+        detail["vsz_fmt"] = _format_kb(row.vsz)
+        detail["state"] = _decode_state(row.stat)
 
     # Parent process chain (walk up to 4 levels)
     current_ppid = detail["ppid"]
     for _ in range(4):
-        if not current_ppid or current_ppid <= 1:
+        if not current_ppid or current_ppid <= 1 or table is None:
             break
-        try:
-            result = subprocess.run(
-                ["ps", "-p", str(current_ppid), "-o", "ppid,comm,args"],
-                capture_output=True, text=True, timeout=3
-            )
-            lines = result.stdout.strip().split("\n")
-            if len(lines) >= 2:
-                parts = lines[1].strip().split(None, 2)
-                if len(parts) >= 2:
-                    name = parts[1].rsplit("/", 1)[-1]
-                    cmd = parts[2] if len(parts) > 2 else name
-                    detail["parent_chain"].append({
-                        "pid": current_ppid,
-                        "name": name,
-                        "command": cmd,
-                    })
-                    if not detail["parent_command"]:
-                        detail["parent_command"] = cmd
-                    current_ppid = int(parts[0])
-                else:
-                    break
-            else:
-                break
-        except (subprocess.TimeoutExpired, FileNotFoundError, ValueError, IndexError):
+        parent = table.get(current_ppid)
+        if parent is None:
             break
-
-    # Working directory via lsof
-    try:
-        result = subprocess.run(
-            ["lsof", "-p", str(pid), "-a", "-d", "cwd", "-F", "n"],
-            capture_output=True, text=True, timeout=5
-        )
-        for line in result.stdout.strip().split("\n"):
-            if line.startswith("n") and len(line) > 1:
-                detail["cwd"] = line[1:]
-                break
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        name = os.path.basename(parent.path) or str(parent.pid)
+        cmd = parent.command or name
+        detail["parent_chain"].append({
+            "pid": parent.pid,
+            "name": name,
+            "command": cmd,
+        })
+        if not detail["parent_command"]:
+            detail["parent_command"] = cmd
+        current_ppid = parent.ppid
 
     # Thread count via ps -M
     try:
-        result = subprocess.run(
-            ["ps", "-M", "-p", str(pid)],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["ps", "-M", "-p", str(pid)], timeout=5)
         lines = result.stdout.strip().split("\n")
         detail["thread_count"] = max(0, len(lines) - 1)
     except (subprocess.TimeoutExpired, FileNotFoundError):
         pass
 
-    # Open files via lsof (categorize them)
+    # Working directory and open files from a single lsof run
     try:
-        result = subprocess.run(
-            ["lsof", "-p", str(pid), "-F", "tn"],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["lsof", "-p", str(pid), "-F", "ftn"], timeout=5)
         files = []
         libs_count = 0
+        current_fd = ""
         current_type = ""
         for line in result.stdout.strip().split("\n"):
-            if line.startswith("t"):
+            if line.startswith("f"):
+                current_fd = line[1:]
+                current_type = ""
+            elif line.startswith("t"):
                 current_type = line[1:]
             elif line.startswith("n") and len(line) > 1:
                 name = line[1:]
-                if name.endswith(".dylib") or "/Frameworks/" in name:
+                if current_fd == "cwd":
+                    detail["cwd"] = name
+                elif name.endswith(".dylib") or "/Frameworks/" in name:
                     libs_count += 1
                 elif current_type == "REG" and not name.startswith("/dev/"):
                     files.append(name)
@@ -205,9 +305,26 @@ def collect_process_detail(pid):
     except (subprocess.TimeoutExpired, FileNotFoundError):
         pass
 
+    _detail_cache.set(cache_key, detail)
     return detail
 
 
+def _process_row(pid):
+    """Run ps for a single PID and return its ProcessRow, or None.
+
+    The command line is left empty; the detail view does not show it.
+    """
+    try:
+        result = runner.run(["ps", "-p", str(pid), "-o", _PS_COLUMNS], timeout=5)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    for line in result.stdout.splitlines():
+        row = _parse_ps_line(line)
+        if row and row.pid == pid:
+            return row
+    return None
+
+
 def _format_kb(kb):
     """Format kilobytes to human-readable string."""
     if kb < 1024:
@@ -249,33 +366,114 @@ def _decode_state(stat_str):
 def check_codesign(app_path):
     """Check code signing status for an application binary.
 
+    Runs codesign synchronously on a cache miss.  Results are cached by
+    binary identity (path, inode, mtime, size), so a binary replaced in
+    place is verified again.
+
     Returns:
     {
-        "signed": bool,
+        "signed": bool, or None when it cannot be checked (no codesign),
         "authority": str or None,
         "team_id": str or None,
         "identifier": str or None,
     }
     """
     if not app_path:
-        return {"signed": False, "authority": None, "team_id": None, "identifier": None}
+        return _unsigned()
+
+    identity = _binary_identity(app_path)
+    info = _codesign_cache.get(identity)
+    if info is not None:
+        return info
+
+    return _verify(identity)
+
+
+def codesign_batch(paths, timeout=CODESIGN_BATCH_TIMEOUT):
+    """Check many binaries concurrently, waiting at most `timeout` seconds.
+
+    Returns a dict of path -> codesign info (see check_codesign).  Paths
+    whose check has not finished by the deadline map to PENDING and keep
+    verifying in the background.  timeout=0 only reports cached results
+    and queues the rest.
+    """
+    results = {}
+    waiting = {}
 
     with _codesign_lock:
-        if app_path in _codesign_cache:
-            return _codesign_cache[app_path]
+        for path in set(paths):
+            if not path:
+                results[path] = _unsigned()
+                continue
+            identity = _binary_identity(path)
+            info = _codesign_cache.get(identity)
+            if info is not None:
+                results[path] = info
+                continue
+            future = _codesign_inflight.get(identity)
+            if future is None:
+                future = _codesign_pool.submit(_verify, identity)
+                _codesign_inflight[identity] = future
+            waiting[path] = future
+
+    if waiting and timeout:
+        wait(waiting.values(), timeout=timeout)
+    for path, future in waiting.items():
+        results[path] = future.result() if future.done() else PENDING
+
+    return results
+
+
+def prefetch_codesign(paths):
+    """Queue background codesign checks for binaries not yet verified."""
+    codesign_batch(paths, timeout=0)
+
+
+def _binary_identity(path):
+    """Return (path, inode, mtime_ns, size) — the codesign cache key.
+
+    Falls back to (path, None, None, None) for paths that cannot be
+    stat'ed (e.g. kernel tasks without a binary).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None, None)
+    return (path, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _unsigned():
+    return {"signed": False, "authority": None, "team_id": None, "identifier": None}
+
+
+def _unknown():
+    return {"signed": None, "authority": None, "team_id": None, "identifier": None}
+
+
+def _verify(identity):
+    """Run codesign for one binary identity and cache the result."""
+    app_path = identity[0]
 
     # Find the .app bundle from the binary path
     bundle_path = _find_app_bundle(app_path)
     target = bundle_path or app_path
 
     try:
-        result = subprocess.run(
-            ["codesign", "-dvvv", target],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["codesign", "-dvvv", target], timeout=5)
         output = result.stderr  # codesign writes to stderr
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return {"signed": False, "authority": None, "team_id": None, "identifier": None}
+    except subprocess.TimeoutExpired:
+        with _codesign_lock:
+            _codesign_inflight.pop(identity, None)
+        return _unsigned()
+    except FileNotFoundError:
+        # No codesign binary (not macOS): signing cannot be checked, which
+        # is not the same as unsigned.  Cached in memory only, so a store
+        # shared with a Mac never learns it.
+        info = _unknown()
+        with _codesign_lock:
+            _codesign_cache.set(identity, info)
+            _codesign_inflight.pop(identity, None)
+        return info
 
     info = {
         "signed": ("valid on disk" in output or "Authority=" in output
@@ -294,11 +492,46 @@ def check_codesign(app_path):
             info["identifier"] = line.split("=", 1)[1]
 
     with _codesign_lock:
-        _codesign_cache[app_path] = info
+        _codesign_cache.set(identity, info)
+        _codesign_inflight.pop(identity, None)
+    cache_store.put("codesign", _identity_key(identity), info)
 
     return info
 
 
+def _identity_key(identity):
+    """Serialize a binary identity as a persistent cache key."""
+    return "|".join("" if part is None else str(part) for part in identity)
+
+
+def _parse_identity_key(key):
+    path, ino, mtime, size = key.rsplit("|", 3)
+    if not ino:
+        return (path, None, None, None)
+    return (path, int(ino), int(mtime), int(size))
+
+
+def load_persisted():
+    """Warm the codesign cache from the persistent store."""
+    if shutil.which("codesign") is None:
+        # Nothing can be verified here, and older stores recorded the
+        # missing tool as "unsigned"
+        return
+    for key, (info, timestamp) in cache_store.load("codesign").items():
+        try:
+            identity = _parse_identity_key(key)
+        except ValueError:
+            continue
+        _codesign_cache.set(identity, info, timestamp=timestamp)
+
+
+def get_cache_info():
+    """Return codesign cache stats."""
+    with _codesign_lock:
+        pending = len(_codesign_inflight)
+    return {**_codesign_cache.stats(), "pending": pending}
+
+
 def _find_app_bundle(path):
     """Extract the .app bundle path from a full binary path.
 
@@ -0,0 +1,444 @@
+"""Fork-free collectors for Linux, reading /proc directly.
+
+Each function returns the same shape as its macOS counterpart so the rest
+of MacWatch does not care which backend produced the data:
+
+    collect_connections()   -> lsof.collect()
+    collect_process_table() -> process.collect_process_table()
+    collect_cpu() / collect_memory() / collect_disk() -> system.collect_*()
+
+Per-process traffic counters have no /proc equivalent, so
+collect_traffic() returns an empty dict (as nettop.collect() does when
+nettop is unavailable).
+"""
+
+import ipaddress
+import os
+import pwd
+import threading
+import time
+
+from src.collectors.process import ProcessRow, ProcessTable
+from src.utils import format_bytes
+
+PROC = "/proc"
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# /proc/net/tcp state codes, named as lsof reports them on Linux
+TCP_STATES = {
+    "01": "ESTABLISHED",
+    "02": "SYN_SENT",
+    "03": "SYN_RECV",
+    "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2",
+    "06": "TIME_WAIT",
+    "07": "CLOSE",
+    "08": "CLOSE_WAIT",
+    "09": "LAST_ACK",
+    "0A": "LISTEN",
+    "0B": "CLOSING",
+}
+
+# (file under /proc/net, protocol, address type)
+_NET_TABLES = (
+    ("tcp", "TCP", "IPv4"),
+    ("tcp6", "TCP", "IPv6"),
+    ("udp", "UDP", "IPv4"),
+    ("udp6", "UDP", "IPv6"),
+)
+
+_users = {}
+_cpu_lock = threading.Lock()
+_last_cpu_times = None
+
+# Socket inode -> owner (or None if no process held it), from the
+# previous socket_owners() call
+_owners = {}
+_owners_lock = threading.Lock()
+
+
+# --- Processes ---
+
+def collect_process_table():
+    """Read /proc/<pid>/{stat,cmdline,exe} for every process.
+
+    CPU and memory percentages follow ps semantics: CPU is lifetime CPU
+    time over lifetime wall time, memory is RSS over total RAM.
+    """
+    boot_time = _boot_time()
+    uptime = _uptime()
+    mem_total_kb = _meminfo().get("MemTotal", 0)
+
+    rows = {}
+    for pid in _pids():
+        row = _read_process(pid, boot_time, uptime, mem_total_kb)
+        if row:
+            rows[pid] = row
+    return ProcessTable(rows)
+
+
+def _pids():
+    try:
+        return [int(name) for name in os.listdir(PROC) if name.isdigit()]
+    except OSError:
+        return []
+
+
+def _read_process(pid, boot_time, uptime, mem_total_kb):
+    """Build a ProcessRow for one PID, or None if it vanished."""
+    base = f"{PROC}/{pid}"
+    try:
+        with open(f"{base}/stat") as f:
+            stat = f.read()
+        with open(f"{base}/cmdline", "rb") as f:
+            cmdline = f.read()
+        uid = os.stat(base).st_uid
+    except OSError:
+        return None
+
+    # comm is parenthesised and may itself contain spaces or ")"
+    lparen, rparen = stat.find("("), stat.rfind(")")
+    comm = stat[lparen + 1:rparen]
+    fields = stat[rparen + 2:].split()
+    if len(fields) < 22:
+        return None
+
+    state = fields[0]
+    ppid, pgid = int(fields[1]), int(fields[2])
+    cpu_ticks = int(fields[11]) + int(fields[12])
+    pri, nice = int(fields[15]), int(fields[16])
+    start_ticks = int(fields[19])
+    vsz_kb = int(fields[20]) // 1024
+    rss_kb = int(fields[21]) * _PAGE_SIZE // 1024
+
+    started = start_ticks / _CLK_TCK
+    elapsed = max(uptime - started, 0.0)
+    cpu_seconds = cpu_ticks / _CLK_TCK
+
+    args = cmdline.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+    if not args:
+        args = f"[{comm}]"  # kernel thread, as ps shows it
+    try:
+        path = os.readlink(f"{base}/exe")
+    except OSError:
+        path = args.split(" ", 1)[0]
+
+    return ProcessRow(
+        pid=pid,
+        ppid=ppid,
+        pgid=pgid,
+        user=_user_name(uid),
+        cpu=round(cpu_seconds / elapsed * 100, 1) if elapsed > 0 else 0.0,
+        mem=round(rss_kb / mem_total_kb * 100, 1) if mem_total_kb else 0.0,
+        rss=rss_kb,
+        vsz=vsz_kb,
+        nice=nice,
+        pri=pri,
+        stat=state,
+        cputime=_format_duration(cpu_seconds, always_hours=True),
+        lstart=time.ctime(boot_time + started),
+        etime=_format_duration(elapsed),
+        path=path,
+        command=args,
+    )
+
+
+def _user_name(uid):
+    name = _users.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            name = str(uid)
+        _users[uid] = name
+    return name
+
+
+def _format_duration(seconds, always_hours=False):
+    """Format seconds like ps: [[dd-]hh:]mm:ss."""
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days:02d}-{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if hours or always_hours:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+# --- Connections ---
+
+def collect_connections():
+    """Read /proc/net/{tcp,tcp6,udp,udp6} and attribute sockets to PIDs.
+
+    Returns a list of dicts in lsof.collect() format.  Sockets that no
+    process owns (e.g. TIME_WAIT) are skipped, as lsof skips them.
+    """
+    tables = []
+    for table, protocol, addr_type in _NET_TABLES:
+        try:
+            with open(f"{PROC}/net/{table}") as f:
+                tables.append((f.readlines()[1:], protocol, addr_type))
+        except OSError:
+            continue
+
+    inodes = {int(parts[9]) for lines, _, _ in tables for parts in map(str.split, lines)
+              if len(parts) >= 10}
+    owners = socket_owners(inodes)
+    connections = []
+    for lines, protocol, addr_type in tables:
+        for line in lines:
+            conn = _parse_net_line(line, protocol, addr_type, owners)
+            if conn:
+                connections.append(conn)
+    return connections
+
+
+def socket_owners(inodes=None):
+    """Map socket inode -> (pid, command, user, fd).
+
+    Given the inodes about to be reported, owners found by the previous
+    call are confirmed with one readlink each, and /proc/*/fd is scanned
+    only if some inode is new — stopping as soon as all new ones are
+    found.  Without `inodes`, every process is scanned.
+    """
+    if inodes is None:
+        return _scan_owners()
+
+    inodes = set(inodes)
+    with _owners_lock:
+        known = {inode: _owners[inode] for inode in inodes if inode in _owners}
+    owners = {inode: owner for inode, owner in known.items()
+              if owner is None or _owns(owner, inode)}
+    new = inodes - owners.keys()
+    if new:
+        found = _scan_owners(new)
+        for inode in new:
+            owners[inode] = found.get(inode)
+
+    with _owners_lock:
+        # Replacing the map also forgets sockets that have closed
+        _owners.clear()
+        _owners.update(owners)
+    return {inode: owner for inode, owner in owners.items() if owner is not None}
+
+
+def _owns(owner, inode):
+    """True if the owner's fd still refers to this socket."""
+    try:
+        return os.readlink(f"{PROC}/{owner[0]}/fd/{owner[3]}") == f"socket:[{inode}]"
+    except OSError:
+        return False
+
+
+def _scan_owners(wanted=None):
+    """Scan /proc/*/fd for sockets; with `wanted`, stop once all are seen."""
+    owners = {}
+    remaining = set(wanted) if wanted is not None else None
+    for pid in _pids():
+        fd_dir = f"{PROC}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        owner = None
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if not target.startswith("socket:["):
+                continue
+            if owner is None:
+                owner = _process_owner(pid)
+                if owner is None:
+                    break
+            inode = int(target[8:-1])
+            owners.setdefault(inode, (pid, owner[0], owner[1], fd))
+            if remaining is not None:
+                remaining.discard(inode)
+        if remaining is not None and not remaining:
+            break
+    return owners
+
+
+def _process_owner(pid):
+    """Return (command name, user) for a PID, or None if it vanished."""
+    try:
+        with open(f"{PROC}/{pid}/comm") as f:
+            comm = f.read().strip()
+        uid = os.stat(f"{PROC}/{pid}").st_uid
+    except OSError:
+        return None
+    return comm, _user_name(uid)
+
+
+def _parse_net_line(line, protocol, addr_type, owners):
+    """Parse one /proc/net/{tcp,udp}[6] row into an lsof-style dict."""
+    parts = line.split()
+    if len(parts) < 10:
+        return None
+    owner = owners.get(int(parts[9]))
+    if owner is None:
+        return None
+    return connection_record(
+        owner, protocol, addr_type,
+        _decode_endpoint(parts[1]), _decode_endpoint(parts[2]),
+        TCP_STATES.get(parts[3]) if protocol == "TCP" else None)
+
+
+def connection_record(owner, protocol, addr_type, local, remote, state):
+    """Build a connection dict in lsof.collect() format.
+
+    `owner` is a socket_owners() value; `local` and `remote` are
+    (address, port) pairs from format_endpoint().
+    """
+    pid, app, user, fd = owner
+    remote_addr, remote_port = remote
+    if not remote_port:
+        remote_addr, remote_port = None, None
+    return {
+        "app": app,
+        "pid": pid,
+        "user": user,
+        "fd": fd,
+        "type": addr_type,
+        "protocol": protocol,
+        "local_addr": local[0],
+        "local_port": local[1],
+        "remote_addr": remote_addr,
+        "remote_port": remote_port,
+        "state": state,
+    }
+
+
+def format_endpoint(raw_addr, port):
+    """Format packed address bytes and a port as lsof does; wildcards become "*"."""
+    addr = ipaddress.ip_address(raw_addr)
+    if addr.is_unspecified:
+        return "*", port or None
+    return addr.compressed, port
+
+
+def _decode_endpoint(hex_endpoint):
+    """Decode "0100007F:0050" into ("127.0.0.1", 80)."""
+    hex_addr, hex_port = hex_endpoint.split(":")
+    raw = bytes.fromhex(hex_addr)
+    # The kernel prints each 32-bit word in host (little-endian) order
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    return format_endpoint(raw, int(hex_port, 16))
+
+
+# --- Traffic ---
+
+def collect_traffic():
+    """Per-process byte counters are not exposed by /proc; returns {}."""
+    return {}
+
+
+# --- System ---
+
+def collect_cpu():
+    """CPU usage since the previous call (from /proc/stat) and load averages.
+
+    Returns None if neither could be read.
+    """
+    global _last_cpu_times
+    stats = {}
+    try:
+        with open(f"{PROC}/stat") as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        total = sum(values[:8])
+        with _cpu_lock:
+            prev = _last_cpu_times
+            _last_cpu_times = (idle, total)
+        if prev and total > prev[1]:
+            busy = 1 - (idle - prev[0]) / (total - prev[1])
+        else:
+            busy = 1 - idle / total if total else 0.0
+        stats["cpu_percent"] = round(busy * 100, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        with open(f"{PROC}/loadavg") as f:
+            parts = f.read().split()
+        stats["load_avg_1"] = float(parts[0])
+        stats["load_avg_5"] = float(parts[1])
+        stats["load_avg_15"] = float(parts[2])
+    except (OSError, ValueError, IndexError):
+        pass
+    return stats or None
+
+
+def collect_memory():
+    """Memory usage from /proc/meminfo (used = total - available), or None."""
+    info = _meminfo()
+    total = info.get("MemTotal", 0) * 1024
+    if not total:
+        return None
+    available = info.get("MemAvailable", info.get("MemFree", 0)) * 1024
+    used = total - available
+    return {
+        "mem_total": total,
+        "mem_total_fmt": format_bytes(total),
+        "mem_used": used,
+        "mem_used_fmt": format_bytes(used),
+        "mem_percent": round(used / total * 100, 1),
+    }
+
+
+def collect_disk():
+    """Root volume usage via statvfs (no df fork), or None."""
+    try:
+        st = os.statvfs("/")
+    except OSError:
+        return None
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    capacity = used + available
+    return {
+        "disk_total": capacity,
+        "disk_used": used,
+        "disk_percent": round(used / capacity * 100, 1) if capacity else 0.0,
+        "disk_total_fmt": format_bytes(capacity),
+        "disk_used_fmt": format_bytes(used),
+    }
+
+
+def _meminfo():
+    """Return /proc/meminfo as {field: kB}."""
+    info = {}
+    try:
+        with open(f"{PROC}/meminfo") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if parts:
+                    info[key] = int(parts[0])
+    except (OSError, ValueError):
+        pass
+    return info
+
+
+def _boot_time():
+    try:
+        with open(f"{PROC}/stat") as f:
+            for line in f:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return time.time() - _uptime()
+
+
+def _uptime():
+    try:
+        with open(f"{PROC}/uptime") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0.0
@@ -0,0 +1,144 @@
+"""Supervised long-running collector processes.
+
+Tools like nettop and lsof can repeat their sampling themselves.  Keeping
+one child running and parsing its output as it arrives avoids paying
+process start-up and warm-up on every refresh.  The supervisor restarts
+a child that exits (with backoff), and stops it when nobody has asked for
+data for SAMPLER_IDLE_TIMEOUT seconds.
+"""
+
+import threading
+import time
+
+from src import runner
+from src.config import SAMPLER_IDLE_TIMEOUT, STREAM_RESTART_BACKOFF_MAX
+
+_registry = {}
+
+
+class StreamingCollector:
+    """Keep a child process running and remember its latest complete frame.
+
+    Args:
+        name: label for threads and stats.
+        argv: command line of the child.
+        is_boundary: callable(line) -> True for lines that separate frames.
+        parse: callable(lines) -> parsed result for one complete frame.
+        boundary_starts_frame: True if a boundary line is the first line of
+            the next frame (a header), False if it ends the current one
+            (a marker).
+    """
+
+    def __init__(self, name, argv, is_boundary, parse, boundary_starts_frame=False):
+        self.name = name
+        self._argv = argv
+        self._is_boundary = is_boundary
+        self._parse = parse
+        self._boundary_starts_frame = boundary_starts_frame
+        self._lock = threading.Lock()
+        self._thread = None
+        self._proc = None
+        self._latest = None  # (timestamp, result)
+        self._last_read = 0.0
+        self._unavailable = False
+        self._restarts = 0
+        self._frames = 0
+        _registry[name] = self
+
+    def latest(self, max_age):
+        """Return the newest parsed frame if it is at most max_age old.
+
+        Starts the child on first use, so the first call (and any call
+        while the child is restarting) returns None and the caller should
+        collect once on its own.
+        """
+        with self._lock:
+            self._last_read = time.time()
+            if self._thread is None and not self._unavailable:
+                self._thread = threading.Thread(
+                    target=self._supervise, name=f"macwatch-stream-{self.name}",
+                    daemon=True)
+                self._thread.start()
+            latest = self._latest
+        if latest is None or time.time() - latest[0] > max_age:
+            return None
+        return latest[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._proc is not None and self._proc.poll() is None,
+                "unavailable": self._unavailable,
+                "restarts": self._restarts,
+                "frames": self._frames,
+                "last_frame_age": (round(time.time() - self._latest[0], 1)
+                                   if self._latest else None),
+            }
+
+    def _idle(self):
+        return time.time() - self._last_read > SAMPLER_IDLE_TIMEOUT
+
+    def _supervise(self):
+        backoff = 1
+        while not self._idle():
+            try:
+                proc = runner.popen(self._argv)
+            except OSError:
+                with self._lock:
+                    self._unavailable = True
+                break
+            with self._lock:
+                self._proc = proc
+            started = time.time()
+            try:
+                self._read(proc)
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            if self._idle():
+                break
+            with self._lock:
+                self._restarts += 1
+            # Back off only when the child keeps dying quickly
+            backoff = 1 if time.time() - started > STREAM_RESTART_BACKOFF_MAX else min(
+                backoff * 2, STREAM_RESTART_BACKOFF_MAX)
+            time.sleep(backoff)
+
+        with self._lock:
+            self._proc = None
+            self._latest = None
+            self._thread = None
+
+    def _read(self, proc):
+        """Split the child's output into frames and parse each one."""
+        frame = []
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if not self._is_boundary(line):
+                frame.append(line)
+                continue
+            if self._boundary_starts_frame:
+                self._publish(frame)
+                frame = [line]
+            else:
+                self._publish(frame)
+                frame = []
+            if self._idle():
+                return
+
+    def _publish(self, frame):
+        if not frame:
+            return
+        try:
+            result = self._parse(frame)
+        except Exception:
+            return
+        with self._lock:
+            self._latest = (time.time(), result)
+            self._frames += 1
+
+
+def get_stats():
+    """Return stats for every streaming collector, keyed by name."""
+    return {name: collector.stats() for name, collector in _registry.items()}
@@ -3,8 +3,26 @@
 import re
 import subprocess
 
+from src import runner
 from src.utils import format_bytes
 
+_EMPTY_STATS = {
+    "cpu_percent": 0.0,
+    "load_avg_1": 0.0,
+    "load_avg_5": 0.0,
+    "load_avg_15": 0.0,
+    "mem_total": 0,
+    "mem_used": 0,
+    "mem_percent": 0.0,
+    "mem_total_fmt": "—",
+    "mem_used_fmt": "—",
+    "disk_total": 0,
+    "disk_used": 0,
+    "disk_percent": 0.0,
+    "disk_total_fmt": "—",
+    "disk_used_fmt": "—",
+}
+
 
 def collect_system_stats():
     """Return system-wide CPU, memory, and disk usage.
@@ -27,22 +45,7 @@ def collect_system_stats():
         "disk_used_fmt": str,
     }
     """
-    stats = {
-        "cpu_percent": 0.0,
-        "load_avg_1": 0.0,
-        "load_avg_5": 0.0,
-        "load_avg_15": 0.0,
-        "mem_total": 0,
-        "mem_used": 0,
-        "mem_percent": 0.0,
-        "mem_total_fmt": "—",
-        "mem_used_fmt": "—",
-        "disk_total": 0,
-        "disk_used": 0,
-        "disk_percent": 0.0,
-        "disk_total_fmt": "—",
-        "disk_used_fmt": "—",
-    }
+    stats = empty_stats()
 
     _collect_cpu(stats)
     _collect_memory(stats)
@@ -51,13 +54,40 @@ def collect_system_stats():
     return stats
 
 
+def empty_stats():
+    """Return a system stats dict with every field at its default."""
+    return dict(_EMPTY_STATS)
+
+
+def collect_cpu():
+    """Return only the CPU and load-average fields of the system stats.
+
+    Returns None if top could not be run or parsed, so the sampler keeps
+    the previous values.
+    """
+    stats = {}
+    return stats if _collect_cpu(stats) and stats else None
+
+
+def collect_memory():
+    """Return only the memory fields of the system stats, or None on failure."""
+    stats = {}
+    return stats if _collect_memory(stats) and stats else None
+
+
+def collect_disk():
+    """Return only the disk fields of the system stats, or None on failure."""
+    stats = {}
+    return stats if _collect_disk(stats) and stats else None
+
+
 def _collect_cpu(stats):
-    """Parse `top -l 1 -n 0 -s 0` for CPU usage and load averages."""
+    """Parse `top -l 1 -n 0 -s 0` for CPU usage and load averages.
+
+    Returns False if top failed (stats may then be partly filled).
+    """
     try:
-        result = subprocess.run(
-            ["top", "-l", "1", "-n", "0", "-s", "0"],
-            capture_output=True, text=True, timeout=10
-        )
+        result = runner.run(["top", "-l", "1", "-n", "0", "-s", "0"], timeout=10)
         for line in result.stdout.split("\n"):
             if line.startswith("CPU usage:"):
                 # "CPU usage: 15.51% user, 19.73% sys, 64.75% idle"
@@ -77,26 +107,21 @@ def _collect_cpu(stats):
                     stats["load_avg_5"] = float(parts[1].strip())
                     stats["load_avg_15"] = float(parts[2].strip())
     except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-        pass
+        return False
+    return True
 
 
 def _collect_memory(stats):
-    """Use sysctl + vm_stat for memory usage."""
+    """Use sysctl + vm_stat for memory usage. Returns False on failure."""
     try:
         # Total physical RAM
-        result = subprocess.run(
-            ["sysctl", "-n", "hw.memsize"],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["sysctl", "-n", "hw.memsize"], timeout=5)
         total = int(result.stdout.strip())
         stats["mem_total"] = total
         stats["mem_total_fmt"] = format_bytes(total)
 
         # Page breakdown from vm_stat
-        result = subprocess.run(
-            ["vm_stat"],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["vm_stat"], timeout=5)
         output = result.stdout
 
         # Parse page size from first line
@@ -124,16 +149,14 @@ def _collect_memory(stats):
         stats["mem_percent"] = round(used / total * 100, 1) if total else 0.0
 
     except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-        pass
+        return False
+    return True
 
 
 def _collect_disk(stats):
-    """Parse `df -k /` for root volume usage."""
+    """Parse `df -k /` for root volume usage. Returns False on failure."""
     try:
-        result = subprocess.run(
-            ["df", "-k", "/"],
-            capture_output=True, text=True, timeout=5
-        )
+        result = runner.run(["df", "-k", "/"], timeout=5)
         lines = result.stdout.strip().split("\n")
         if len(lines) >= 2:
             parts = lines[1].split()
@@ -150,4 +173,5 @@ def _collect_disk(stats):
                 stats["disk_total_fmt"] = format_bytes(capacity)
                 stats["disk_used_fmt"] = format_bytes(used)
     except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-        pass
+        return False
+    return True
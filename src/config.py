@@ -1,5 +1,7 @@
 """Configuration defaults for NetWatch."""
 
+import os
+
 # Server
 HOST = "127.0.0.1"
 PORT = 8077
@@ -7,6 +9,38 @@ PORT = 8077
 # Refresh
 DEFAULT_REFRESH_INTERVAL = 120  # seconds
 
+# Background sampler — how often each collector runs (seconds)
+SAMPLER_CADENCE = {
+    "connections": 5,   # lsof
+    "traffic": 5,       # nettop
+    "processes": 5,     # ps
+    "cpu": 5,           # top
+    "memory": 10,       # sysctl + vm_stat
+    "disk": 60,         # df
+}
+COLLECTOR_WORKERS = 4        # collectors that may run at the same time
+SAMPLER_IDLE_TIMEOUT = 300   # stop collecting after N seconds without readers
+SNAPSHOT_MAX_AGE = 30        # requests wait for a fresher snapshot than this
+SNAPSHOT_WAIT_TIMEOUT = 30   # max seconds a request waits for a snapshot
+REFRESH_COALESCE_WINDOW = 3  # forced refreshes within N seconds share one run
+SNAPSHOT_HISTORY = 20        # recent snapshots kept for ?since= deltas
+STREAM_KEEPALIVE = 15        # seconds between keepalives on /api/stream
+
+# Keep nettop and lsof running in repeat mode instead of spawning them
+# for every sample; a child that exits is restarted with backoff.
+STREAMING_COLLECTORS = True
+STREAM_RESTART_BACKOFF_MAX = 60  # seconds
+
+# Collector backend: "auto" (by platform), "macos" (subprocesses) or
+# "procfs" (Linux /proc, no forks)
+COLLECTOR_BACKEND = os.environ.get("MACWATCH_BACKEND", "auto")
+
+# Record every external command (and reverse DNS lookup) of a session to a
+# gzip archive, or answer them all from such an archive (see runner.py)
+RECORD_PATH = os.environ.get("MACWATCH_RECORD", "")
+REPLAY_PATH = os.environ.get("MACWATCH_REPLAY", "")
+REPLAY_SPEED = float(os.environ.get("MACWATCH_REPLAY_SPEED", "1"))  # 0 = no delays
+
 # Standard ports (connections to these don't trigger "unusual port" flag)
 STANDARD_PORTS = {
     22: "SSH",
@@ -24,6 +58,10 @@ STANDARD_PORTS = {
     8443: "HTTPS-Alt",
 }
 
+# Networks treated like private space: no DNS/WHOIS lookups, no external-
+# connection alerts (CIDR strings, e.g. "203.0.113.0/24" for a company VPN)
+TRUSTED_NETWORKS = []
+
 # Known VPS/hosting providers (whois org name substrings)
 VPS_PROVIDERS = [
     "digitalocean",
@@ -75,6 +113,35 @@ THREAT_WEIGHTS = {
     "listen_all_interfaces": 1,
 }
 
+# Per-connection threat rules, compiled once by analysis/rules.py.  A
+# connection is flagged when every condition under "match" holds:
+#   remote_port / remote_port_not / state / local_addr / app / country: sets
+#   org_contains: whois org substrings    public: remote address is public
+#   resolved: whether reverse DNS found a hostname (pending lookups never match)
+# "weight" defaults to THREAT_WEIGHTS[type]; "description" may use
+# {remote_addr}, {remote_port}, {local_port}, {whois_org} and {app}.
+# Append entries here to flag new patterns.
+THREAT_RULES = [
+    {"type": "http_plaintext", "severity": "red",
+     "match": {"remote_port": [80], "state": ["ESTABLISHED"]},
+     "description": "Plaintext HTTP — data transmitted without encryption"},
+    {"type": "unusual_port", "severity": "yellow",
+     "match": {"remote_port_not": list(STANDARD_PORTS), "state": ["ESTABLISHED"]},
+     "description": "Non-standard port {remote_port}"},
+    {"type": "no_rdns", "severity": "yellow",
+     "match": {"resolved": False, "public": True},
+     "description": "No reverse DNS for {remote_addr}"},
+    {"type": "vps_provider", "severity": "yellow",
+     "match": {"org_contains": VPS_PROVIDERS},
+     "description": "IP belongs to hosting provider ({whois_org})"},
+    {"type": "system_daemon_external", "severity": "yellow",
+     "match": {"app": SYSTEM_DAEMONS, "public": True},
+     "description": "System daemon '{app}' connecting externally"},
+    {"type": "listen_all_interfaces", "severity": "blue",
+     "match": {"state": ["LISTEN"], "local_addr": ["*", "0.0.0.0", "::"]},
+     "description": "Listening on all interfaces (port {local_port})"},
+]
+
 # Thresholds
 UPLOAD_RATIO_THRESHOLD = 10  # flag when out > N * in
 UPLOAD_MINIMUM_BYTES = 1_000_000  # ignore ratio below 1 MB
@@ -97,8 +164,60 @@ SYSTEM_DISK_CRITICAL = 95.0      # red
 TOP_PROCESSES_COUNT = 15
 
 # Cache TTLs (seconds)
+PROCESS_DETAIL_TTL = 10  # process detail modal
 DNS_CACHE_TTL = 600  # 10 minutes
+DNS_NEGATIVE_CACHE_TTL = 60  # failed lookups are retried sooner
 WHOIS_CACHE_TTL = 86400  # 24 hours
+CODESIGN_CACHE_TTL = 7 * 86400  # 7 days
+
+# In-memory cache bounds (entries); least recently used are evicted
+DNS_CACHE_MAX = 20000
+WHOIS_CACHE_MAX = 20000
+WHOIS_NETBLOCK_MAX = 10000
+CODESIGN_CACHE_MAX = 5000
+CACHE_SWEEP_INTERVAL = 300   # seconds between expiry sweeps
+
+# New-connection baseline
+BASELINE_MAX_AGE = 30 * 86400   # forget endpoints not seen for 30 days
+BASELINE_MAX_PER_APP = 5000     # endpoints remembered per app
+BASELINE_TOUCH_INTERVAL = 3600  # last-seen resolution (seconds)
+
+# Persistent enrichment cache (SQLite).  Set MACWATCH_CACHE_DB="" to disable.
+CACHE_DB_PATH = os.environ.get(
+    "MACWATCH_CACHE_DB", os.path.expanduser("~/.macwatch/cache.db"))
+CACHE_FLUSH_INTERVAL = 30  # seconds between batched writes
+CACHE_PRUNE_INTERVAL = 3600  # seconds between deletes of expired rows
+CACHE_TTLS = {
+    "dns": DNS_CACHE_TTL,
+    "whois": WHOIS_CACHE_TTL,
+    "codesign": CODESIGN_CACHE_TTL,
+    "baseline": BASELINE_MAX_AGE,
+}
+
+# Metric history (SQLite).  Set MACWATCH_HISTORY_DB="" to disable.
+HISTORY_DB_PATH = os.environ.get(
+    "MACWATCH_HISTORY_DB", os.path.expanduser("~/.macwatch/history.db"))
+HISTORY_RETENTION = {   # seconds kept per resolution
+    "raw": 86400,        # every sample, 1 day
+    "1m": 7 * 86400,     # 1-minute rollups, 1 week
+    "1h": 365 * 86400,   # 1-hour rollups, 1 year
+}
+HISTORY_MAX_POINTS = 1000  # /api/history coarsens its step beyond this
+
+# Reverse DNS
+DNS_BATCH_TIMEOUT = 1.0  # max seconds a refresh waits for lookups
+DNS_WORKERS = 16         # concurrent reverse lookups
+
+# Background WHOIS enrichment
+WHOIS_WORKERS = 2         # concurrent whois processes
+WHOIS_RATE_LIMIT = 2.0    # max whois runs per second across all workers
+WHOIS_RETRY_BASE = 30     # seconds before the first retry of a failed lookup
+WHOIS_RETRY_MAX = 3600    # backoff cap
+WHOIS_NETBLOCK_MIN_PREFIX = {4: 8, 6: 16}  # only index blocks narrower than this
+
+# Code signing verification
+CODESIGN_WORKERS = 4           # concurrent codesign processes
+CODESIGN_BATCH_TIMEOUT = 2.0   # max seconds a refresh waits for networked apps
 
 # AI Analysis
 AI_DEFAULT_PROVIDER = "ollama"
@@ -0,0 +1,85 @@
+"""Deltas between two dashboard payloads, for /api/connections?since=.
+
+Apps are matched by PID, connections within an app by their endpoints and
+alerts by their "id".  Only what was added, removed or changed is sent;
+the small top-level sections (summary, system stats, top processes) are
+sent whole, and only when they differ.  A list whose keys are not unique
+is sent whole as well.  static/js/shared.js applies the result with
+applyConnectionsDelta().
+"""
+
+import hashlib
+
+# Sections that are replaced wholesale rather than diffed
+_REPLACED = ("top_processes", "system_stats", "summary")
+
+
+def alert_id(alert):
+    """Return a short stable id for an alert, from what identifies it."""
+    ident = "|".join(str(alert.get(field, "")) for field in
+                     ("app", "pid", "type", "connection", "description"))
+    return hashlib.sha1(ident.encode()).hexdigest()[:12]
+
+
+def connection_key(conn):
+    """Identify a connection within its app (mirrored by connKey() in shared.js)."""
+    return "|".join("" if conn.get(field) is None else str(conn[field]) for field in
+                    ("protocol", "local_addr", "local_port", "remote_addr", "remote_port"))
+
+
+def diff_payload(old, new):
+    """Return the changes that turn payload `old` into payload `new`.
+
+    Returns:
+        dict with "apps" and "alerts" list deltas (see _diff_list) or
+        whole lists, plus any of "top_processes", "system_stats" and
+        "summary" that changed.
+    """
+    delta = {}
+    for section, key, diff_item in (("apps", lambda a: a["pid"], _diff_app),
+                                    ("alerts", lambda a: a["id"], None)):
+        changes = _diff_list(old[section], new[section], key, diff_item)
+        delta[section] = new[section] if changes is None else changes
+    for section in _REPLACED:
+        if old.get(section) != new.get(section):
+            delta[section] = new.get(section)
+    return delta
+
+
+def _diff_list(old, new, key, diff_item=None):
+    """Diff two lists of dicts matched by key.
+
+    Returns:
+        {"added": [items], "removed": [keys], "changed": [items],
+         "order": [keys of `new`, in order]}, or None if either list has
+        duplicate keys.  Changed items are whole unless diff_item returns
+        a partial form for them.
+    """
+    old_by_key = {key(item): item for item in old}
+    if len(old_by_key) != len(old) or len({key(item) for item in new}) != len(new):
+        return None
+    added, changed = [], []
+    order = []
+    for item in new:
+        k = key(item)
+        order.append(k)
+        previous = old_by_key.pop(k, None)
+        if previous is None:
+            added.append(item)
+        elif previous != item:
+            changed.append(diff_item(previous, item) if diff_item else item)
+    return {"added": added, "removed": list(old_by_key), "changed": changed,
+            "order": order}
+
+
+def _diff_app(old, new):
+    """Return a changed app with its connection list replaced by a delta."""
+    app = {k: v for k, v in new.items() if k != "connections"}
+    if old["connections"] != new["connections"]:
+        conns = _diff_list(old["connections"], new["connections"], connection_key)
+        if conns is None:
+            app["connections"] = new["connections"]
+        else:
+            del conns["order"]
+            app["connections_delta"] = conns
+    return app
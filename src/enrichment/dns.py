@@ -1,44 +1,147 @@
-"""Reverse DNS lookups with caching."""
+"""Reverse DNS lookups with caching.
+
+Lookups for a whole snapshot are resolved concurrently by resolve_batch(),
+which waits at most a per-refresh deadline.  Addresses that are still
+resolving come back as PENDING; their lookups keep running in the
+background and land in the cache in time for the next snapshot.
+"""
 
 import socket
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from src import cache_store, runner
+from src.config import (
+    DNS_CACHE_TTL, DNS_NEGATIVE_CACHE_TTL, DNS_BATCH_TIMEOUT, DNS_WORKERS,
+    DNS_CACHE_MAX,
+)
+from src.ttlcache import TTLCache
 
-from src.config import DNS_CACHE_TTL
+# Returned by resolve_batch() for addresses whose lookup has not finished.
+PENDING = object()
 
-_cache = {}
+_cache = TTLCache(maxsize=DNS_CACHE_MAX, ttl=DNS_CACHE_TTL)
 _lock = threading.Lock()
+_inflight = {}
+_pool = ThreadPoolExecutor(max_workers=DNS_WORKERS,
+                           thread_name_prefix="macwatch-dns")
+_MISS = object()
+
+
+def _system_resolver(ip):
+    """Resolve an IP with the system resolver. Returns hostname or None.
+
+    Goes through runner.call() so sessions can be recorded and replayed.
+    """
+    return runner.call("dns", ip, _gethostbyaddr)
+
+
+def _gethostbyaddr(ip):
+    try:
+        hostname, _, _ = socket.gethostbyaddr(ip)
+    except (socket.herror, socket.gaierror, OSError):
+        return None
+    return hostname
+
+
+_resolver = _system_resolver
+
+
+def set_resolver(resolver):
+    """Replace the function used to resolve one IP (e.g. with a local stub).
+
+    `resolver(ip)` must return a hostname or None.  Pass None to restore
+    the system resolver.
+    """
+    global _resolver
+    _resolver = resolver or _system_resolver
 
 
 def reverse_lookup(ip):
     """Look up the hostname for an IP address. Returns hostname or None."""
-    if not ip or ip in ("*", "127.0.0.1", "::1"):
+    if _is_local(ip):
         return ip
+    return resolve_batch([ip], timeout=None)[ip]
+
+
+def resolve_batch(ips, timeout=DNS_BATCH_TIMEOUT):
+    """Resolve many IPs concurrently, waiting at most `timeout` seconds.
+
+    Returns a dict of ip -> hostname (None when the address has no PTR
+    record).  Addresses still being looked up when the deadline passes map
+    to PENDING.
+    """
+    results = {}
+    waiting = {}
 
     with _lock:
-        if ip in _cache:
-            hostname, timestamp = _cache[ip]
-            if time.time() - timestamp < DNS_CACHE_TTL:
-                return hostname
+        for ip in set(ips):
+            if _is_local(ip):
+                results[ip] = ip
+                continue
+            hostname = _cache.get(ip, _MISS)
+            if hostname is not _MISS:
+                results[ip] = hostname
+                continue
+            future = _inflight.get(ip)
+            if future is None:
+                future = _pool.submit(_resolve, ip)
+                _inflight[ip] = future
+            waiting[ip] = future
+
+    if waiting:
+        wait(waiting.values(), timeout=timeout)
+    for ip, future in waiting.items():
+        results[ip] = future.result() if future.done() else PENDING
 
+    return results
+
+
+def _resolve(ip):
+    """Resolve one IP in a worker thread and store the result."""
     try:
-        hostname, _, _ = socket.gethostbyaddr(ip)
-    except (socket.herror, socket.gaierror, OSError):
+        hostname = _resolver(ip)
+    except Exception:
         hostname = None
 
+    now = time.time()
     with _lock:
-        _cache[ip] = (hostname, time.time())
+        _cache.set(ip, hostname, ttl=_ttl_for(hostname), timestamp=now)
+        _inflight.pop(ip, None)
+    cache_store.put("dns", ip, hostname, now)
 
     return hostname
 
 
+def _ttl_for(hostname):
+    """Return the cache TTL for a lookup result."""
+    # Failed lookups expire sooner so a transient failure does not hide a
+    # hostname for the full TTL.
+    return DNS_CACHE_TTL if hostname else DNS_NEGATIVE_CACHE_TTL
+
+
+def _is_local(ip):
+    return not ip or ip in ("*", "127.0.0.1", "::1")
+
+
+def load_persisted():
+    """Warm the cache from the persistent store."""
+    for ip, (hostname, timestamp) in cache_store.load("dns").items():
+        _cache.set(ip, hostname, ttl=_ttl_for(hostname), timestamp=timestamp)
+
+
 def get_cache_info():
     """Return cache stats."""
     with _lock:
-        return {"size": len(_cache), "ttl": DNS_CACHE_TTL}
+        pending = len(_inflight)
+    return {
+        **_cache.stats(),
+        "pending": pending,
+        "negative_ttl": DNS_NEGATIVE_CACHE_TTL,
+    }
 
 
 def clear_cache():
     """Clear the DNS cache."""
-    with _lock:
-        _cache.clear()
+    _cache.clear()
@@ -1,47 +1,230 @@
-"""Whois lookups with caching."""
+"""Whois lookups with caching.
 
+Dashboard refreshes never run whois themselves: lookup_async() answers
+from the cache and queues unknown IPs for a small pool of background
+workers, which are rate limited and retry failures with backoff.
+
+Records are also indexed by the netblock (CIDR) they describe, so any
+other address inside an already-known block is answered from memory
+without running whois again.
+"""
+
+import queue
 import re
 import subprocess
 import threading
 import time
 
-from src.config import WHOIS_CACHE_TTL
+from src import cache_store, runner
+from src.config import (
+    WHOIS_CACHE_TTL, WHOIS_WORKERS, WHOIS_RATE_LIMIT,
+    WHOIS_RETRY_BASE, WHOIS_RETRY_MAX, WHOIS_NETBLOCK_MIN_PREFIX,
+    WHOIS_CACHE_MAX, WHOIS_NETBLOCK_MAX,
+)
+from src.ipnet import PrefixTable, is_private, parse_networks
+from src.ttlcache import TTLCache
+
+# Returned by lookup_async() while an IP is waiting for its first lookup.
+PENDING = object()
 
-_cache = {}
+_cache = TTLCache(maxsize=WHOIS_CACHE_MAX, ttl=WHOIS_CACHE_TTL)
 _lock = threading.Lock()
 
+# Netblock records: CIDR -> info, bounded and expiring like _cache.  The
+# prefix table indexes their CIDRs for longest-prefix match; entries the
+# cache has dropped are skipped on lookup and purged when the index is
+# rebuilt (once it holds twice WHOIS_NETBLOCK_MAX networks).
+_netblock_cache = TTLCache(maxsize=WHOIS_NETBLOCK_MAX, ttl=WHOIS_CACHE_TTL)
+_netblocks = PrefixTable()
+_netblock_stats = {"hits": 0, "misses": 0}
 
-def lookup(ip):
-    """Look up whois info for an IP. Returns dict with org, country, etc."""
-    if not ip or ip in ("*", "127.0.0.1", "::1") or ip.startswith("10.") or ip.startswith("192.168.") or ip.startswith("172."):
+# Background enrichment state (all guarded by _lock)
+_queue = queue.Queue()
+_queued = set()
+# ip -> (attempts, retry_at); kept until well past the longest backoff
+_failures = TTLCache(maxsize=WHOIS_CACHE_MAX, ttl=2 * WHOIS_RETRY_MAX)
+_workers = []
+_next_slot = 0.0
+
+
+def _empty_info():
+    return {"org": "", "country": "", "city": "", "cidr": "", "netname": ""}
+
+
+def _private_info(ip):
+    """Return the fixed record for private/local IPs, or None for public ones."""
+    if is_private(ip):
         return {"org": "Private", "country": "", "city": "", "cidr": "", "netname": ""}
+    return None
+
+
+def lookup(ip):
+    """Look up whois info for an IP. Returns dict with org, country, etc.
+
+    Runs whois synchronously on a cache miss — use lookup_async() on any
+    path that must not block.
+    """
+    private = _private_info(ip)
+    if private:
+        return private
 
     with _lock:
-        if ip in _cache:
-            info, timestamp = _cache[ip]
-            if time.time() - timestamp < WHOIS_CACHE_TTL:
-                return info
+        info = _get_cached(ip)
+    if info is not None:
+        return info
 
     info = _run_whois(ip)
+    if info is None:
+        _record_failure(ip)
+        return _empty_info()
+
+    _store(ip, info)
+    return info
+
+
+def lookup_async(ip):
+    """Return cached whois info for an IP without ever running whois.
+
+    Unknown IPs are queued for background lookup and return PENDING.
+    IPs whose lookup failed return an empty record until their retry.
+    """
+    private = _private_info(ip)
+    if private:
+        return private
 
     with _lock:
-        _cache[ip] = (info, time.time())
+        info = _get_cached(ip)
+        if info is not None:
+            return info
 
-    return info
+        failure = _failures.get(ip, count=False)
+        if failure and time.time() < failure[1]:
+            return _empty_info()
+
+        if ip not in _queued:
+            _queued.add(ip)
+            _queue.put(ip)
+        _ensure_workers()
+
+    return _empty_info() if failure else PENDING
+
+
+def _get_cached(ip):
+    """Return the cached record for ip if still fresh. Caller holds _lock.
+
+    Checks the per-IP cache first, then the netblock index.
+    """
+    info = _cache.get(ip)
+    if info is not None:
+        return info
+
+    for _, cidr in _netblocks.matches(ip):
+        info = _netblock_cache.get(cidr, count=False)
+        if info is not None:
+            _netblock_stats["hits"] += 1
+            return info
+    _netblock_stats["misses"] += 1
+    return None
+
+
+def _store(ip, info, now=None, persist=True):
+    now = now if now is not None else time.time()
+    with _lock:
+        _cache.set(ip, info, timestamp=now)
+        _failures.pop(ip, None)
+        for net in parse_networks(info.get("cidr")):
+            # Skip registry-wide blocks (e.g. a whole /8 referral) that say
+            # nothing about who actually operates the address.
+            if net.prefixlen > WHOIS_NETBLOCK_MIN_PREFIX[net.version]:
+                _index_netblock(net, info, now)
+    if persist:
+        cache_store.put("whois", ip, info, now)
+
+
+def _index_netblock(net, info, timestamp):
+    """Store a netblock record and index its CIDR. Caller holds _lock."""
+    cidr = str(net)
+    _netblock_cache.set(cidr, info, timestamp=timestamp)
+    _netblocks.insert(net, cidr)
+    if len(_netblocks) > 2 * WHOIS_NETBLOCK_MAX:
+        _netblocks.clear()
+        for live in _netblock_cache.keys():
+            _netblocks.insert(live, live)
+
+
+def load_persisted():
+    """Warm the cache (and netblock index) from the persistent store."""
+    for ip, (info, timestamp) in cache_store.load("whois").items():
+        _store(ip, info, now=timestamp, persist=False)
+
+
+def _record_failure(ip):
+    """Schedule a retry with exponential backoff instead of caching a miss."""
+    with _lock:
+        attempts = _failures.get(ip, (0, 0), count=False)[0] + 1
+        delay = min(WHOIS_RETRY_BASE * 2 ** (attempts - 1), WHOIS_RETRY_MAX)
+        _failures.set(ip, (attempts, time.time() + delay))
+
+
+def _ensure_workers():
+    """Start the background workers on first use. Caller holds _lock."""
+    while len(_workers) < WHOIS_WORKERS:
+        worker = threading.Thread(target=_worker, name="macwatch-whois",
+                                  daemon=True)
+        _workers.append(worker)
+        worker.start()
+
+
+def _worker():
+    while True:
+        ip = _queue.get()
+        try:
+            # An earlier lookup may have answered this IP's netblock since it
+            # was queued; check again before and after waiting for a slot.
+            if not _answered(ip):
+                _throttle()
+                if not _answered(ip):
+                    info = _run_whois(ip)
+                    if info is None:
+                        _record_failure(ip)
+                    else:
+                        _store(ip, info)
+        except Exception:
+            # Keep the worker alive; the IP is retried after its backoff.
+            _record_failure(ip)
+        finally:
+            with _lock:
+                _queued.discard(ip)
+
+
+def _answered(ip):
+    with _lock:
+        return _get_cached(ip) is not None
+
+
+def _throttle():
+    """Block until the shared rate limit allows another whois run."""
+    global _next_slot
+    with _lock:
+        now = time.time()
+        slot = max(now, _next_slot)
+        _next_slot = slot + 1.0 / WHOIS_RATE_LIMIT
+    if slot > now:
+        time.sleep(slot - now)
 
 
 def _run_whois(ip):
-    """Run whois command and parse the output."""
+    """Run whois command and parse the output. Returns None on failure."""
     try:
-        result = subprocess.run(
-            ["whois", ip],
-            capture_output=True, text=True, timeout=10
-        )
+        result = runner.run(["whois", ip], timeout=10)
         output = result.stdout
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        return {"org": "", "country": "", "city": "", "cidr": "", "netname": ""}
+        return None
+    if result.returncode != 0 and not output.strip():
+        return None
 
     info = {"org": "", "country": "", "city": "", "cidr": "", "netname": ""}
+    net_range = ""
 
     for line in output.split("\n"):
         line_lower = line.lower().strip()
@@ -69,21 +252,38 @@ def _run_whois(ip):
         if not info["cidr"] and line_lower.startswith("cidr:"):
             info["cidr"] = line.split(":", 1)[1].strip()
 
+        # Address range (RIPE/APNIC inetnum, ARIN NetRange) — kept
+        # separately and used only when no CIDR line is present
+        if not net_range and line_lower.startswith(("inetnum:", "inet6num:", "netrange:")):
+            net_range = line.split(":", 1)[1].strip()
+
         # Network name
         if not info["netname"]:
             if line_lower.startswith("netname:"):
                 info["netname"] = line.split(":", 1)[1].strip()
 
+    if not info["cidr"] and net_range:
+        info["cidr"] = ", ".join(str(net) for net in parse_networks(net_range))
+
     return info
 
 
 def get_cache_info():
     """Return cache stats."""
     with _lock:
-        return {"size": len(_cache), "ttl": WHOIS_CACHE_TTL}
+        return {
+            **_cache.stats(),
+            "queued": len(_queued),
+            "retrying": len(_failures),
+            "netblocks": {"size": len(_netblock_cache), "maxsize": WHOIS_NETBLOCK_MAX,
+                          "evictions": _netblock_cache.stats()["evictions"],
+                          **_netblock_stats},
+        }
 
 
 def clear_cache():
     """Clear the whois cache."""
     with _lock:
         _cache.clear()
+        _netblock_cache.clear()
+        _netblocks.clear()
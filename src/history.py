@@ -0,0 +1,214 @@
+"""Durable time-series history of per-app and system metrics (SQLite).
+
+Every published snapshot is recorded as raw samples: per app name the
+bytes transferred since the previous sample, connection count, CPU and
+memory; and system CPU, memory, disk and load.  Samples are rolled up
+into 1-minute and 1-hour tables as they arrive, each resolution is pruned
+to its own retention, and query() reads from the coarsest table that
+still satisfies the requested step and still holds the requested range.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import HISTORY_DB_PATH, HISTORY_RETENTION
+
+# (table suffix, bucket seconds), finest first; raw rows keep sample times
+RESOLUTIONS = (("raw", 0), ("1m", 60), ("1h", 3600))
+
+# Column aggregates used for rollups and query buckets
+_APP_COLUMNS = {
+    "bytes_in": "SUM", "bytes_out": "SUM",
+    "connections": "AVG", "cpu": "AVG", "mem": "AVG",
+}
+_SYSTEM_COLUMNS = {
+    "cpu": "AVG", "mem": "AVG", "disk": "AVG", "load": "AVG",
+}
+
+_conn = None
+_lock = threading.Lock()
+_last_counters = {}  # app name -> (bytes_in, bytes_out) cumulative
+_last_prune = 0.0
+
+
+def open_store(path=HISTORY_DB_PATH):
+    """Open (or create) the history database.
+
+    Does nothing if path is empty or the store is already open; a database
+    that cannot be opened leaves history disabled rather than failing
+    startup.
+    """
+    global _conn
+    if not path:
+        return
+    with _lock:
+        if _conn is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            for suffix, _ in RESOLUTIONS:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS app_{suffix} (ts INTEGER NOT NULL, "
+                    "app TEXT NOT NULL, bytes_in INTEGER, bytes_out INTEGER, "
+                    "connections REAL, cpu REAL, mem REAL, PRIMARY KEY (app, ts))")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS system_{suffix} (ts INTEGER PRIMARY KEY, "
+                    "cpu REAL, mem REAL, disk REAL, load REAL)")
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS app_{suffix}_ts ON app_{suffix} (ts)")
+            conn.commit()
+        except (sqlite3.Error, OSError):
+            return
+        _conn = conn
+
+
+def record(apps, system_stats, timestamp=None):
+    """Store one sample and update the rollups.
+
+    `apps` is the dashboard app list; apps sharing a name are summed.
+    Traffic is stored as bytes since the previous sample (cumulative
+    counters that went backwards, e.g. after a restart, count from zero).
+    """
+    global _last_prune
+    now = int(timestamp or time.time())
+    totals = {}
+    for app in apps:
+        t = totals.setdefault(app["app"], [0, 0, 0, 0.0, 0.0])
+        t[0] += app["bytes_in"]
+        t[1] += app["bytes_out"]
+        t[2] += app["connection_count"]
+        t[3] += app["cpu"]
+        t[4] += app["mem"]
+
+    with _lock:
+        if _conn is None:
+            return
+        rows = []
+        for name, (bytes_in, bytes_out, conns, cpu, mem) in totals.items():
+            prev_in, prev_out = _last_counters.get(name, (bytes_in, bytes_out))
+            rows.append((now, name, _increase(prev_in, bytes_in),
+                         _increase(prev_out, bytes_out), conns, cpu, mem))
+            _last_counters[name] = (bytes_in, bytes_out)
+        for name in set(_last_counters) - set(totals):
+            del _last_counters[name]
+
+        try:
+            _conn.executemany(
+                "INSERT OR REPLACE INTO app_raw VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            _conn.execute(
+                "INSERT OR REPLACE INTO system_raw VALUES (?, ?, ?, ?, ?)",
+                (now, system_stats.get("cpu_percent"), system_stats.get("mem_percent"),
+                 system_stats.get("disk_percent"), system_stats.get("load_avg_1")))
+            _rollup(now)
+            if now - _last_prune >= 3600:
+                _prune(now)
+                _last_prune = now
+            _conn.commit()
+        except sqlite3.Error:
+            _conn.rollback()
+
+
+def query(app=None, start=None, end=None, step=60):
+    """Return metric points for one app (or the system) between two times.
+
+    Reads from the coarsest resolution whose bucket fits in `step`, or a
+    coarser one if that resolution's retention no longer reaches back to
+    `start`, and re-buckets to `step` seconds.
+
+    Returns:
+        dict with "app", "from", "to", "step", "resolution" and "points"
+        (list of dicts with "ts" and metric values), or None if history
+        is disabled.
+    """
+    end = int(end if end is not None else time.time())
+    start = int(start if start is not None else end - 3600)
+    step = max(1, int(step))
+    suffix = _resolution(start, step)
+    kind, columns = ("app", _APP_COLUMNS) if app else ("system", _SYSTEM_COLUMNS)
+
+    select = ", ".join(f"{agg}({col}) AS {col}" for col, agg in columns.items())
+    sql = (f"SELECT (ts / ?) * ? AS bucket, {select} FROM {kind}_{suffix} "
+           "WHERE ts >= ? AND ts <= ?")
+    params = [step, step, start, end]
+    if app:
+        sql += " AND app = ?"
+        params.append(app)
+    sql += " GROUP BY bucket ORDER BY bucket"
+
+    with _lock:
+        if _conn is None:
+            return None
+        rows = _conn.execute(sql, params).fetchall()
+
+    names = ["ts"] + list(columns)
+    return {
+        "app": app or None,
+        "from": start,
+        "to": end,
+        "step": step,
+        "resolution": suffix,
+        "points": [dict(zip(names, _rounded(row))) for row in rows],
+    }
+
+
+def get_info():
+    """Return row counts per table."""
+    with _lock:
+        if _conn is None:
+            return {"enabled": False}
+        counts = {}
+        for kind in ("app", "system"):
+            for suffix, _ in RESOLUTIONS:
+                table = f"{kind}_{suffix}"
+                counts[table] = _conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {"enabled": True, "rows": counts, "retention": dict(HISTORY_RETENTION)}
+
+
+def _resolution(start, step):
+    """Pick the table for a query starting at `start` with `step` buckets.
+
+    The finest table still holding `start` sets a lower bound, the
+    coarsest table whose bucket fits in `step` an upper one; the coarser
+    of the two wins.  Ranges older than every retention use the coarsest.
+    """
+    oldest_needed = time.time() - start
+    covering = next((i for i, (name, _) in enumerate(RESOLUTIONS)
+                     if HISTORY_RETENTION[name] >= oldest_needed), len(RESOLUTIONS) - 1)
+    fitting = [i for i, (_, seconds) in enumerate(RESOLUTIONS) if seconds <= step][-1]
+    return RESOLUTIONS[max(covering, fitting)][0]
+
+
+def _increase(previous, current):
+    return current - previous if current >= previous else current
+
+
+def _rounded(row):
+    return [round(v, 2) if isinstance(v, float) else v for v in row]
+
+
+def _rollup(now):
+    """Recompute the buckets `now` falls in, and the ones just before them.
+
+    Each finer table feeds the next coarser one; re-aggregating the
+    previous bucket as well covers samples that straddle a boundary.
+    """
+    for (source, _), (target, seconds) in zip(RESOLUTIONS, RESOLUTIONS[1:]):
+        since = (now // seconds - 1) * seconds
+        for kind, columns in (("app", _APP_COLUMNS), ("system", _SYSTEM_COLUMNS)):
+            key = ", app" if kind == "app" else ""
+            select = ", ".join(f"{agg}({col})" for col, agg in columns.items())
+            _conn.execute(
+                f"INSERT OR REPLACE INTO {kind}_{target} (ts{key}, {', '.join(columns)}) "
+                f"SELECT (ts / {seconds}) * {seconds} AS bucket{key}, {select} "
+                f"FROM {kind}_{source} WHERE ts >= ? GROUP BY bucket{key}",
+                (since,))
+
+
+def _prune(now):
+    for suffix, _ in RESOLUTIONS:
+        cutoff = now - HISTORY_RETENTION[suffix]
+        for kind in ("app", "system"):
+            _conn.execute(f"DELETE FROM {kind}_{suffix} WHERE ts < ?", (cutoff,))
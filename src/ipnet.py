@@ -0,0 +1,167 @@
+"""IP network helpers shared by enrichment and analysis."""
+
+import functools
+import ipaddress
+
+from src.config import TRUSTED_NETWORKS
+
+_ADDRESS_TYPES = (ipaddress.IPv4Address, ipaddress.IPv6Address)
+
+# Non-public address space, by class.  Longest prefix wins, so configured
+# trusted networks may carve exceptions out of public space.
+SPECIAL_NETWORKS = {
+    "unspecified": ["0.0.0.0/32", "::/128"],
+    "loopback": ["127.0.0.0/8", "::1/128"],
+    "private": ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"],   # RFC 1918
+    "cgnat": ["100.64.0.0/10"],                                     # RFC 6598
+    "link_local": ["169.254.0.0/16", "fe80::/10"],
+    "ula": ["fc00::/7"],                                            # RFC 4193
+    "multicast": ["224.0.0.0/4", "ff00::/8"],
+}
+
+
+class PrefixTable:
+    """Longest-prefix-match table over IPv4 and IPv6 networks.
+
+    Networks are stored in one hash table per (IP version, prefix length),
+    keyed by the network's leading bits.  A lookup probes each prefix
+    length in use, longest first, so it costs at most a few dict lookups
+    regardless of how many networks are stored.
+
+    Not thread-safe; callers guard it with their own lock.
+    """
+
+    def __init__(self):
+        self._tables = {4: {}, 6: {}}
+        self._lengths = {4: [], 6: []}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, network, value):
+        """Associate `value` with a network (str or ip_network)."""
+        net = ipaddress.ip_network(network, strict=False)
+        bits = net.max_prefixlen
+        table = self._tables[net.version].get(net.prefixlen)
+        if table is None:
+            table = self._tables[net.version][net.prefixlen] = {}
+            self._lengths[net.version] = sorted(
+                self._tables[net.version], reverse=True)
+        key = int(net.network_address) >> (bits - net.prefixlen)
+        if key not in table:
+            self._size += 1
+        table[key] = value
+
+    def lookup(self, ip):
+        """Return the value of the most specific network containing ip.
+
+        Returns None if no stored network contains it or ip is not a
+        valid address.
+        """
+        match = self.lookup_network(ip)
+        return match[1] if match else None
+
+    def lookup_network(self, ip):
+        """Return (network, value) for the most specific match, or None.
+
+        `ip` may be a string or an already parsed address.
+        """
+        addr = ip if isinstance(ip, _ADDRESS_TYPES) else parse_ip(ip)
+        if addr is None:
+            return None
+        bits = addr.max_prefixlen
+        num = int(addr)
+        tables = self._tables[addr.version]
+        for plen in self._lengths[addr.version]:
+            key = num >> (bits - plen)
+            value = tables[plen].get(key)
+            if value is not None:
+                network = ipaddress.ip_network((key << (bits - plen), plen))
+                return network, value
+        return None
+
+    def matches(self, ip):
+        """Yield (network, value) for every stored network containing ip,
+        most specific first."""
+        addr = ip if isinstance(ip, _ADDRESS_TYPES) else parse_ip(ip)
+        if addr is None:
+            return
+        bits = addr.max_prefixlen
+        num = int(addr)
+        tables = self._tables[addr.version]
+        for plen in self._lengths[addr.version]:
+            key = num >> (bits - plen)
+            value = tables[plen].get(key)
+            if value is not None:
+                yield ipaddress.ip_network((key << (bits - plen), plen)), value
+
+    def clear(self):
+        for version in (4, 6):
+            self._tables[version].clear()
+            self._lengths[version] = []
+        self._size = 0
+
+
+def parse_networks(text):
+    """Parse whois-style network notations into ip_network objects.
+
+    Accepts comma- or whitespace-separated CIDRs ("1.2.0.0/16, 1.3.0.0/16")
+    and address ranges ("1.2.3.0 - 1.2.3.255").  Invalid input yields [].
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    try:
+        if " - " in text:
+            first, last = (part.strip() for part in text.split(" - ", 1))
+            return list(ipaddress.summarize_address_range(
+                ipaddress.ip_address(first), ipaddress.ip_address(last)))
+        return [ipaddress.ip_network(part, strict=False)
+                for part in text.replace(",", " ").split()]
+    except (ValueError, TypeError):
+        return []
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_ip(text):
+    """Parse an address string (memoized). Returns None if it is not an IP."""
+    try:
+        return ipaddress.ip_address(text)
+    except ValueError:
+        return None
+
+
+def _build_classifier():
+    table = PrefixTable()
+    for kind, networks in SPECIAL_NETWORKS.items():
+        for network in networks:
+            table.insert(network, kind)
+    for network in TRUSTED_NETWORKS:
+        table.insert(network, "trusted")
+    return table
+
+
+_classifier = _build_classifier()
+
+
+@functools.lru_cache(maxsize=65536)
+def classify(addr):
+    """Return the address class of addr: "public" or a SPECIAL_NETWORKS key.
+
+    Configured TRUSTED_NETWORKS classify as "trusted".  Wildcards ("*"),
+    empty values and anything that is not an IP address (e.g. "localhost")
+    classify as "local".  IPv4-mapped IPv6 addresses are classified by
+    their IPv4 part.
+    """
+    ip = parse_ip(addr) if addr else None
+    if ip is None:
+        return "local"
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return _classifier.lookup(ip) or "public"
+
+
+def is_private(addr):
+    """Check whether addr is anything other than a public address."""
+    return classify(addr) != "public"
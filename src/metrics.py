@@ -0,0 +1,195 @@
+"""Prometheus metrics about MacWatch itself and the host it watches.
+
+Hand-rolled rather than using a client library: Counter and Histogram
+keep one sample set per label combination, and render() writes the
+Prometheus text exposition format (0.0.4) served at /metrics.  Numbers
+that already live elsewhere (cache statistics, the latest system stats,
+per-app traffic) are read at scrape time from callbacks registered with
+add_collector(), so nothing is copied on the hot path.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cached lookup to a whois that hits its timeout
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+_registry = []
+_collectors = []
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value)
+                    for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = [(key, list(entry)) for key, entry in self._values.items()]
+        for key, entry in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, entry):
+                out.append((self.name + "_bucket", {**labels, "le": _format(bound)}, count))
+            out.append((self.name + "_bucket", {**labels, "le": "+Inf"}, entry[-1]))
+            out.append((self.name + "_sum", labels, entry[-2]))
+            out.append((self.name + "_count", labels, entry[-1]))
+        return out
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+# --- MacWatch's own metrics -------------------------------------------------
+
+STAGE_SECONDS = Histogram(
+    "macwatch_refresh_stage_duration_seconds",
+    "Time spent per refresh stage (collectors, dns, whois, codesign, scoring, "
+    "build, serialize)",
+    ["stage"])
+SUBPROCESS_RUNS = Counter(
+    "macwatch_subprocess_runs_total",
+    "External commands run, by tool and outcome (ok, exit_status, timeout, "
+    "missing, stream)",
+    ["tool", "outcome"])
+SUBPROCESS_SECONDS = Histogram(
+    "macwatch_subprocess_duration_seconds",
+    "Wall time of external commands, by tool",
+    ["tool"])
+PAYLOAD_BYTES = Histogram(
+    "macwatch_payload_size_bytes",
+    "Size of encoded /api/connections bodies, by kind (full or delta)",
+    ["kind"], buckets=SIZE_BUCKETS)
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of the enclosed block as a refresh stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_command(tool, seconds, outcome):
+    """Count one external command run and, unless it never started, time it."""
+    SUBPROCESS_RUNS.inc(tool=tool, outcome=outcome)
+    if outcome != "missing":
+        SUBPROCESS_SECONDS.observe(seconds, tool=tool)
+
+
+def add_collector(fn):
+    """Register a scrape-time callback.
+
+    `fn()` returns a list of (name, kind, help, samples) families, where
+    kind is "gauge" or "counter" and samples is a list of (labels dict,
+    value) pairs.  A callback that raises is skipped for that scrape.
+    """
+    _collectors.append(fn)
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(_sample_line(name, labels, value) for name, labels, value in samples)
+
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception:
+            continue
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {_escape_help(help_text)}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_sample_line(name, labels, value) for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def _sample_line(name, labels, value):
+    if labels:
+        pairs = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+        return f"{name}{{{pairs}}} {_format(value)}"
+    return f"{name} {_format(value)}"
+
+
+def _format(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
@@ -0,0 +1,209 @@
+"""Filtering, sorting, pagination and field projection over a snapshot.
+
+Backs /api/query/<collection>, so clients can ask for just the rows and
+columns they display instead of the whole dashboard payload.  Supported
+query parameters:
+
+    filters   per collection (see COLLECTIONS), e.g. app=chrome&state=LISTEN;
+              q is a free-text search, threat takes comma-separated colors
+    sort      field name, "-field" for descending
+    limit     maximum rows returned; offset skips rows first
+    fields    comma-separated projection; "connections.remote_addr" projects
+              the nested connections of apps
+"""
+
+# Connection filters, shared by the connections collection and by apps
+# (which are narrowed to their matching connections).
+_CONNECTION_FILTERS = {
+    "state": lambda c, v: (c.get("state") or "").upper() == v.upper(),
+    "org": lambda c, v: v.lower() in (c.get("whois_org") or "").lower(),
+    "country": lambda c, v: (c.get("whois_country") or "").upper() == v.upper(),
+    "severity": lambda c, v: any(f["severity"] == v for f in c.get("flags", [])),
+    "localhost": lambda c, v: _is_loopback(c) == (v == "1"),
+}
+
+
+def _is_loopback(conn):
+    addr = conn.get("remote_addr") or conn.get("local_addr") or ""
+    return addr.startswith("127.") or addr in ("::1", "localhost")
+
+
+def _match_app(row, value):
+    value = value.lower()
+    return (value in (row.get("app") or row.get("name") or "").lower()
+            or value in (row.get("display_name") or "").lower())
+
+
+def _match_pid(row, value):
+    return str(row.get("pid")) == value
+
+
+def _search_app(app, value):
+    """Free-text match on an app's names and its connections' endpoints."""
+    value = value.lower()
+    return _match_app(app, value) or any(
+        value in " ".join((c.get("remote_host") or "", c.get("remote_addr") or "",
+                           c.get("whois_org") or "", str(c.get("remote_port")))).lower()
+        for c in app["connections"])
+
+
+def _search_process(proc, value):
+    value = value.lower()
+    return (_match_app(proc, value) or value in (proc.get("command") or "").lower()
+            or value in str(proc.get("pid")))
+
+
+def _connection_rows(data):
+    return [
+        {"app": app["app"], "display_name": app["display_name"], "pid": app["pid"], **conn}
+        for app in data["apps"]
+        for conn in app["connections"]
+    ]
+
+
+# collection -> (rows from payload, filters, default sort)
+COLLECTIONS = {
+    "apps": (
+        lambda data: data["apps"],
+        {
+            "app": _match_app,
+            "pid": _match_pid,
+            "q": _search_app,
+            "threat": lambda a, v: a["threat_color"] in v.split(","),
+        },
+        "-threat_score",
+    ),
+    "connections": (
+        _connection_rows,
+        {"app": _match_app, "pid": _match_pid, **_CONNECTION_FILTERS},
+        None,
+    ),
+    "processes": (
+        lambda data: data["top_processes"],
+        {
+            "app": lambda p, v: (_match_app(p, v)
+                                 or v.lower() in (p.get("command") or "").lower()),
+            "pid": _match_pid,
+            "q": _search_process,
+        },
+        "-cpu",
+    ),
+    "alerts": (
+        lambda data: data["alerts"],
+        {
+            "app": _match_app,
+            "pid": _match_pid,
+            "severity": lambda a, v: a["severity"] == v,
+            "category": lambda a, v: a.get("category") == v,
+            "type": lambda a, v: a["type"] == v,
+        },
+        None,
+    ),
+}
+
+
+def run(data, collection, args):
+    """Query one collection of a dashboard payload.
+
+    Args:
+        data: the full payload (apps, alerts, top_processes, ...).
+        collection: a key of COLLECTIONS.
+        args: mapping of query parameters.
+
+    Returns:
+        dict with "total" (rows matching the filters), "offset", "limit"
+        and "items".  Raises ValueError for invalid parameters.
+    """
+    rows_fn, filters, default_sort = COLLECTIONS[collection]
+    rows = rows_fn(data)
+
+    active = [(filters[name], value) for name, value in args.items()
+              if name in filters and value != ""]
+    if active:
+        rows = [row for row in rows if all(match(row, value) for match, value in active)]
+
+    if collection == "apps":
+        conn_filters = [(_CONNECTION_FILTERS[name], value) for name, value in args.items()
+                        if name in _CONNECTION_FILTERS and value != ""]
+        if conn_filters:
+            rows = _narrow_connections(rows, conn_filters, args.get("severity"))
+
+    sort = args.get("sort") or default_sort
+    if sort:
+        rows = _sorted(rows, sort)
+
+    total = len(rows)
+    offset = _non_negative(args.get("offset"), "offset") or 0
+    limit = _non_negative(args.get("limit"), "limit")
+    rows = rows[offset:offset + limit if limit is not None else None]
+
+    fields = args.get("fields")
+    if fields:
+        rows = _project(rows, [f.strip() for f in fields.split(",") if f.strip()])
+    return {"total": total, "offset": offset, "limit": limit, "items": rows}
+
+
+def _narrow_connections(apps, conn_filters, severity=None):
+    """Keep apps with matching connections, listing only those connections.
+
+    An app with an app-level flag of `severity` (e.g. unsigned) is kept
+    even when none of its connections match.
+    """
+    narrowed = []
+    for app in apps:
+        conns = [c for c in app["connections"]
+                 if all(match(c, value) for match, value in conn_filters)]
+        if conns or (severity and any(
+                f["severity"] == severity and not f.get("connection")
+                for f in app.get("threat_flags", []))):
+            narrowed.append({**app, "connections": conns, "connection_count": len(conns)})
+    return narrowed
+
+
+def _sorted(rows, sort):
+    """Sort by one field; missing values last, strings case-insensitively."""
+    field = sort.lstrip("-")
+    present = [row for row in rows if row.get(field) is not None]
+    missing = [row for row in rows if row.get(field) is None]
+
+    def key(row):
+        value = row[field]
+        return value.lower() if isinstance(value, str) else value
+
+    try:
+        present.sort(key=key, reverse=sort.startswith("-"))
+    except TypeError:
+        raise ValueError(f"Cannot sort by {field}")
+    return present + missing
+
+
+def _non_negative(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+    return number
+
+
+def _project(rows, fields):
+    """Keep only the requested fields; "parent.child" projects nested lists."""
+    top = [f for f in fields if "." not in f]
+    nested = {}
+    for f in fields:
+        if "." in f:
+            parent, child = f.split(".", 1)
+            nested.setdefault(parent, []).append(child)
+
+    projected = []
+    for row in rows:
+        item = {f: row[f] for f in top if f in row}
+        for parent, children in nested.items():
+            if isinstance(row.get(parent), list):
+                item[parent] = [{c: sub[c] for c in children if c in sub}
+                                for sub in row[parent]]
+        projected.append(item)
+    return projected
@@ -0,0 +1,416 @@
+"""Single entry point for the external commands MacWatch runs.
+
+Collectors and enrichment call run() and popen() instead of using
+subprocess directly, and reverse DNS goes through call().  Besides normal
+operation that allows two session modes, chosen by start():
+
+record  (MACWATCH_RECORD=<file>) every invocation's command line, output,
+        exit status, start offset and duration is appended to a
+        gzip-compressed JSON-lines archive.
+replay  (MACWATCH_REPLAY=<file>) nothing is executed.  Each invocation is
+        answered from the archive, in recorded order per command line,
+        after its recorded duration divided by MACWATCH_REPLAY_SPEED
+        (0 answers at once); streaming children replay their output at
+        the recorded pace.  Once a command's recordings run out, the last
+        one keeps being served.
+
+A session recorded on a Mac can thus be replayed on Linux through the
+same parsers and the Flask app.  `python -m src.runner <archive>` prints
+a per-command summary of a recording.
+"""
+
+import atexit
+import gzip
+import json
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+from src import metrics
+from src.config import RECORD_PATH, REPLAY_PATH, REPLAY_SPEED
+
+FORMAT_VERSION = 1
+
+# Streaming output is stored in chunks; a pause longer than this between
+# two lines starts a new chunk (so a chunk is usually one frame)
+_CHUNK_GAP = 0.05
+
+_lock = threading.RLock()
+_recorder = None
+_replay = None
+
+
+def start(record=RECORD_PATH, replay=REPLAY_PATH, speed=REPLAY_SPEED):
+    """Enter record or replay mode (replay wins if both are set).
+
+    Does nothing when neither path is given or a mode is already active.
+    """
+    global _recorder, _replay
+    with _lock:
+        if _recorder is not None or _replay is not None:
+            return
+        if replay:
+            _replay = _Replay(replay, speed)
+        elif record:
+            _recorder = _Recorder(record)
+            atexit.register(_recorder.close)
+
+
+def mode():
+    """Return "record", "replay" or None.
+
+    Reports the configured mode even before start() so that startup
+    decisions (e.g. the collector backend) can depend on it.
+    """
+    if _replay is not None or _recorder is not None:
+        return "replay" if _replay is not None else "record"
+    if REPLAY_PATH:
+        return "replay"
+    return "record" if RECORD_PATH else None
+
+
+def run(argv, timeout=None):
+    """Run a command and capture its text output, like subprocess.run.
+
+    Raises subprocess.TimeoutExpired and FileNotFoundError as
+    subprocess.run does — in replay too, when the recorded run did.
+    """
+    started = time.time()
+    outcome = "missing"
+    try:
+        if _replay is not None:
+            result = _replay.run(argv, timeout)
+        else:
+            result = _execute(argv, timeout, started)
+        outcome = "ok" if result.returncode == 0 else "exit_status"
+        return result
+    except subprocess.TimeoutExpired:
+        outcome = "timeout"
+        raise
+    finally:
+        metrics.record_command(argv[0], time.time() - started, outcome)
+
+
+def _execute(argv, timeout, started):
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if _recorder is not None:
+            _recorder.write_run(argv, started, error="timeout")
+        raise
+    except FileNotFoundError:
+        if _recorder is not None:
+            _recorder.write_run(argv, started, error="missing")
+        raise
+    if _recorder is not None:
+        _recorder.write_run(argv, started, result=result)
+    return result
+
+
+def popen(argv):
+    """Start a long-running command whose stdout is read line by line.
+
+    Returns an object with the subprocess.Popen methods the streaming
+    collectors use: iterable `stdout`, poll(), kill() and wait().
+    """
+    try:
+        if _replay is not None:
+            proc = _replay.popen(argv)
+        else:
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, errors="replace", bufsize=1)
+    except OSError:
+        metrics.record_command(argv[0], 0.0, "missing")
+        raise
+    metrics.record_command(argv[0], 0.0, "stream")
+    if _replay is not None:
+        return proc
+    if _recorder is not None:
+        return _RecordingProcess(proc, argv, _recorder)
+    return proc
+
+
+def call(kind, key, fn):
+    """Return fn(key), recorded and replayed like a command.
+
+    For in-process lookups whose answers depend on the host, e.g. reverse
+    DNS.  Replay answers None for keys that were never recorded.
+    """
+    if _replay is not None:
+        return _replay.call(kind, key)
+
+    started = time.time()
+    value = fn(key)
+    if _recorder is not None:
+        _recorder.write({"kind": kind, "key": key, "t": _recorder.offset(started),
+                         "duration": round(time.time() - started, 6), "value": value})
+    return value
+
+
+def get_info():
+    """Return the active mode and archive statistics."""
+    if _recorder is not None:
+        return {"mode": "record", **_recorder.stats()}
+    if _replay is not None:
+        return {"mode": "replay", **_replay.stats()}
+    return {"mode": None}
+
+
+class _Recorder:
+    """Append-only gzip JSON-lines archive shared by all threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._started = time.time()
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._last_flush = self._started
+        self._records = 0
+        self._streams = 0
+        self.write({"kind": "session", "version": FORMAT_VERSION,
+                    "started": self._started, "platform": sys.platform})
+
+    def offset(self, timestamp):
+        return round(timestamp - self._started, 6)
+
+    def next_stream(self):
+        with _lock:
+            self._streams += 1
+            return self._streams
+
+    def write_run(self, argv, started, result=None, error=None):
+        record = {"kind": "run", "argv": list(argv), "t": self.offset(started),
+                  "duration": round(time.time() - started, 6)}
+        if error:
+            record["error"] = error
+        else:
+            record.update(returncode=result.returncode, stdout=result.stdout,
+                          stderr=result.stderr)
+        self.write(record)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with _lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._records += 1
+            # Flush about once a second so a killed session keeps its data
+            now = time.time()
+            if now - self._last_flush >= 1:
+                self._file.flush()
+                self._last_flush = now
+
+    def close(self):
+        with _lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        return {"path": self.path, "records": self._records, "streams": self._streams}
+
+
+class _RecordingProcess:
+    """Wraps a streaming child and records its output in timed chunks."""
+
+    def __init__(self, proc, argv, recorder):
+        self._proc = proc
+        self._argv = list(argv)
+        self._recorder = recorder
+        self._stream = recorder.next_stream()
+        self.stdout = self._lines()
+
+    def _lines(self):
+        chunk, chunk_start, last = [], 0.0, 0.0
+        for line in self._proc.stdout:
+            now = time.time()
+            if chunk and now - last > _CHUNK_GAP:
+                self._write(chunk_start, chunk)
+                chunk = []
+            if not chunk:
+                chunk_start = now
+            chunk.append(line)
+            last = now
+            yield line
+        if chunk:
+            self._write(chunk_start, chunk)
+
+    def _write(self, started, lines):
+        self._recorder.write({"kind": "stream", "argv": self._argv, "stream": self._stream,
+                              "t": self._recorder.offset(started), "lines": lines})
+
+    def poll(self):
+        return self._proc.poll()
+
+    def kill(self):
+        self._proc.kill()
+
+    def wait(self):
+        return self._proc.wait()
+
+
+class _Replay:
+    """Recorded answers, consumed in order per command line."""
+
+    def __init__(self, path, speed):
+        self.path = path
+        self.speed = speed
+        self._runs = defaultdict(deque)     # argv tuple -> run records
+        self._streams = defaultdict(deque)  # argv tuple -> [chunk records] per child
+        self._calls = defaultdict(deque)    # (kind, key) -> call records
+        self._served = 0
+        self._missing = 0
+
+        streams = {}
+        session = 0
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # truncated tail of an interrupted recording
+                kind = record.get("kind")
+                if kind == "session":
+                    session += 1
+                elif kind == "run":
+                    self._runs[tuple(record["argv"])].append(record)
+                elif kind == "stream":
+                    key = (session, record["stream"])
+                    if key not in streams:
+                        streams[key] = []
+                        self._streams[tuple(record["argv"])].append(streams[key])
+                    streams[key].append(record)
+                else:
+                    self._calls[(kind, record["key"])].append(record)
+
+    def _next(self, queue):
+        """Pop the next recording, keeping the last one for later calls."""
+        with _lock:
+            if not queue:
+                self._missing += 1
+                return None
+            self._served += 1
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def _delay(self, seconds):
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def run(self, argv, timeout):
+        record = self._next(self._runs.get(tuple(argv), ()))
+        if record is None:
+            raise FileNotFoundError(argv[0])  # never recorded: like a missing tool
+        duration = record["duration"]
+        self._delay(min(duration, timeout) if timeout else duration)
+        error = record.get("error")
+        if error == "timeout":
+            raise subprocess.TimeoutExpired(argv, timeout)
+        if error == "missing":
+            raise FileNotFoundError(argv[0])
+        return subprocess.CompletedProcess(argv, record["returncode"],
+                                           record["stdout"], record["stderr"])
+
+    def popen(self, argv):
+        chunks = self._next(self._streams.get(tuple(argv), ()))
+        if chunks is None:
+            raise FileNotFoundError(argv[0])
+        return _ReplayProcess(chunks, self.speed)
+
+    def call(self, kind, key):
+        record = self._next(self._calls.get((kind, key), ()))
+        if record is None:
+            return None
+        self._delay(record["duration"])
+        return record["value"]
+
+    def stats(self):
+        with _lock:
+            return {
+                "path": self.path,
+                "speed": self.speed,
+                "commands": len(self._runs),
+                "streams": len(self._streams),
+                "served": self._served,
+                "unrecorded": self._missing,
+            }
+
+
+class _ReplayProcess:
+    """A streaming child that prints recorded chunks at the recorded pace."""
+
+    def __init__(self, chunks, speed):
+        self._chunks = chunks
+        self._speed = speed
+        self._killed = threading.Event()
+        self._done = False
+        self.stdout = self._lines()
+
+    def _lines(self):
+        started = time.time()
+        first = self._chunks[0]["t"]
+        for chunk in self._chunks:
+            if self._speed > 0:
+                due = started + (chunk["t"] - first) / self._speed
+                if self._killed.wait(max(0.0, due - time.time())):
+                    break
+            elif self._killed.is_set():
+                break
+            yield from chunk["lines"]
+        self._done = True
+
+    def poll(self):
+        return 0 if self._done or self._killed.is_set() else None
+
+    def kill(self):
+        self._killed.set()
+
+    def wait(self):
+        return 0
+
+
+def summarize(path):
+    """Return per-command statistics of a recorded archive.
+
+    Returns:
+        dict of command name -> {"runs", "failures", "total_s", "max_s",
+        "bytes"}; streaming children are listed as "<name> (stream)" with
+        their chunk count as runs.
+    """
+    summary = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            kind = record.get("kind")
+            if kind == "session":
+                continue
+            if kind == "run":
+                name = record["argv"][0]
+            elif kind == "stream":
+                name = f"{record['argv'][0]} (stream)"
+            else:
+                name = kind
+            entry = summary.setdefault(name, {"runs": 0, "failures": 0, "total_s": 0.0,
+                                              "max_s": 0.0, "bytes": 0})
+            entry["runs"] += 1
+            duration = record.get("duration", 0.0)
+            entry["total_s"] = round(entry["total_s"] + duration, 6)
+            entry["max_s"] = max(entry["max_s"], duration)
+            if record.get("error") or record.get("returncode", 0) != 0:
+                entry["failures"] += 1
+            entry["bytes"] += len(record.get("stdout", "")) + sum(
+                len(l) for l in record.get("lines", ()))
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m src.runner <archive>")
+    print(f"{'command':<24} {'runs':>6} {'fail':>5} {'total s':>9} {'max s':>7} {'bytes':>11}")
+    for name, s in sorted(summarize(sys.argv[1]).items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"{name:<24} {s['runs']:>6} {s['failures']:>5} {s['total_s']:>9.2f} "
+              f"{s['max_s']:>7.2f} {s['bytes']:>11}")
@@ -0,0 +1,263 @@
+"""Background sampler that owns data collection and publishes snapshots.
+
+Each collector ("source") runs on its own cadence.  A background thread
+wakes up whenever sources are due and runs them concurrently on a bounded
+worker pool, so one refresh costs as much as its slowest collector rather
+than the sum of all of them.  Whenever any source produces new data, the
+sampler rebuilds the dashboard payload and publishes it as an immutable,
+versioned Snapshot.
+Request handlers only ever read the latest snapshot, so their latency does
+not depend on how many clients are polling.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import COLLECTOR_WORKERS, SAMPLER_IDLE_TIMEOUT, SNAPSHOT_HISTORY
+
+# A published snapshot.  `data` is never mutated after publication —
+# consumers that need a modified view must copy it.  `timings` maps each
+# source that ran for this snapshot to its duration in seconds, `raw`
+# holds the collector results the payload was built from, and `digest` is a
+# hash of `data` (equal digests mean identical payloads).
+Snapshot = namedtuple("Snapshot",
+                      ["version", "timestamp", "data", "timings", "raw", "digest"])
+
+
+class Sampler:
+    """Run collectors on independent cadences and publish snapshots.
+
+    Args:
+        sources: dict of name -> (collect_fn, cadence_seconds).  Each
+            collect_fn takes no arguments and returns that source's raw
+            data, or None (or raises) if it could not collect; the
+            previous result is then kept.
+        build: callable taking a dict of name -> latest raw data and
+            returning the payload to publish.
+        on_publish: optional callable run on the sampler thread with each
+            newly published Snapshot (e.g. to record history).
+    """
+
+    def __init__(self, sources, build, on_publish=None):
+        self._sources = dict(sources)
+        self._build = build
+        self._on_publish = on_publish
+        self._raw = {}
+        self._next_due = {name: 0.0 for name in self._sources}
+        self._stats = {
+            name: {"cadence": cadence, "runs": 0, "failures": 0,
+                   "last_run": None, "last_duration": None}
+            for name, (_, cadence) in self._sources.items()
+        }
+        self._timings = {}
+        self._pool = ThreadPoolExecutor(max_workers=COLLECTOR_WORKERS,
+                                        thread_name_prefix="macwatch-collect")
+        self._snapshot = None
+        self._history = deque(maxlen=SNAPSHOT_HISTORY)
+        self._version = 0
+        # Versions restart at 1 with each process, so tags handed to clients
+        # carry this epoch to tell them apart from a previous run's.
+        self.epoch = os.urandom(4).hex()
+        self._last_read = time.time()
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the sampler thread (idempotent)."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="macwatch-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the sampler thread."""
+        self._stop.set()
+        self._wake.set()
+
+    def latest(self, max_age=None, timeout=None):
+        """Return the latest Snapshot, or None if none arrived in time.
+
+        If max_age is given and the current snapshot is older than that
+        (e.g. the sampler was idle), wait up to `timeout` seconds for a
+        fresher one before falling back to what is available.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            self._last_read = time.time()
+            self._wake.set()
+            while not self._is_fresh(max_age):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._snapshot
+
+    def peek(self):
+        """Return the latest Snapshot (or None) without waiting.
+
+        Unlike latest(), this does not count as a read, so it never keeps
+        an idle sampler collecting.
+        """
+        with self._cond:
+            return self._snapshot
+
+    def refresh(self, timeout=None):
+        """Run every source now and return the resulting Snapshot.
+
+        Returns the latest snapshot available if the refresh does not
+        complete within `timeout` seconds.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            version = self._version
+            self._last_read = time.time()
+            for name in self._next_due:
+                self._next_due[name] = 0.0
+            self._wake.set()
+            while self._version == version:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._snapshot
+
+    def wait_newer(self, version, timeout=None):
+        """Wait for a snapshot newer than `version` and return it.
+
+        Returns None if none is published within `timeout` seconds.  Each
+        call counts as a read, so a waiting subscriber keeps the sampler
+        from going idle.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            self._last_read = time.time()
+            self._wake.set()
+            while self._snapshot is None or self._snapshot.version <= version:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._snapshot
+
+    def get(self, version):
+        """Return the Snapshot with this version if it is still retained."""
+        with self._cond:
+            for snapshot in reversed(self._history):
+                if snapshot.version == version:
+                    return snapshot
+            return None
+
+    def tag(self, version):
+        """Return the client-facing tag for a version of this sampler."""
+        return f"{self.epoch}-{version}"
+
+    def version_of(self, tag):
+        """Return the version a tag names, or None if it is malformed or
+        was issued by another process (e.g. before a restart)."""
+        epoch, _, version = (tag or "").partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def get_stats(self):
+        """Return per-source run counts and the duration of the last run."""
+        with self._cond:
+            return {
+                "version": self._version,
+                "epoch": self.epoch,
+                "sources": {name: dict(st) for name, st in self._stats.items()},
+            }
+
+    def _is_fresh(self, max_age):
+        if self._snapshot is None:
+            return False
+        if max_age is None:
+            return True
+        return time.time() - self._snapshot.timestamp <= max_age
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.time() - self._last_read > SAMPLER_IDLE_TIMEOUT:
+                # Nobody is looking — stop forking until the next read.
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            if self._collect_due():
+                self._publish()
+
+            with self._cond:
+                next_due = min(self._next_due.values())
+            delay = max(0.0, next_due - time.time())
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _collect_due(self):
+        """Run every due source concurrently. Returns True if any succeeded."""
+        now = time.time()
+        with self._cond:
+            # refresh() resets _next_due from request threads
+            due = [name for name in self._sources if now >= self._next_due[name]]
+            for name in due:
+                self._next_due[name] = now + self._sources[name][1]
+
+        futures = [self._pool.submit(self._run_source, name) for name in due]
+        ran = False
+        for future in futures:
+            name, ok, result, elapsed = future.result()
+            with self._cond:
+                st = self._stats[name]
+                st["runs"] += 1
+                st["last_run"] = now
+                st["last_duration"] = round(elapsed, 3)
+                if not ok:
+                    st["failures"] += 1
+            self._timings[name] = round(elapsed, 3)
+            if ok:
+                # Keep the previous result on failure; a broken collector
+                # must not blank out its part of the dashboard.
+                self._raw[name] = result
+                ran = True
+        return ran
+
+    def _run_source(self, name):
+        """Run one collector in a worker thread, timing it."""
+        collect_fn = self._sources[name][0]
+        start = time.perf_counter()
+        try:
+            result = collect_fn()
+            ok = result is not None
+        except Exception:
+            result, ok = None, False
+        return name, ok, result, time.perf_counter() - start
+
+    def _publish(self):
+        raw = dict(self._raw)
+        try:
+            data = self._build(raw)
+        except Exception:
+            return
+        digest = hashlib.sha1(
+            json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+        timings, self._timings = self._timings, {}
+        with self._cond:
+            self._version += 1
+            self._snapshot = Snapshot(self._version, time.time(), data, timings, raw,
+                                      digest)
+            self._history.append(self._snapshot)
+            snapshot = self._snapshot
+            self._cond.notify_all()
+        if self._on_publish is not None:
+            try:
+                self._on_publish(snapshot)
+            except Exception:
+                pass
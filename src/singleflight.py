@@ -0,0 +1,73 @@
+"""Coalesce concurrent calls for the same work into a single execution."""
+
+import threading
+import time
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result.
+
+    Callers that arrive while a call for their key is in flight wait for it
+    and receive the same result (or exception).  Callers that arrive within
+    `fresh_for` seconds after it finished reuse that result instead of
+    starting a new call.
+    """
+
+    def __init__(self, fresh_for=0.0):
+        self._fresh_for = fresh_for
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return fn()'s result, shared with concurrent callers for `key`."""
+        with self._lock:
+            self._prune()
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            return call.get()
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        call.finished_at = time.time()
+        call.done.set()
+
+        if call.error is not None or not self._fresh_for:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+        return call.get()
+
+    def _prune(self):
+        """Drop finished calls whose freshness window has passed."""
+        now = time.time()
+        stale = [
+            key for key, call in self._calls.items()
+            if call.done.is_set() and now - call.finished_at > self._fresh_for
+        ]
+        for key in stale:
+            del self._calls[key]
+
+
+class _Call:
+    """One in-flight or recently finished call."""
+
+    __slots__ = ("done", "result", "error", "finished_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
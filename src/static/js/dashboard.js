@@ -19,11 +19,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
 async function refresh() {
     try {
-        const [connResp, sysResp] = await Promise.all([
-            fetch('/api/connections'),
+        const [connData, sysResp] = await Promise.all([
+            fetchConnections(),
             fetch('/api/system')
         ]);
-        currentData = await connResp.json();
+        currentData = connData;
         const sysData = await sysResp.json();
         renderOverview(currentData, sysData);
         updateRefreshTime();
@@ -32,6 +32,12 @@ async function refresh() {
     }
 }
 
+// Pushed by /api/stream (see startAutoRefresh in shared.js)
+function onSnapshot(data) {
+    currentData = data;
+    renderOverview(currentData, data.system_stats);
+}
+
 // --- Rendering ---
 
 function renderOverview(data, sys) {
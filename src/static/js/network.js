@@ -2,6 +2,7 @@
 
 let expandedApps = new Set();
 let initialRenderDone = false;
+let shownApps = [];  // apps currently rendered (the snapshot's, or a query result)
 
 // --- Initialization ---
 
@@ -29,8 +30,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
 async function refresh() {
     try {
-        const resp = await fetch('/api/connections');
-        currentData = await resp.json();
+        currentData = await fetchConnections();
         renderNetwork(currentData);
         updateRefreshTime();
     } catch (err) {
@@ -38,12 +38,18 @@ async function refresh() {
     }
 }
 
+// Pushed by /api/stream (see startAutoRefresh in shared.js)
+function onSnapshot(data) {
+    currentData = data;
+    renderNetwork(currentData);
+}
+
 // --- Rendering ---
 
 function renderNetwork(data) {
     renderNetworkSummary(data.summary);
     updateAlertTabBadge(data.alerts, data.summary);
-    renderApps(data.apps);
+    updateApps();
 }
 
 function renderNetworkSummary(summary) {
@@ -53,52 +59,55 @@ function renderNetworkSummary(summary) {
     document.getElementById('bytes-out').textContent = summary.bytes_out_fmt;
 }
 
-function renderApps(apps) {
-    const container = document.getElementById('app-list');
-    const search = document.getElementById('search').value.toLowerCase();
+// Query parameters for the active filters, or '' when none are set.
+function networkQuery() {
+    const params = new URLSearchParams();
+    const search = document.getElementById('search').value.trim();
     const stateFilter = document.getElementById('state-filter').value;
     const threatFilter = document.getElementById('threat-filter').value;
-    const showLocalhost = document.getElementById('show-localhost').checked;
-
-    const filtered = apps.filter(app => {
-        if (search) {
-            const searchable = [
-                app.app,
-                app.display_name || '',
-                ...app.connections.map(c => c.remote_host),
-                ...app.connections.map(c => c.remote_addr),
-                ...app.connections.map(c => c.whois_org),
-                ...app.connections.map(c => String(c.remote_port)),
-            ].join(' ').toLowerCase();
-            if (!searchable.includes(search)) return false;
-        }
+    if (search) params.set('q', search);
+    if (stateFilter) params.set('state', stateFilter);
+    if (threatFilter === 'red') params.set('threat', 'red');
+    if (threatFilter === 'yellow' || threatFilter === 'hidegreen') params.set('threat', 'red,orange,yellow');
+    if (!document.getElementById('show-localhost').checked) params.set('localhost', '0');
+    return params.toString();
+}
 
-        if (threatFilter === 'red' && app.threat_color !== 'red') return false;
-        if (threatFilter === 'yellow' && !['red', 'yellow', 'orange'].includes(app.threat_color)) return false;
-        if (threatFilter === 'hidegreen' && app.threat_color === 'green') return false;
+// Unfiltered, render the snapshot's apps; filtered, ask /api/query/apps
+// for just the matching apps and connections.
+async function updateApps() {
+    const query = networkQuery();
+    if (!query) {
+        querySeq.apps = (querySeq.apps || 0) + 1;  // drop any query still in flight
+        shownApps = currentData ? currentData.apps : [];
+        renderApps(shownApps);
+        return;
+    }
+    try {
+        const result = await queryCollection('apps', query);
+        if (result) {
+            shownApps = result.items;
+            renderApps(shownApps);
+        }
+    } catch (err) {
+        console.error('App query failed:', err);
+    }
+}
 
-        return true;
-    });
+function renderApps(apps) {
+    const container = document.getElementById('app-list');
 
-    container.innerHTML = filtered.map((app, i) => {
+    container.innerHTML = apps.map((app, i) => {
         const appKey = `${app.app}:${app.pid}`;
         const isExpanded = expandedApps.has(appKey);
+        const conns = app.connections;
 
-        let conns = app.connections;
-        if (stateFilter) {
-            conns = conns.filter(c => c.state === stateFilter);
-        }
-        if (!showLocalhost) {
-            conns = conns.filter(c => {
-                const addr = c.remote_addr || c.local_addr || '';
-                return !addr.startsWith('127.') && addr !== '::1' && addr !== 'localhost';
-            });
-        }
-
-        const signClass = app.signed ? 'signed' : 'unsigned';
-        const signIcon = app.signed ? svgCheck() : svgX();
-        const signLabel = app.signed ? (app.sign_authority || 'Signed') : 'Unsigned';
-        const signTooltip = app.signed ? TOOLTIPS.signed + ' Signed by: ' + (app.sign_authority || 'Unknown') : TOOLTIPS.unsigned;
+        const signUnknown = app.signed === null;
+        const signClass = signUnknown ? 'unknown' : (app.signed ? 'signed' : 'unsigned');
+        const signIcon = app.signed ? svgCheck() : (signUnknown ? '' : svgX());
+        const signLabel = signUnknown ? 'Unknown' : (app.signed ? (app.sign_authority || 'Signed') : 'Unsigned');
+        const signTooltip = signUnknown ? TOOLTIPS.sign_unknown
+            : (app.signed ? TOOLTIPS.signed + ' Signed by: ' + (app.sign_authority || 'Unknown') : TOOLTIPS.unsigned);
 
         const threatTooltip = TOOLTIPS['threat_' + app.threat_color] || '';
 
@@ -141,7 +150,7 @@ function renderApps(apps) {
                         <span class="meta-label">MEM</span> ${app.mem.toFixed(1)}%
                     </span>
                     <span class="sign-badge ${signClass}" data-tooltip="${escAttr(signTooltip)}">
-                        ${signIcon} ${app.signed ? 'Signed' : 'Unsigned'}
+                        ${signIcon} ${signUnknown ? 'Signing unknown' : (app.signed ? 'Signed' : 'Unsigned')}
                     </span>
                 </div>
             </div>
@@ -161,7 +170,7 @@ function renderConnTable(conns, app) {
 
     const rows = conns.map(c => {
         const isListen = (c.state || '').toUpperCase() === 'LISTEN';
-        const hostClass = isListen ? 'conn-listen-local' : (c.remote_host === '(no rDNS)' ? 'conn-no-rdns' : 'conn-host');
+        const hostClass = isListen ? 'conn-listen-local' : (c.remote_host === '(no rDNS)' || c.rdns_pending ? 'conn-no-rdns' : 'conn-host');
         const displayHost = isListen ? (c.local_addr || '*') : (c.remote_host || '-');
         const displayAddr = isListen ? (c.local_addr || '*') : (c.remote_addr || '-');
         const displayPort = isListen ? (c.local_port || '-') : (c.remote_port || '-');
@@ -238,7 +247,7 @@ function showConnectionDetail(connJson, appName, pid) {
             <h4>DNS</h4>
             <div class="detail-grid">
                 <span class="detail-label">Reverse DNS</span>
-                <span class="detail-value" style="${conn.remote_host === '(no rDNS)' ? 'color:var(--text-muted);font-style:italic' : ''}">${esc(conn.remote_host || '(no rDNS)')}</span>
+                <span class="detail-value" style="${conn.remote_host === '(no rDNS)' || conn.rdns_pending ? 'color:var(--text-muted);font-style:italic' : ''}">${esc(conn.remote_host || '(no rDNS)')}</span>
             </div>
         </div>
 
@@ -298,18 +307,17 @@ function toggleApp(appKey) {
     } else {
         expandedApps.add(appKey);
     }
-    if (currentData) renderApps(currentData.apps);
+    renderApps(shownApps);
 }
 
 function expandAll() {
-    if (!currentData) return;
-    currentData.apps.forEach(a => expandedApps.add(`${a.app}:${a.pid}`));
-    renderApps(currentData.apps);
+    shownApps.forEach(a => expandedApps.add(`${a.app}:${a.pid}`));
+    renderApps(shownApps);
 }
 
 function collapseAll() {
     expandedApps.clear();
-    if (currentData) renderApps(currentData.apps);
+    renderApps(shownApps);
 }
 
 // --- Filters ---
@@ -318,19 +326,15 @@ function setupFilterListeners() {
     ['search', 'state-filter', 'threat-filter', 'show-localhost'].forEach(id => {
         const el = document.getElementById(id);
         if (el) {
-            el.addEventListener('change', () => {
-                if (currentData) renderApps(currentData.apps);
-            });
+            el.addEventListener('change', updateApps);
         }
     });
     const searchEl = document.getElementById('search');
     if (searchEl) {
-        searchEl.addEventListener('input', () => {
-            if (currentData) renderApps(currentData.apps);
-        });
+        searchEl.addEventListener('input', updateApps);
     }
 }
 
 function onSearchClear() {
-    if (currentData) renderApps(currentData.apps);
+    updateApps();
 }
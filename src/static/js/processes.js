@@ -22,11 +22,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
 async function refresh() {
     try {
-        const [connResp, sysResp] = await Promise.all([
-            fetch('/api/connections?full_processes=1'),
+        const [connData, sysResp] = await Promise.all([
+            fetchConnections(),
             fetch('/api/system')
         ]);
-        const connData = await connResp.json();
         const sysData = await sysResp.json();
         currentData = { ...connData, system: sysData };
         renderProcesses(currentData);
@@ -36,12 +35,18 @@ async function refresh() {
     }
 }
 
+// Pushed by /api/stream (see startAutoRefresh in shared.js)
+function onSnapshot(data) {
+    currentData = { ...data, system: data.system_stats };
+    renderProcesses(currentData);
+}
+
 // --- Rendering ---
 
 function renderProcesses(data) {
     renderSystemStats(data.system);
     updateAlertTabBadge(data.alerts, data.summary);
-    renderProcessTable(data.top_processes);
+    loadProcessTable();
 }
 
 function renderSystemStats(sys) {
@@ -65,47 +70,30 @@ function renderSystemStats(sys) {
     document.getElementById('sys-disk-detail').textContent = `${sys.disk_used_fmt} / ${sys.disk_total_fmt}`;
 }
 
-function renderProcessTable(processes) {
-    const container = document.getElementById('process-table-body');
-    if (!container) return;
-
-    let filtered = processes;
-    if (processSearch) {
-        const q = processSearch.toLowerCase();
-        filtered = processes.filter(p => {
-            const searchable = [
-                p.display_name || '', p.name || '', p.command || '', String(p.pid)
-            ].join(' ').toLowerCase();
-            return searchable.includes(q);
-        });
+// The snapshot only carries the top processes; the full table is filtered
+// and sorted server-side through /api/query/processes.
+async function loadProcessTable() {
+    const field = processSort.col === 'name' ? 'display_name' : processSort.col;
+    const params = new URLSearchParams({ sort: (processSort.asc ? '' : '-') + field });
+    if (processSearch) params.set('q', processSearch);
+    try {
+        const result = await queryCollection('processes', params);
+        if (result) renderProcessTable(result.items, result.total);
+    } catch (err) {
+        console.error('Process query failed:', err);
     }
+}
 
-    // Sort
-    const sorted = [...filtered].sort((a, b) => {
-        let va, vb;
-        switch (processSort.col) {
-            case 'name':
-                va = (a.display_name || a.name).toLowerCase();
-                vb = (b.display_name || b.name).toLowerCase();
-                return processSort.asc ? va.localeCompare(vb) : vb.localeCompare(va);
-            case 'pid':
-                va = a.pid; vb = b.pid; break;
-            case 'cpu':
-                va = a.cpu; vb = b.cpu; break;
-            case 'mem':
-                va = a.mem; vb = b.mem; break;
-            default:
-                va = a.cpu; vb = b.cpu;
-        }
-        return processSort.asc ? va - vb : vb - va;
-    });
+function renderProcessTable(processes, total) {
+    const container = document.getElementById('process-table-body');
+    if (!container) return;
 
-    const rows = renderProcessTableRows(sorted, { showRank: false, maxCommand: 80, clickable: true });
+    const rows = renderProcessTableRows(processes, { showRank: false, maxCommand: 80, clickable: true });
     container.innerHTML = rows || '<tr><td colspan="5" class="top-procs-empty">No matching processes</td></tr>';
 
     // Update count
     const countEl = document.getElementById('process-count');
-    if (countEl) countEl.textContent = `${filtered.length} process${filtered.length !== 1 ? 'es' : ''}`;
+    if (countEl) countEl.textContent = `${total} process${total !== 1 ? 'es' : ''}`;
 
     // Update sort indicators
     document.querySelectorAll('.sort-header').forEach(th => {
@@ -123,7 +111,7 @@ function sortBy(col) {
         processSort.col = col;
         processSort.asc = false;
     }
-    if (currentData) renderProcessTable(currentData.top_processes);
+    loadProcessTable();
 }
 
 // --- Search ---
@@ -133,7 +121,7 @@ function setupProcessSearch() {
     if (input) {
         input.addEventListener('input', () => {
             processSearch = input.value;
-            if (currentData) renderProcessTable(currentData.top_processes);
+            loadProcessTable();
         });
     }
 }
@@ -142,5 +130,5 @@ function onSearchClear() {
     processSearch = '';
     const input = document.getElementById('process-search');
     if (input) input.value = '';
-    if (currentData) renderProcessTable(currentData.top_processes);
+    loadProcessTable();
 }
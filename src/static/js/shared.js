@@ -4,6 +4,8 @@ let refreshInterval = 120000;
 let refreshTimer = null;
 let paused = false;
 let currentData = null;
+let streamQuery = '';      // /api/connections query the page streams (e.g. full_processes=1)
+let eventSource = null;
 
 // --- Tooltip definitions ---
 const TOOLTIPS = {
@@ -26,18 +28,58 @@ const TOOLTIPS = {
     'threat_red': 'Threat Score: High. Significant risk indicators found. You should investigate this application.',
     'signed': 'This app has a valid Apple code signature, confirming it was distributed by an identified developer.',
     'unsigned': 'WARNING: This app has no valid code signature. It cannot be verified as legitimate software.',
+    'sign_unknown': 'Code signing cannot be checked on this system (no codesign tool).',
 };
 
 // --- Auto-Refresh ---
 
+// Pages that define onSnapshot(data) get snapshots pushed over /api/stream
+// as soon as the server collects them; otherwise (or if the stream cannot
+// be opened) they poll refresh() every refreshInterval.
 function startAutoRefresh() {
     if (refreshTimer) clearInterval(refreshTimer);
+    refreshTimer = null;
+    stopStream();
     if (refreshInterval > 0 && !paused) {
-        refreshTimer = setInterval(refresh, refreshInterval);
+        if (!startStream()) refreshTimer = setInterval(refresh, refreshInterval);
     }
     updateRefreshIndicator();
 }
 
+function startStream() {
+    if (typeof EventSource === 'undefined' || typeof onSnapshot !== 'function') return false;
+    // The stream tracks its own base version, separate from polled fetches.
+    const key = 'stream:' + streamQuery;
+    const state = connectionsState[key];
+    const params = new URLSearchParams(streamQuery);
+    if (state) params.set('since', state.version);
+    eventSource = new EventSource('/api/stream?' + params);
+    eventSource.addEventListener('snapshot', (e) => {
+        const data = storeConnections(key, JSON.parse(e.data), null);
+        if (data === null) {
+            // Delta from a base we no longer hold: reopen for a full payload.
+            stopStream();
+            startStream();
+            return;
+        }
+        onSnapshot(data);
+        updateRefreshTime();
+    });
+    eventSource.onerror = () => {
+        // The browser reconnects by itself unless the stream was refused.
+        if (eventSource.readyState === EventSource.CLOSED) {
+            stopStream();
+            refreshTimer = setInterval(refresh, refreshInterval);
+        }
+    };
+    return true;
+}
+
+function stopStream() {
+    if (eventSource) eventSource.close();
+    eventSource = null;
+}
+
 function togglePause() {
     paused = !paused;
     const label = document.getElementById('pause-label');
@@ -82,6 +124,112 @@ function setupRefreshIntervalListener() {
     }
 }
 
+// Ask the server to collect fresh data now, then redraw.  Concurrent
+// requests from several tabs are coalesced into one collection server-side.
+async function forceRefresh() {
+    try {
+        await fetch('/api/refresh', { method: 'POST' });
+    } catch (err) {
+        console.error('Forced refresh failed:', err);
+    }
+    refresh();
+}
+
+// --- Connections payload (ETag / deltas) ---
+
+// Per query string: the last payload received, its version and ETag.
+const connectionsState = {};
+
+async function fetchConnections(query = '') {
+    const state = connectionsState[query];
+    const params = new URLSearchParams(query);
+    const headers = {};
+    if (state) {
+        params.set('since', state.version);
+        if (state.etag) headers['If-None-Match'] = state.etag;
+    }
+    const resp = await fetch('/api/connections?' + params, { headers, cache: 'no-store' });
+    if (resp.status === 304) return state.data;
+    const data = storeConnections(query, await resp.json(), resp.headers.get('ETag'));
+    return data === null ? fetchConnections(query) : data;
+}
+
+// Turn a full or delta response into the current payload and remember it.
+// A delta whose base is not the version we hold cannot be applied: the
+// state is dropped and null returned so the caller fetches a full payload.
+function storeConnections(query, body, etag) {
+    const state = connectionsState[query];
+    if (body.delta && (!state || body.since !== state.version)) {
+        delete connectionsState[query];
+        return null;
+    }
+    const data = body.delta
+        ? { ...applyConnectionsDelta(state.data, body.delta), version: body.version }
+        : body;
+    if (body.version !== undefined) {
+        connectionsState[query] = { version: body.version, etag, data };
+    }
+    return data;
+}
+
+function applyConnectionsDelta(base, delta) {
+    const data = { ...base };
+    data.apps = patchList(base.apps, delta.apps, a => a.pid, patchApp);
+    data.alerts = patchList(base.alerts, delta.alerts, a => a.id);
+    for (const section of ['top_processes', 'system_stats', 'summary']) {
+        if (section in delta) data[section] = delta[section];
+    }
+    return data;
+}
+
+function patchList(items, changes, key, patchItem) {
+    if (Array.isArray(changes)) return changes;
+    const byKey = new Map(items.map(item => [key(item), item]));
+    changes.removed.forEach(k => byKey.delete(k));
+    changes.added.forEach(item => byKey.set(key(item), item));
+    changes.changed.forEach(item => {
+        const k = key(item);
+        byKey.set(k, patchItem ? patchItem(byKey.get(k), item) : item);
+    });
+    if (!changes.order) return [...byKey.values()];
+    return changes.order.map(k => byKey.get(k));
+}
+
+function patchApp(previous, changed) {
+    const app = { ...changed };
+    if (changed.connections_delta) {
+        app.connections = patchList(previous.connections, changed.connections_delta, connKey);
+        delete app.connections_delta;
+    } else if (!changed.connections) {
+        app.connections = previous.connections;
+    }
+    return app;
+}
+
+// Mirrors delta.connection_key() on the server
+function connKey(c) {
+    return [c.protocol, c.local_addr, c.local_port, c.remote_addr, c.remote_port]
+        .map(v => v ?? '').join('|');
+}
+
+// --- Query API ---
+
+// Latest request per collection, so a slow response to an older filter
+// never overwrites the result of a newer one.
+const querySeq = {};
+
+// Fetch one collection from /api/query with the given filters.  Resolves
+// to { total, items }, or null if a newer query for it was started since.
+async function queryCollection(collection, params) {
+    const seq = (querySeq[collection] || 0) + 1;
+    querySeq[collection] = seq;
+    const resp = await fetch(`/api/query/${collection}?` + params, { cache: 'no-store' });
+    const body = await resp.json();
+    if (querySeq[collection] !== seq) return null;
+    if (!resp.ok) throw new Error(body.error || resp.statusText);
+    return body;
+}
+
 // --- Alert Badge ---
 
 function updateAlertTabBadge(alerts, summary) {
@@ -116,8 +264,8 @@ function showProcessDetail(btn) {
     const modal = document.getElementById('modal-overlay');
     const content = document.getElementById('modal-content');
 
-    const signClass = app.signed ? 'signed' : 'unsigned';
-    const signLabel = app.signed ? 'Valid' : 'Not signed';
+    const signClass = app.signed === null ? 'unknown' : (app.signed ? 'signed' : 'unsigned');
+    const signLabel = app.signed === null ? 'Cannot be checked' : (app.signed ? 'Valid' : 'Not signed');
 
     const flagsHtml = (app.threat_flags && app.threat_flags.length > 0)
         ? app.threat_flags.map(f => `<div class="modal-flag">
@@ -290,7 +438,7 @@ async function killProcess(pid) {
         const result = await resp.json();
         if (resp.ok) {
             closeModal();
-            setTimeout(refresh, 1000);
+            setTimeout(forceRefresh, 1000);
         } else {
             alert(`Failed to terminate process: ${result.error}`);
         }
@@ -361,7 +509,7 @@ function setupBaseKeyboardShortcuts(extraHandler) {
         }
 
         switch (e.key) {
-            case 'r': refresh(); break;
+            case 'r': forceRefresh(); break;
             case 'p': togglePause(); break;
             case 'Escape': closeModal(); break;
             case '?': window.location.href = '/help'; break;
@@ -383,6 +531,9 @@ function renderProcessTableRows(processes, options = {}) {
         const networkBadge = p.has_network
             ? '<span class="top-proc-badge network" data-tooltip="Has active network connections">NET</span>'
             : '';
+        const unsignedBadge = p.signed === false
+            ? '<span class="top-proc-badge unsigned" data-tooltip="No valid code signature">UNSIGNED</span>'
+            : '';
 
         const cpuBarWidth = Math.min(p.cpu, 100);
         const cpuBarClass = p.cpu > 50 ? 'cpu-high' : (p.cpu > 20 ? 'cpu-medium' : 'cpu-low');
@@ -393,7 +544,7 @@ function renderProcessTableRows(processes, options = {}) {
 
         return `<tr${clickAttr}>
             ${showRank ? `<td class="top-proc-rank">${i + 1}</td>` : ''}
-            <td class="top-proc-name">${esc(displayName)}${nameHint}${networkBadge}</td>
+            <td class="top-proc-name">${esc(displayName)}${nameHint}${networkBadge}${unsignedBadge}</td>
             <td class="top-proc-pid">${p.pid}</td>
             <td class="top-proc-cpu">
                 <div class="cpu-bar-wrapper">
@@ -0,0 +1,148 @@
+"""Bounded, thread-safe cache with per-entry TTL and LRU eviction.
+
+Expired entries are dropped lazily when read and periodically by a shared
+sweeper thread, so caches that are written far more often than read
+(e.g. per-IP enrichment) do not grow without limit.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from src.config import CACHE_SWEEP_INTERVAL
+
+_registry = weakref.WeakSet()
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+class TTLCache:
+    """Mapping with a maximum size, per-entry expiry and hit statistics.
+
+    Args:
+        maxsize: entries kept before the least recently used is evicted.
+        ttl: default lifetime of an entry in seconds (None = no expiry).
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at, stored_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        _registry.add(self)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        """Return the value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._data[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            if count:
+                self._hits += 1
+            return entry[0]
+
+    def get_entry(self, key):
+        """Return (value, stored_at) for a live entry, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+                return None
+            return entry[0], entry[2]
+
+    def set(self, key, value, ttl=None, timestamp=None):
+        """Store a value.
+
+        `ttl` overrides the cache default for this entry; `timestamp` is
+        when the value was obtained (defaults to now) and anchors expiry.
+        """
+        stored_at = timestamp if timestamp is not None else time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = stored_at + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def keys(self):
+        """Return the keys of unexpired entries, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [key for key, (_, expires_at, _) in self._data.items()
+                    if expires_at is None or expires_at > now]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def sweep(self):
+        """Drop every expired entry. Returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._data.items()
+                       if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self._expirations += len(expired)
+            return len(expired)
+
+    def stats(self):
+        """Return size, limits and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+_MISSING = object()
+
+
+def start_sweeper():
+    """Start the thread that periodically sweeps every TTLCache (once)."""
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is not None:
+            return
+        _sweeper = threading.Thread(target=_sweep_loop, name="macwatch-cache-sweep",
+                                    daemon=True)
+        _sweeper.start()
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL)
+        for cache in list(_registry):
+            cache.sweep()
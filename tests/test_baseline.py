@@ -0,0 +1,24 @@
+from src import cache_store
+from src.analysis import baseline
+
+
+def test_capped_endpoints_are_not_reported_again(monkeypatch):
+    monkeypatch.setattr(baseline, "BASELINE_MAX_PER_APP", 3)
+    puts = []
+    monkeypatch.setattr(cache_store, "put", lambda *args: puts.append(args))
+    endpoints = [(f"93.184.216.{i}", 443, f"93.184.216.{i}:443") for i in range(5)]
+
+    b = baseline.Baseline()
+    counts = []
+    for _ in range(3):
+        # Two PIDs of the same app share the refresh's endpoints
+        new = b.observe("curl", endpoints[:3]) + b.observe("curl", endpoints[2:])
+        b.flush()
+        counts.append(len(new))
+    assert counts == [5, 0, 0]
+    assert len(puts) == 1  # one write per app per changed refresh
+
+    # Endpoints that stop appearing are trimmed back to the cap
+    b.observe("curl", [(f"198.51.100.{i}", 80, "") for i in range(2)])
+    b.flush()
+    assert b.stats()["endpoints"] == 3
@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+from src import history
+
+
+@pytest.fixture
+def store(tmp_path):
+    history.open_store(str(tmp_path / "history.db"))
+    yield history
+    history._conn.close()
+    history._conn = None
+    history._last_counters.clear()
+
+
+def test_long_range_reads_a_table_that_still_holds_it(store):
+    now = time.time()
+    app = {"app": "curl", "bytes_in": 1, "bytes_out": 1, "connection_count": 1,
+           "cpu": 1.0, "mem": 1.0}
+    for days in (20, 10, 3, 0):
+        store.record([app], {"cpu_percent": 5.0}, timestamp=now - days * 86400)
+
+    # A 30-day range: the 1m table (7 days) would drop the first two samples
+    result = store.query("curl", int(now - 30 * 86400), int(now), 2592)
+    assert result["resolution"] == "1h"
+    assert len(result["points"]) == 4
+
+    result = store.query("curl", int(now - 3600), int(now), 60)
+    assert result["resolution"] == "1m"
@@ -0,0 +1,30 @@
+from src.collectors import lsof
+
+
+def _fields(text):
+    return list(lsof.parse_fields(text.splitlines(keepends=True)))
+
+
+def test_escaped_command_name_is_decoded():
+    conns = _fields(
+        "p501\ncSlack\\x20Hel\nLuser\n"
+        "f23\nau\ntIPv4\nPTCP\nn192.168.1.23:50100->1.2.3.4:443\nTST=ESTABLISHED\n"
+    )
+    assert len(conns) == 1
+    assert conns[0]["app"] == "Slack Hel"
+    assert conns[0]["fd"] == "23u"
+    assert conns[0]["remote_addr"] == "1.2.3.4"
+    assert conns[0]["remote_port"] == 443
+    assert conns[0]["state"] == "ESTABLISHED"
+
+
+def test_listening_and_ipv6_endpoints():
+    conns = _fields(
+        "p88\ncmDNSRespo\nL_mdnsresponder\n"
+        "f5\nau\ntIPv4\nPUDP\nn*:5353\n"
+        "f6\nau\ntIPv6\nPTCP\nn[::1]:8077->[::1]:50200\nTST=ESTABLISHED\n"
+    )
+    assert [c["fd"] for c in conns] == ["5u", "6u"]
+    assert conns[0]["local_addr"] == "*" and conns[0]["local_port"] == 5353
+    assert conns[0]["remote_addr"] is None and conns[0]["state"] is None
+    assert conns[1]["local_addr"] == "::1" and conns[1]["remote_port"] == 50200
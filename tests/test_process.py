@@ -0,0 +1,67 @@
+import subprocess
+
+from src.collectors import process
+
+_PS = (
+    "  412     1   412 root            0.0  0.1   5120  4194304   0  31 Ss   "
+    "0:00.12 Mon Feb 16 15:44:11 2026 09-20:52:44 /usr/sbin/sshd\n"
+    "  530   412   530 user            1.5  0.4  20480  4194304   0  31 S    "
+    "0:01.50 Mon Feb 16 15:50:02 2026 09-20:46:53 "
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome\n"
+)
+_ARGS = {
+    412: "sshd: user@ttys001",
+    530: "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome --restore",
+}
+
+
+def test_path_comes_from_comm_and_command_from_args(monkeypatch):
+    calls = []
+
+    def run(argv, timeout=None):
+        calls.append(argv)
+        if "-p" in argv:
+            pids = [int(p) for p in argv[-1].split(",")]
+            out = "".join(f"{pid:5d} {_ARGS[pid]}\n" for pid in pids)
+        else:
+            out = _PS
+        return subprocess.CompletedProcess(argv, 0, out, "")
+
+    monkeypatch.setattr(process.runner, "run", run)
+    monkeypatch.setattr(process, "prefetch_codesign", lambda paths: None)
+    monkeypatch.setattr(process, "_args_cache", {})
+
+    table = process.collect_process_table()
+    sshd, chrome = table.get(412), table.get(530)
+    assert sshd.path == "/usr/sbin/sshd"
+    assert sshd.command == "sshd: user@ttys001"
+    assert chrome.path == "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    assert chrome.command.endswith("--restore")
+    assert chrome.lstart == "Mon Feb 16 15:50:02 2026"
+    assert len(calls) == 2
+
+    # Known processes do not fetch their command lines again
+    process.collect_process_table()
+    assert len(calls) == 3
+
+
+def test_detail_for_unknown_pid_runs_ps_for_that_pid_only(monkeypatch):
+    calls = []
+
+    def run(argv, timeout=None):
+        calls.append(argv)
+        if argv[:2] == ["ps", "-p"]:
+            return subprocess.CompletedProcess(argv, 0, _PS.splitlines()[1] + "\n", "")
+        return subprocess.CompletedProcess(argv, 0, "", "")
+
+    monkeypatch.setattr(process.runner, "run", run)
+    monkeypatch.setattr(process, "prefetch_codesign",
+                        lambda paths: calls.append(["prefetch"]))
+    process._detail_cache.clear()
+
+    table = process.ProcessTable({})
+    detail = process.collect_process_detail(530, table=table)
+    assert detail["ppid"] == 412
+    assert detail["user"] == "user"
+    assert ["ps", "-p", "530", "-o", process._PS_COLUMNS] in calls
+    assert not any("-eo" in argv or argv == ["prefetch"] for argv in calls)
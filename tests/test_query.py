@@ -0,0 +1,32 @@
+from src import query
+
+
+def _app(name, color, flags=(), connections=()):
+    return {"app": name, "display_name": name, "pid": len(name), "threat_color": color,
+            "threat_score": 0, "threat_flags": list(flags), "connections": list(connections)}
+
+
+def _conn(remote, state="ESTABLISHED", flags=()):
+    return {"remote_addr": remote, "remote_port": 443, "remote_host": "", "whois_org": "",
+            "state": state, "flags": list(flags)}
+
+
+def test_severity_matches_app_level_flags():
+    red = {"severity": "red", "type": "unsigned_app"}
+    data = {"apps": [
+        _app("unsigned", "red", [red], [_conn("93.184.216.34")]),
+        _app("clean", "green", [], [_conn("93.184.216.35")]),
+    ]}
+    result = query.run(data, "apps", {"severity": "red"})
+    assert [a["app"] for a in result["items"]] == ["unsigned"]
+
+
+def test_search_threat_list_and_localhost():
+    data = {"apps": [
+        _app("curl", "orange", connections=[_conn("93.184.216.34"), _conn("127.0.0.1")]),
+        _app("sshd", "green", connections=[_conn("127.0.0.1", state="LISTEN")]),
+        _app("nc", "red", connections=[_conn("198.51.100.7")]),
+    ]}
+    result = query.run(data, "apps", {"threat": "red,orange", "localhost": "0"})
+    assert [(a["app"], a["connection_count"]) for a in result["items"]] == [("curl", 1), ("nc", 1)]
+    assert [a["app"] for a in query.run(data, "apps", {"q": "198.51"})["items"]] == ["nc"]
@@ -0,0 +1,40 @@
+import time
+
+from src.sampler import Sampler
+
+
+def _wait(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not predicate():
+        time.sleep(0.01)
+
+
+def test_failed_collection_keeps_previous_result():
+    calls = []
+
+    def collect():
+        calls.append(None)
+        if len(calls) == 1:
+            return {"cpu_percent": 5.0}
+        if len(calls) == 2:
+            raise RuntimeError("top timed out")
+        return None  # collectors report "nothing read" as None
+
+    sampler = Sampler({"cpu": (collect, 0.01)}, build=dict)
+    sampler.start()
+    try:
+        _wait(lambda: sampler.get_stats()["sources"]["cpu"]["failures"] >= 3)
+        stats = sampler.get_stats()
+        assert stats["version"] == 1
+        assert sampler.latest().data == {"cpu": {"cpu_percent": 5.0}}
+    finally:
+        sampler.stop()
+
+
+def test_version_tags_from_another_process_are_rejected():
+    sampler = Sampler({}, build=dict)
+    other = Sampler({}, build=dict)
+    assert sampler.version_of(sampler.tag(7)) == 7
+    assert sampler.version_of(other.tag(7)) is None
+    assert sampler.version_of("7") is None
+    assert sampler.version_of(None) is None
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from src.collectors import procfs, sockdiag
+
+# inet_diag dump replies recorded on a Linux host (trimmed to four sockets
+# plus NLMSG_DONE) together with /proc/net lines for the same sockets: a
+# 127.0.0.1 listener, both ends of a loopback connection, and a [::1] listener.
+_REPLY_V4 = bytes.fromhex(
+    "7c0000001400020001000000f3450000020a0000d07900007f0000010000000000000000"
+    "000000000000000000000000000000000000000000000000130000000000000000000000"
+    "00000000800000000000000023620000050008000000000008000f00000000000c001500"
+    "010000000000000006001600520000007c0000001400020001000000f345000002010000"
+    "b64ad0797f0000010000000000000000000000007f000001000000000000000000000000"
+    "000000001400000000000000000000000000000000000000000000002462000005000800"
+    "0000000008000f00000000000c001500010000000000000006001600520000007c000000"
+    "1400020001000000f345000002010000d079b64a7f000001000000000000000000000000"
+    "7f0000010000000000000000000000000000000015000000000000000000000000000000"
+    "000000000000000025620000050008000000000008000f00000000000c00150001000000"
+    "0000000006001600520000001400000003000200010000000000000000000000")
+_REPLY_V6 = bytes.fromhex(
+    "840000001400020001000000f34500000a0a0000b6690000000000000000000000000000"
+    "000000010000000000000000000000000000000000000000160000000000000000000000"
+    "00000000800000000000000026620000050008000000000005000b000100000008000f00"
+    "000000000c00150001000000000000000600160012000000140000000300020001000000"
+    "0000000000000000")
+_PROC_NET = [
+    ("tcp", "   2: 0100007F:D079 00000000:0000 0A 00000000:00000000 00:00000000 "
+            "00000000     0        0 25123 1 000000007b2858ed 100 0 0 10 0"),
+    ("tcp", "   4: 0100007F:B64A 0100007F:D079 01 00000000:00000000 00:00000000 "
+            "00000000     0        0 25124 2 00000000ec01eefd 20 0 0 10 -1"),
+    ("tcp", "   5: 0100007F:D079 0100007F:B64A 01 00000000:00000000 00:00000000 "
+            "00000000     0        0 25125 1 00000000b45b9c1d 20 0 0 10 -1"),
+    ("tcp6", "   0: 00000000000000000000000001000000:B669 "
+             "00000000000000000000000000000000:0000 0A 00000000:00000000 "
+             "00:00000000 00000000     0        0 25126 1 000000002718b8b7 100 0 0 10 0"),
+]
+_OWNERS = {inode: (4242, "python3", "user", str(fd))
+           for fd, inode in enumerate((25123, 25124, 25125, 25126), 3)}
+
+
+class _RecordedSocket:
+    def __init__(self, reply):
+        self._reply = reply
+
+    def send(self, data):
+        pass
+
+    def recv(self, size):
+        reply, self._reply = self._reply, b""
+        return reply
+
+
+def test_netlink_reply_matches_proc_net():
+    from_netlink = []
+    for reply, query in ((_REPLY_V4, sockdiag._QUERIES[0]), (_REPLY_V6, sockdiag._QUERIES[1])):
+        family, protocol_num, protocol, addr_type, states = query
+        for msg in sockdiag._dump(_RecordedSocket(reply), 1, family, protocol_num, states):
+            from_netlink.append(
+                sockdiag._record(msg, family, protocol, addr_type, _OWNERS[msg[-1]]))
+
+    from_proc = [
+        procfs._parse_net_line(line, "TCP", "IPv6" if table == "tcp6" else "IPv4", _OWNERS)
+        for table, line in _PROC_NET
+    ]
+    assert from_netlink == from_proc
+    assert from_proc[1]["remote_addr"] == "127.0.0.1"
+    assert from_proc[1]["state"] == "ESTABLISHED"
+    assert from_proc[3]["local_addr"] == "::1" and from_proc[3]["state"] == "LISTEN"
+
+
+@pytest.fixture
+def fake_proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(procfs, "PROC", str(tmp_path))
+    monkeypatch.setattr(procfs, "_owners", {})
+
+    def add(pid, fds):
+        (tmp_path / str(pid) / "fd").mkdir(parents=True)
+        (tmp_path / str(pid) / "comm").write_text("curl\n")
+        for fd, target in fds.items():
+            os.symlink(target, tmp_path / str(pid) / "fd" / str(fd))
+    return add
+
+
+def test_socket_owners_scans_only_for_new_inodes(fake_proc, monkeypatch):
+    fake_proc(100, {0: "/dev/null", 3: "socket:[501]"})
+    fake_proc(200, {4: "socket:[502]"})
+
+    scans = []
+    scan = procfs._scan_owners
+    monkeypatch.setattr(procfs, "_scan_owners", lambda *a: scans.append(a) or scan(*a))
+
+    owners = procfs.socket_owners({501, 502})
+    assert owners[501][0] == 100 and owners[501][3] == "3"
+    assert owners[502][0] == 200
+    assert len(scans) == 1
+
+    # Same sockets: confirmed by readlink, no scan
+    assert procfs.socket_owners({501, 502}) == owners
+    assert len(scans) == 1
+
+    # A new socket triggers one scan; a closed one is dropped
+    fake_proc(300, {5: "socket:[503]"})
+    owners = procfs.socket_owners({502, 503})
+    assert sorted(owners) == [502, 503]
+    assert len(scans) == 2